@@ -1,79 +1,168 @@
 import tkinter as tk
 from tkinter import messagebox
 import csv
-from datetime import datetime, timedelta
+from datetime import date
+from itertools import islice
+
+from main import ContactListView, OrderedIndex, birthday_slot, upcoming_slot_ranges
 
 class Contact:
+    __slots__ = ('name', 'phone', 'email', 'birthday', 'birthday_day', 'favorite')
+
     def __init__(self, name, phone, email, birthday, favorite=False):
         self.name = name
         self.phone = phone
         self.email = email
         self.birthday = birthday
+        self.birthday_day = birthday_slot(birthday)
         self.favorite = favorite
 
 class Node:
+    __slots__ = ('contact', 'left', 'right', 'height', 'size')
+
     def __init__(self, contact):
         self.contact = contact
         self.left = None
         self.right = None
+        self.height = 1
+        self.size = 1
 
 class BinarySearchTree:
     def __init__(self):
         self.root = None
+        self.size = 0
+        self.birthday_index = OrderedIndex()
+
+    def __len__(self):
+        return self.size
 
     def insert(self, contact):
-        if self.root is None:
-            self.root = Node(contact)
-        else:
-            self._insert(self.root, contact)
+        self.root = self._insert(self.root, contact)
+        self.size += 1
+        if contact.birthday_day:
+            self.birthday_index.add((contact.birthday_day, contact.name), contact)
+
+    def update(self, contact, phone, email, birthday):
+        if contact.birthday_day:
+            self.birthday_index.remove((contact.birthday_day, contact.name), contact)
+        contact.phone = phone
+        contact.email = email
+        contact.birthday = birthday
+        contact.birthday_day = birthday_slot(birthday)
+        if contact.birthday_day:
+            self.birthday_index.add((contact.birthday_day, contact.name), contact)
 
     def _insert(self, node, contact):
-        if contact.name < node.contact.name:
-            if node.left is None:
-                node.left = Node(contact)
-            else:
-                self._insert(node.left, contact)
+        if node is None:
+            return Node(contact)
+        path = []
+        current = node
+        while current is not None:
+            path.append(current)
+            current = current.left if contact.name < current.contact.name else current.right
+        parent = path[-1]
+        if contact.name < parent.contact.name:
+            parent.left = Node(contact)
         else:
-            if node.right is None:
-                node.right = Node(contact)
+            parent.right = Node(contact)
+        return self._rebalance_path(path)
+
+    def _height(self, node):
+        return node.height if node else 0
+
+    def _size(self, node):
+        return node.size if node else 0
+
+    def _update(self, node):
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+        node.size = 1 + self._size(node.left) + self._size(node.right)
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rebalance(self, node):
+        self._update(node)
+        balance = self._height(node.left) - self._height(node.right)
+        if balance > 1:
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def _rebalance_path(self, path):
+        for i in range(len(path) - 1, 0, -1):
+            node = path[i]
+            parent = path[i - 1]
+            if parent.left is node:
+                parent.left = self._rebalance(node)
             else:
-                self._insert(node.right, contact)
+                parent.right = self._rebalance(node)
+        return self._rebalance(path[0])
+
+    def height(self):
+        return self._height(self.root)
 
     def find(self, name):
         return self._find(self.root, name)
 
     def _find(self, node, name):
-        if node is None:
-            return None
-        if node.contact.name == name:
-            return node.contact
-        elif name < node.contact.name:
-            return self._find(node.left, name)
-        else:
-            return self._find(node.right, name)
+        while node is not None:
+            if node.contact.name == name:
+                return node.contact
+            node = node.left if name < node.contact.name else node.right
+        return None
 
     def delete(self, name):
         self.root, deleted_contact = self._delete(self.root, name)
+        if deleted_contact:
+            self.size -= 1
+        if deleted_contact and deleted_contact.birthday_day:
+            self.birthday_index.remove((deleted_contact.birthday_day, deleted_contact.name), deleted_contact)
         return deleted_contact
 
     def _delete(self, node, name):
-        if node is None:
+        path = []
+        current = node
+        while current is not None and current.contact.name != name:
+            path.append(current)
+            current = current.left if name < current.contact.name else current.right
+        if current is None:
             return node, None
-        deleted_contact = None
-        if name < node.contact.name:
-            node.left, deleted_contact = self._delete(node.left, name)
-        elif name > node.contact.name:
-            node.right, deleted_contact = self._delete(node.right, name)
+        deleted_contact = current.contact
+        if current.left is not None and current.right is not None:
+            path.append(current)
+            temp = current.right
+            while temp.left is not None:
+                path.append(temp)
+                temp = temp.left
+            current.contact = temp.contact
+            current = temp
+        child = current.left or current.right
+        if not path:
+            return child, deleted_contact
+        parent = path[-1]
+        if parent.left is current:
+            parent.left = child
         else:
-            deleted_contact = node.contact
-            if node.left is None:
-                return node.right, deleted_contact
-            elif node.right is None:
-                return node.left, deleted_contact
-            temp = self._min_value_node(node.right)
-            node.contact = temp.contact
-            node.right, _ = self._delete(node.right, temp.contact.name)
-        return node, deleted_contact
+            parent.right = child
+        return self._rebalance_path(path), deleted_contact
 
     def _min_value_node(self, node):
         current = node
@@ -82,15 +171,43 @@ class BinarySearchTree:
         return current
 
     def list_contacts(self):
-        contacts = []
-        self._in_order_traversal(self.root, contacts)
-        return contacts
-
-    def _in_order_traversal(self, node, contacts):
-        if node is not None:
-            self._in_order_traversal(node.left, contacts)
-            contacts.append(node.contact)
-            self._in_order_traversal(node.right, contacts)
+        return list(self.iter_contacts())
+
+    def iter_contacts(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.contact
+            node = node.right
+
+    def iter_at(self, i):
+        # Descend by subtree sizes to position i, keeping the in-order stack, then walk on from there.
+        stack = []
+        current = self.root
+        while current is not None:
+            left = self._size(current.left)
+            if i <= left:
+                stack.append(current)
+                if i == left:
+                    break
+                current = current.left
+            else:
+                i -= left + 1
+                current = current.right
+        while stack:
+            node = stack.pop()
+            yield node.contact
+            current = node.right
+            while current is not None:
+                stack.append(current)
+                current = current.left
+
+    def contacts_page(self, offset, limit):
+        return list(islice(self.iter_at(offset), limit))
 
     def toggle_favorite(self, name):
         contact = self.find(name)
@@ -105,32 +222,32 @@ class BinarySearchTree:
         return favorites
 
     def _in_order_favorites(self, node, favorites):
-        if node is not None:
-            self._in_order_favorites(node.left, favorites)
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
             if node.contact.favorite:
                 favorites.append(node.contact)
-            self._in_order_favorites(node.right, favorites)
+            node = node.right
 
     def list_upcoming_birthdays(self, days):
         upcoming = []
-        today = datetime.now().date()
-        for contact in self.list_contacts():
-            birthday_date = datetime.strptime(contact.birthday, "%Y-%m-%d").date()
-            birthday_this_year = birthday_date.replace(year=today.year)
-            if today <= birthday_this_year <= today + timedelta(days=days):
-                upcoming.append(contact)
+        for start, end in upcoming_slot_ranges(date.today(), days):
+            upcoming.extend(self.birthday_index.between((start,), (end + 1,)))
         return upcoming
 
     def export_to_csv(self, filename):
         contacts = self.list_contacts()
-        with open(filename, mode='w', newline='') as file:
+        with open(filename, mode='w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
             writer.writerow(['Name', 'Phone', 'Email', 'Birthday', 'Favorite'])
             for contact in contacts:
                 writer.writerow([contact.name, contact.phone, contact.email, contact.birthday, contact.favorite])
 
     def import_from_csv(self, filename):
-        with open(filename, mode='r') as file:
+        with open(filename, mode='r', newline='', encoding='utf-8-sig') as file:
             reader = csv.DictReader(file)
             for row in reader:
                 contact = Contact(row['Name'], row['Phone'], row['Email'], row['Birthday'], row['Favorite'] == 'True')
@@ -245,9 +362,7 @@ class ContactBookApp:
         def update_contact():
             contact = self.contact_book.find(name_entry.get())
             if contact:
-                contact.phone = phone_entry.get()
-                contact.email = email_entry.get()
-                contact.birthday = birthday_entry.get()
+                self.contact_book.update(contact, phone_entry.get(), email_entry.get(), birthday_entry.get())
                 messagebox.showinfo("Success", "Contact updated successfully!")
                 window.destroy()
             else:
@@ -313,12 +428,13 @@ class ContactBookApp:
         messagebox.showinfo("Favorite Contacts", output_text)
 
     def list_contacts(self):
-        contacts = self.contact_book.list_contacts()
-        if not contacts:
+        if not len(self.contact_book):
             messagebox.showinfo("Contacts", "No contacts found.")
             return
-        output_text = "\n".join([f"{contact.name} - {contact.phone}" for contact in contacts])
-        messagebox.showinfo("All Contacts", output_text)
+        window = tk.Toplevel(self.root)
+        window.title("All Contacts")
+        ContactListView(window, self.contact_book.contacts_page, lambda: len(self.contact_book),
+                        lambda contact: f"{contact.name} - {contact.phone}").pack(fill=tk.BOTH, expand=True)
 
     def list_upcoming_birthdays_window(self):
         window = tk.Toplevel(self.root)
@@ -0,0 +1,744 @@
+"""Benchmarks for the contact book.
+
+Run ``python benchmark.py <name> [--size N]``; ``python benchmark.py --help``
+lists the available benchmarks.  Everything runs headless, so no Tk window
+or message boxes are opened.
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import gc
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from urllib.parse import quote
+
+from btree_book import BTreeContactBook
+from columnar_book import ColumnarContactBook
+from concurrent_book import ConcurrentContactBook
+from main import ContactBookBST, ContactNode, birthday_slot, read_contacts_csv
+from merge_import import read_contacts_csv_files
+from mmap_book import MappedContactBook, write_sorted_file
+from parallel_import import read_contacts_csv_parallel
+from server import HOST, ContactServer
+from sorted_array_book import SortedArrayContactBook
+from sqlite_book import SQLiteContactBook
+from storage import PersistentContactBook
+
+
+def iter_contacts(count, seed=42):
+    """Yield ``count`` deterministic (name, phone, email, group, birthday) rows in name order."""
+    rng = random.Random(seed)
+    for i in range(count):
+        birthday = f"{rng.randint(1950, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        yield (f"Contact {i:08d}", f"0{rng.randint(200000000, 999999999)}", f"contact{i}@example.com",
+               f"Group {rng.randint(0, 99)}", birthday)
+
+
+def make_contacts(count, seed=42):
+    """Return ``count`` deterministic rows in random order."""
+    rows = list(iter_contacts(count, seed))
+    random.Random(seed).shuffle(rows)
+    return rows
+
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiouy"
+
+
+def make_person_name(rng):
+    """A pronounceable 'First Last' name, so trigram statistics look like real directories."""
+    def word(syllables):
+        return "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(("", "", "n", "r", "l"))
+                       for _ in range(syllables)).title()
+    return f"{word(rng.randint(2, 3))} {word(rng.randint(2, 4))}"
+
+
+def timed(label, func, ops=1):
+    """Run ``func`` once and print total time and time per operation."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed:9.3f} s {elapsed / max(ops, 1) * 1e6:10.2f} us/op")
+    return result
+
+
+def build_book(rows):
+    book = ContactBookBST(notify=False)
+    for name, phone, email, group, birthday in rows:
+        book.add_contact(name, phone, email, group, birthday)
+    return book
+
+
+def write_csv(rows, file_name):
+    with open(file_name, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Phone", "Email", "Group", "Favorite", "Birthday"])
+        writer.writerows((name, phone, email, group, False, birthday)
+                         for name, phone, email, group, birthday in rows)
+
+
+# Recursive reference implementations, kept here to measure what the old
+# one-frame-per-level code paths cost compared to the iterative ones.
+
+def recursive_insert(book, root, node):
+    if root is None:
+        return node
+    if node.name.lower() < root.name.lower():
+        root.left = recursive_insert(book, root.left, node)
+    else:
+        root.right = recursive_insert(book, root.right, node)
+    return book._rebalance(root)
+
+
+def recursive_search(root, query):
+    if root is None:
+        return None
+    if query.lower() in (root.name.lower(), root.email.lower(), root.phone):
+        return root
+    if query.lower() < root.name.lower():
+        return recursive_search(root.left, query)
+    return recursive_search(root.right, query)
+
+
+def recursive_list(root, contacts_list):
+    if root:
+        recursive_list(root.left, contacts_list)
+        contacts_list.append(f"{root.name}: {root.phone}, {root.email}")
+        recursive_list(root.right, contacts_list)
+    return contacts_list
+
+
+def bench_favorites(size):
+    """List Favorite Contacts: full traversal filter against the favorites index (1% favorites)."""
+    rows = make_contacts(size)
+    book = build_book(rows)
+    for row in rows[::100]:
+        book.toggle_favorite(row[0])
+    book.list_favorite_contacts()
+    timed("traverse and filter favorite flags",
+          lambda: [node for node in book.in_order(book.root) if node.favorite])
+    favorites = timed("list_favorite_contacts", book.list_favorite_contacts)
+    timed("favorites_count", book.favorites_count)
+    print(f"  {len(favorites)} favorites")
+
+
+def bench_frames(size):
+    """Iterative tree paths against the recursive versions they replaced."""
+    rows = make_contacts(size)
+    names = [row[0] for row in rows]
+
+    def insert_recursive():
+        book = ContactBookBST(notify=False)
+        for name, phone, email, group, birthday in rows:
+            book.root = recursive_insert(book, book.root, ContactNode(name, phone, email, group, birthday=birthday))
+        return book
+
+    def insert_iterative():
+        book = ContactBookBST(notify=False)
+        for name, phone, email, group, birthday in rows:
+            book.root = book.insert(book.root, ContactNode(name, phone, email, group, birthday=birthday))
+        return book
+
+    timed("insert (recursive)", insert_recursive, size)
+    book = timed("insert (iterative)", insert_iterative, size)
+    print(f"tree height: {book.height()} for {size} contacts")
+
+    timed("search (recursive)", lambda: [recursive_search(book.root, n) for n in names], size)
+    timed("search (iterative)", lambda: [book.search(book.root, n) for n in names], size)
+    timed("list_contacts (recursive)", lambda: recursive_list(book.root, []), size)
+    timed("list_contacts (iterative)", lambda: book.list_contacts(), size)
+
+    def export():
+        with open(os.devnull, "w", newline="") as file:
+            book.write_node(book.root, csv.writer(file))
+
+    timed("write_node to /dev/null (iterative)", export, size)
+
+
+def bench_lookups(size):
+    """Name lookups through the tree against phone/email lookups through the hash indexes."""
+    rows = make_contacts(size)
+    book = timed("build", lambda: build_book(rows), size)
+    sample = rows[:100_000]
+    timed("find_contact by name", lambda: [book.find_contact(row[0]) for row in sample], len(sample))
+    timed("find_by_phone", lambda: [book.find_by_phone(row[1]) for row in sample], len(sample))
+    timed("find_by_email", lambda: [book.find_by_email(row[2]) for row in sample], len(sample))
+
+
+def bench_groups(size):
+    """Listing one group: full traversal filter against the group index."""
+    book = build_book(make_contacts(size))
+    book.list_group("Group 7")
+    timed("traverse and filter by group",
+          lambda: [node for node in book.in_order(book.root) if node.group == "Group 7"])
+    members = timed("list_group", lambda: book.list_group("Group 7"))
+    timed("group_count", lambda: book.group_count("Group 7"))
+    print(f"  {len(members)} members in 'Group 7', {len(book.group_index)} groups")
+
+
+def bench_import(size):
+    """Per-row add_contact import against the sort-once bulk load."""
+    rows = make_contacts(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "contacts.csv")
+        write_csv(rows, file_name)
+
+        def per_row():
+            book = ContactBookBST(notify=False)
+            with open(file_name, newline="", encoding="utf-8-sig") as file:
+                for row in csv.DictReader(file):
+                    book.add_contact(row["Name"], row["Phone"], row["Email"], row["Group"], row["Birthday"])
+            return book
+
+        timed("import, one add_contact per row", per_row, size)
+        book = ContactBookBST(notify=False)
+        count, timings = timed("import_contacts_from_csv (bulk load)",
+                               lambda: book.import_contacts_from_csv(file_name), size)
+        print("  " + ", ".join(f"{phase} {seconds:.3f} s" for phase, seconds in timings.items()))
+        print(f"tree height: {book.height()} for {count} contacts")
+
+
+def bench_parallel_import(size):
+    """read_contacts_csv against read_contacts_csv_parallel at 1-8 workers, then the whole import."""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "contacts.csv")
+        write_csv(make_contacts(size), file_name)
+        print(f"{os.path.getsize(file_name) / 1e6:.0f} MB file, {os.cpu_count()} CPUs")
+        serial = timed("read_contacts_csv (serial)", lambda: read_contacts_csv(file_name), size)
+        del serial
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            nodes = read_contacts_csv_parallel(file_name, workers)
+            elapsed = time.perf_counter() - start
+            print(f"  {workers} worker(s){'':<29} {elapsed:9.3f} s {len(nodes) / elapsed:12,.0f} rows/s")
+            del nodes
+        for workers in (1, os.cpu_count() or 1):
+            book = ContactBookBST(notify=False)
+            count, timings = timed(f"import_contacts_from_csv, workers={workers}",
+                                   lambda: book.import_contacts_from_csv(file_name, workers=workers), size)
+            print("  " + ", ".join(f"{phase} {seconds:.3f} s" for phase, seconds in timings.items()))
+            del book
+
+
+def bench_merge_import(size, files=24):
+    """Many regional CSV files: one import per file against one merged import, plus the merge's peak memory."""
+    rows = make_contacts(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        file_names = []
+        for i in range(files):
+            file_name = os.path.join(tmp, f"region{i:02d}.csv")
+            part = rows[i::files]
+            with open(file_name, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                if i % 2:
+                    # app.py's layout: no Group column, Birthday before Favorite.
+                    writer.writerow(["Name", "Phone", "Email", "Birthday", "Favorite"])
+                    writer.writerows((name, phone, email, birthday, False)
+                                     for name, phone, email, group, birthday in part)
+                else:
+                    writer.writerow(["Name", "Phone", "Email", "Group", "Favorite", "Birthday"])
+                    writer.writerows((name, phone, email, group, False, birthday)
+                                     for name, phone, email, group, birthday in part)
+            file_names.append(file_name)
+
+        def per_file():
+            book = ContactBookBST(notify=False, fuzzy_index=False)
+            for file_name in file_names:
+                book.import_contacts_from_csv(file_name)
+            return book
+
+        timed(f"import_contacts_from_csv x {files} files", per_file, size)
+        book = ContactBookBST(notify=False, fuzzy_index=False)
+        count, timings = timed("import_contacts_from_csv_files (merged)",
+                               lambda: book.import_contacts_from_csv_files(file_names), size)
+        print("  " + ", ".join(f"{phase} {seconds:.3f} s" for phase, seconds in timings.items()))
+        del book
+        for run_size in (size, size // 10):
+            tracemalloc.start()
+            merged = sum(1 for _ in read_contacts_csv_files(file_names, run_size=run_size))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  streaming merge, run_size {run_size:>9,}: peak {peak / 1e6:8.1f} MB for {merged:,} rows")
+
+
+def bench_export(size):
+    """Streaming CSV export: wall time, progress callbacks and peak Python allocations."""
+    book = build_book(make_contacts(size))
+    calls = []
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "export.csv")
+        written = timed("export_contacts_to_csv", lambda: book.export_contacts_to_csv(
+            file_name, progress=lambda done, total: calls.append(done)), size)
+        # Second, traced run: tracemalloc slows Python down, so it is kept out of the timing.
+        tracemalloc.start()
+        book.export_contacts_to_csv(file_name)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{written} rows, {len(calls)} progress callbacks, "
+              f"{os.path.getsize(file_name) / 1e6:.1f} MB file, peak allocations {peak / 1e6:.1f} MB")
+
+
+class DictContactNode:
+    """ContactNode's fields in an ordinary __dict__-backed object, for comparison."""
+    def __init__(self, name, phone, email, group=None, favorite=False, birthday=None):
+        self.name = name
+        self.phone = phone
+        self.email = email
+        self.group = group
+        self.favorite = favorite
+        self.birthday = birthday
+        self.birthday_day = birthday_slot(birthday)
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.size = 1
+
+
+def traced_bytes(build):
+    """Bytes still allocated after ``build()`` returns, measured with tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        return tracemalloc.get_traced_memory()[0], kept
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(size):
+    """Bytes per contact (strings included); run with --size 100000,1000000,5000000 to track scaling."""
+    for label, build in (
+        ("ContactNode records (__slots__)",
+         lambda: [ContactNode(name, phone, email, group, birthday=birthday)
+                  for name, phone, email, group, birthday in iter_contacts(size)]),
+        ("same fields with a per-object __dict__",
+         lambda: [DictContactNode(name, phone, email, group, birthday=birthday)
+                  for name, phone, email, group, birthday in iter_contacts(size)]),
+        ("ContactBookBST, fuzzy_index=False",
+         lambda: load_book(size, fuzzy_index=False)),
+    ):
+        # Every build parses the same birthdays; fill birthday_slot's cache first so no build is charged for it.
+        birthday_slot.cache_clear()
+        for *_, birthday in iter_contacts(size):
+            birthday_slot(birthday)
+        used, kept = traced_bytes(build)
+        print(f"{label:<45} {used / size:9.1f} bytes/contact")
+        del kept
+
+
+def load_book(size, fuzzy_index=True):
+    book = ContactBookBST(notify=False, fuzzy_index=fuzzy_index)
+    book.bulk_load([ContactNode(name, phone, email, group, birthday=birthday)
+                    for name, phone, email, group, birthday in iter_contacts(size)])
+    return book
+
+
+def bench_prefix(size):
+    """Typeahead: prefix_search for every keystroke of a few names."""
+    rows = make_contacts(size)
+    book = build_book(rows)
+    keystrokes = [row[0][:length] for row in rows[:1000] for length in range(1, len(row[0]) + 1)]
+    timed("prefix_search(limit=20) per keystroke", lambda: [book.prefix_search(p) for p in keystrokes],
+          len(keystrokes))
+
+
+def bench_fuzzy(size):
+    """Trigram fuzzy_search for misspelled names."""
+    rng = random.Random(7)
+    book = ContactBookBST(notify=False)
+    names = [make_person_name(rng) for _ in range(size)]
+    timed("add_contact with trigram indexing", lambda: [
+        book.add_contact(name, str(i), f"{name.replace(' ', '.').lower()}@example.com")
+        for i, name in enumerate(names)], size)
+
+    def misspell(name):
+        i = rng.randrange(len(name) - 1)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+    queries = [(name, misspell(name)) for name in rng.sample(names, 200)]
+    results = timed("fuzzy_search(limit=10)", lambda: [book.fuzzy_search(typo) for _, typo in queries],
+                    len(queries))
+    found = sum(name in [node.name for node in result] for (name, _), result in zip(queries, results))
+    print(f"intended contact in the top 10 for {found} of {len(queries)} misspellings")
+
+
+def bench_birthdays(size):
+    """Upcoming-birthday queries: per-node strptime scan against the day-of-year index."""
+    book = build_book(make_contacts(size))
+    today = datetime.date.today()
+
+    def scan(days_ahead):
+        # What the old list_upcoming_birthdays did: parse every birthday on every query.
+        last = today + datetime.timedelta(days=days_ahead)
+        matches = []
+        for node in book.in_order(book.root):
+            birth_date = datetime.datetime.strptime(node.birthday, "%Y-%m-%d").date()
+            for year in (today.year, today.year + 1):
+                if today <= birth_date.replace(year=year) <= last:
+                    matches.append(node)
+        return matches
+
+    # The index sorts itself lazily after bulk adds; do that outside the timings.
+    book.list_upcoming_birthdays(0, today)
+    for days_ahead in (7, 30):
+        timed(f"strptime scan, {days_ahead} days", lambda: scan(days_ahead))
+        found = timed(f"list_upcoming_birthdays({days_ahead})",
+                      lambda: book.list_upcoming_birthdays(days_ahead, today))
+        print(f"  {len(found)} birthdays")
+
+
+def bench_columnar(size):
+    """ColumnarContactBook against ContactBookBST: memory, full list, export and lookups."""
+    rows = make_contacts(size)
+    names = [row[0] for row in rows[:100_000]]
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "contacts.csv")
+        write_csv(rows, file_name)
+        export_name = os.path.join(tmp, "export.csv")
+        for label, make_book in (("ContactBookBST, fuzzy_index=False",
+                                  lambda: ContactBookBST(notify=False, fuzzy_index=False)),
+                                 ("ColumnarContactBook", lambda: ColumnarContactBook(notify=False))):
+            print(label)
+
+            def load():
+                book = make_book()
+                book.import_contacts_from_csv(file_name)
+                return book
+
+            used, book = traced_bytes(load)
+            print(f"  {used / size:.1f} bytes/contact")
+            timed("  list_contacts", book.list_contacts, size)
+            timed("  export_contacts_to_csv", lambda: book.export_contacts_to_csv(export_name), size)
+            timed("  find_contact by name", lambda: [book.find_contact(name) for name in names], len(names))
+            timed("  list_upcoming_birthdays(30)", lambda: book.list_upcoming_birthdays(30))
+            timed("  list_group", lambda: book.list_group("Group 7"))
+            del book
+
+
+def bench_coldstart(size):
+    """Startup: re-importing a CSV against reopening a snapshot plus a 1000-operation log tail."""
+    rows = make_contacts(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "contacts.csv")
+        write_csv(rows, file_name)
+        timed("import_contacts_from_csv into an empty book",
+              lambda: ContactBookBST(notify=False).import_contacts_from_csv(file_name), size)
+
+        data_dir = os.path.join(tmp, "book")
+        book = PersistentContactBook(data_dir, notify=False)
+        book.import_contacts_from_csv(file_name)
+        for name, phone, email, group, birthday in rows[:250]:
+            book.add_contact(f"{name} (new)", phone, email, group, birthday)
+            book.update_contact(name, "0123456789", "")
+            book.toggle_favorite(name)
+            book.delete_contact(f"{name} (new)")
+        book.close()
+        del book
+        print(f"snapshot {os.path.getsize(os.path.join(data_dir, 'snapshot.pickle')) / 1e6:.1f} MB, "
+              f"log {os.path.getsize(os.path.join(data_dir, 'oplog.jsonl')) / 1e3:.1f} kB")
+
+        book = timed("PersistentContactBook(data_dir)", lambda: PersistentContactBook(data_dir, notify=False))
+        print("  " + ", ".join(f"{phase} {seconds:.3f} s" for phase, seconds in book.load_timings.items()))
+        timed("first find_contact by name", lambda: book.find_contact(rows[0][0]))
+        timed("first find_by_phone (builds deferred indexes)", lambda: book.find_by_phone(rows[0][1]))
+        book.close()
+
+
+def bench_mmap(size):
+    """Sorted contact file: open + lookup straight from the mapping against the in-memory tree."""
+    rows = make_contacts(size)
+    book = load_book(size, fuzzy_index=False)
+    names = [row[0] for row in rows[:100_000]]
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "contacts.cbk")
+        timed("write_sorted_file", lambda: write_sorted_file(book.in_order(book.root), file_name), size)
+        print(f"  {os.path.getsize(file_name) / 1e6:.1f} MB file")
+        used, mapped = traced_bytes(lambda: timed("MappedContactBook(file)", lambda: MappedContactBook(file_name)))
+        print(f"  {used} bytes of Python objects kept after opening")
+        timed("first find_contact", lambda: mapped.find_contact(names[0]))
+        timed("find_contact (mmap binary search)", lambda: [mapped.find_contact(name) for name in names],
+              len(names))
+        timed("find_contact (ContactBookBST)", lambda: [book.find_contact(name) for name in names], len(names))
+        timed("prefix_search (mmap)", lambda: [mapped.prefix_search(name[:10]) for name in names[:10_000]],
+              10_000)
+        mapped.close()
+
+
+def bench_sqlite(size):
+    """SQLiteContactBook (on-disk file) against the in-memory ContactBookBST."""
+    rows = make_contacts(size)
+    sample = rows[:10_000]
+    today = datetime.date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "contacts.csv")
+        write_csv(rows, file_name)
+        export_name = os.path.join(tmp, "export.csv")
+        for label, book in (("ContactBookBST", ContactBookBST(notify=False)),
+                            ("SQLiteContactBook", SQLiteContactBook(os.path.join(tmp, "contacts.db"), notify=False))):
+            print(label)
+            timed("  import_contacts_from_csv", lambda: book.import_contacts_from_csv(file_name), size)
+            timed("  find_contact by name", lambda: [book.find_contact(row[0]) for row in sample], len(sample))
+            timed("  find_by_phone", lambda: [book.find_by_phone(row[1]) for row in sample], len(sample))
+            timed("  add + delete", lambda: [(book.add_contact(f"{row[0]}!", *row[1:]), book.delete_contact(f"{row[0]}!"))
+                                             for row in sample[:1000]], 2000)
+            timed("  list_contacts", book.list_contacts, size)
+            timed("  list_upcoming_birthdays(7)", lambda: book.list_upcoming_birthdays(7, today))
+            timed("  list_group", lambda: book.list_group("Group 7"))
+            timed("  export_contacts_to_csv", lambda: book.export_contacts_to_csv(export_name), size)
+            if isinstance(book, SQLiteContactBook):
+                book.close()
+                print(f"  {os.path.getsize(os.path.join(tmp, 'contacts.db')) / 1e6:.1f} MB database")
+
+
+def bench_sorted_array(size):
+    """SortedArrayContactBook against ContactBookBST: lookup, in-order listing and buffered-add throughput."""
+    rows = make_contacts(size)
+    names = [row[0] for row in rows[:100_000]]
+    extra = [(f"{name} (new)", phone, email, group, birthday) for name, phone, email, group, birthday in rows[:10_000]]
+    for book_class in (ContactBookBST, SortedArrayContactBook):
+        book = book_class(notify=False, fuzzy_index=False)
+        book.bulk_load([ContactNode(name, phone, email, group, birthday=birthday)
+                        for name, phone, email, group, birthday in iter_contacts(size)])
+        print(f"{book_class.__name__} (height {book.height()})")
+        for label, func, ops in (
+            ("find_contact by name", lambda: [book.find_contact(name) for name in names], len(names)),
+            ("in-order traversal", lambda: sum(1 for _ in book.in_order(book.root)), size),
+            ("list_contacts", book.list_contacts, size),
+            ("10k add_contact, then one lookup", lambda: ([book.add_contact(*row) for row in extra],
+                                                        book.find_contact(names[0])), len(extra)),
+        ):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<43} {ops / elapsed:12,.0f} ops/s")
+        del book
+
+
+def bench_btree(size):
+    """BTreeContactBook: random lookups and a full scan under shrinking page cache budgets."""
+    rows = make_contacts(size)
+    names = [row[0] for row in random.Random(7).sample(rows, min(size, 20_000))]
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_name = os.path.join(tmp, "contacts.csv")
+        file_name = os.path.join(tmp, "contacts.btree")
+        write_csv(rows, csv_name)
+        book = BTreeContactBook(file_name, notify=False)
+        timed("import_contacts_from_csv (bulk build)", lambda: book.import_contacts_from_csv(csv_name), size)
+        book.close()
+        print(f"  {os.path.getsize(file_name) / 1e6:.1f} MB file")
+        for budget in (64 << 20, 8 << 20, 1 << 20, 128 << 10):
+            book = BTreeContactBook(file_name, notify=False, cache_bytes=budget)
+            print(f"cache {budget >> 10} KiB ({book.cache.capacity} pages, height {book.height()})")
+            [book.find_contact(name) for name in names]  # Warm the cache.
+            book.reset_stats()
+            timed("  find_contact by name", lambda: [book.find_contact(name) for name in names], len(names))
+            stats = book.stats()
+            print(f"  hit rate {stats['hit_rate']:.1%}, {stats['pages_per_lookup']:.2f} pages and "
+                  f"{stats['page_reads_per_lookup']:.2f} page reads per lookup")
+            book.reset_stats()
+            timed("  list_contacts (leaf chain)", book.list_contacts, size)
+            print(f"  {book.stats()['page_reads']} page reads")
+            book.close()
+
+
+def bench_concurrent(size, operations=200_000, write_share=0.1):
+    """ConcurrentContactBook under mixed reads and writes from 1-8 threads; checks invariants after each run.
+
+    Each thread adds and then deletes its own contacts, so the book must end at its starting size.
+    """
+    rows = make_contacts(size)
+    book = ConcurrentContactBook(load_book(size, fuzzy_index=False))
+    today = datetime.date.today()
+    base = None
+    for thread_count in (1, 2, 4, 8):
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            added = []
+            try:
+                for i in range(operations // thread_count):
+                    roll = rng.random()
+                    if roll < write_share / 2:
+                        added.append(f"{rng.choice(rows)[0]} #{seed}-{i}")
+                        book.add_contact(added[-1], "555-0100", "stress@example.com", "Stress", "1990-06-15")
+                    elif roll < write_share and added:
+                        book.delete_contact(added.pop(rng.randrange(len(added))))
+                    elif roll < 0.97:
+                        name = rng.choice(rows)[0]
+                        if book.find_contact(name) is None:
+                            errors.append(f"lost {name}")
+                    elif roll < 0.99:
+                        book.prefix_search(rng.choice(rows)[0][:3])
+                    else:
+                        book.list_upcoming_birthdays(7, today)
+                for name in added:
+                    book.delete_contact(name)
+            except Exception as error:  # Reported below; a worker must not die silently.
+                errors.append(repr(error))
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(thread_count)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        count = book.check_invariants()
+        rate = operations / elapsed
+        base = base or rate
+        status = "ok" if not errors and count == size else f"FAILED ({len(errors)} errors, {count} contacts)"
+        print(f"{thread_count} thread(s): {rate:12,.0f} ops/s  x{rate / base:.2f}  {status}")
+        for error in errors[:5]:
+            print(f"  {error}")
+
+
+def bench_pages(size, rows=200):
+    """contacts_page (what the virtual list view fetches) near the start, middle and end of the book."""
+    nodes = [ContactNode(name, phone, email, group, birthday=birthday)
+             for name, phone, email, group, birthday in iter_contacts(size)]
+    for book_class in (ContactBookBST, SortedArrayContactBook):
+        book = book_class(notify=False, fuzzy_index=False)
+        book.bulk_load(nodes)
+        print(book_class.__name__)
+        for label, offset in (("first page", 0), ("middle page", size // 2), ("last page", size - rows)):
+            timed(f"  contacts_page, {label}", lambda: [book.contacts_page(offset, rows) for _ in range(100)], 100)
+        del book
+
+
+def bench_batch(size, operations=100_000):
+    """add_many / update_many / delete_many against one add_contact, update_contact or delete_contact per row."""
+    rows = list(iter_contacts(size))
+    rng = random.Random(11)
+    names = [row[0] for row in rng.sample(rows, min(size, operations))]
+    updates = [(name, f"0{rng.randint(200000000, 999999999)}", "") for name in names]
+    extra = [(f"{name} (new)", phone, email, group, birthday) for name, phone, email, group, birthday in rows[:operations]]
+    for book_class in (ContactBookBST, SortedArrayContactBook):
+        print(book_class.__name__)
+        for label, per_call, batch, ops in (
+            ("add", lambda book: [book.add_contact(*row) for row in extra], lambda book: book.add_many(extra),
+             len(extra)),
+            ("update", lambda book: [book.update_contact(*update) for update in updates],
+             lambda book: book.update_many(updates), len(updates)),
+            ("delete", lambda book: [book.delete_contact(name) for name in names],
+             lambda book: book.delete_many(names), len(names)),
+        ):
+            for mode, func in (("per call", per_call), ("batch", batch)):
+                book = book_class(notify=False, fuzzy_index=False)
+                book.bulk_load([ContactNode(name, phone, email, group, birthday=birthday)
+                                for name, phone, email, group, birthday in rows])
+                book.settle()
+                timed(f"  {ops} x {label}, {mode}", lambda: (func(book), book.settle()), ops)
+                book.check_invariants()
+                del book
+
+
+async def read_response(reader):
+    """Status and raw body of one HTTP response."""
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.partition(b":")
+        if key.lower() == b"content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def load_server(book, rows, clients, requests):
+    server = ContactServer(book)
+    port = await server.start(0)
+    find_names = [quote(row[0], safe="") for row in rows]
+
+    def find(rng):
+        return f"GET /contacts/{rng.choice(find_names)} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode()
+
+    def batch(rng):
+        body = json.dumps({"operations": [{"op": "find", "name": rng.choice(rows)[0]} for _ in range(100)]}).encode()
+        return (f"POST /batch HTTP/1.1\r\nHost: {HOST}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+
+    for label, make_request, depth, per_request in (("GET /contacts/<name>, 1 in flight", find, 1, 1),
+                                                    ("GET /contacts/<name>, 16 pipelined", find, 16, 1),
+                                                    ("POST /batch of 100 finds", batch, 1, 100)):
+        latencies = []
+        failures = 0
+
+        async def client(seed):
+            nonlocal failures
+            rng = random.Random(seed)
+            reader, writer = await asyncio.open_connection(HOST, port)
+            for _ in range(max(requests // per_request // depth, 1)):
+                start = time.perf_counter()
+                writer.write(b"".join(make_request(rng) for _ in range(depth)))
+                for _ in range(depth):
+                    status, _ = await read_response(reader)
+                    failures += status != 200
+                    latencies.append(time.perf_counter() - start)
+            writer.close()
+            await writer.wait_closed()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(seed) for seed in range(clients)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+        print(f"{label:<36} {len(latencies) / elapsed:9,.0f} req/s {len(latencies) * per_request / elapsed:10,.0f} "
+              f"ops/s  p50 {p50 * 1e3:6.2f} ms  p99 {p99 * 1e3:6.2f} ms" + (f"  {failures} failed" if failures else ""))
+    await server.stop()
+
+
+def bench_server(size, clients=16, requests=2_000):
+    """Load generator for server.py: ``clients`` keep-alive connections against an in-process server."""
+    rows = make_contacts(size)
+    book = ConcurrentContactBook(load_book(size, fuzzy_index=False))
+    print(f"{clients} connections, {requests} operations each (client and server share one event loop)")
+    asyncio.run(load_server(book, rows, clients, requests))
+
+
+BENCHMARKS = {
+    "batch": bench_batch,
+    "birthdays": bench_birthdays,
+    "btree": bench_btree,
+    "coldstart": bench_coldstart,
+    "columnar": bench_columnar,
+    "concurrent": bench_concurrent,
+    "export": bench_export,
+    "favorites": bench_favorites,
+    "frames": bench_frames,
+    "fuzzy": bench_fuzzy,
+    "groups": bench_groups,
+    "import": bench_import,
+    "lookups": bench_lookups,
+    "memory": bench_memory,
+    "merge-import": bench_merge_import,
+    "mmap": bench_mmap,
+    "pages": bench_pages,
+    "parallel-import": bench_parallel_import,
+    "prefix": bench_prefix,
+    "server": bench_server,
+    "sorted-array": bench_sorted_array,
+    "sqlite": bench_sqlite,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--size", default="100000",
+                        help="number of contacts, or a comma-separated list of sizes (default: 100000)")
+    args = parser.parse_args()
+    for size in [int(value) for value in args.size.split(",")]:
+        print(f"--- {args.benchmark}, {size} contacts")
+        BENCHMARKS[args.benchmark](size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,610 @@
+"""On-disk B+tree contact book for directories larger than memory.
+
+Everything lives in one file of fixed-size pages:
+
+``page 0``
+    header: magic, version, page size, root page, first leaf, page count,
+    contact count and the next insertion sequence number.
+``leaf pages``
+    sorted (key, record) entries plus the number of the next leaf, so a full
+    listing or export walks the leaves front to back.
+``internal pages``
+    separator keys and child page numbers.
+
+A key is the lowercased UTF-8 name, a NUL byte and an 8-byte insertion
+sequence number, so contacts sharing a name stay distinct and keep their
+insertion order.  Records use mmap_book's field encoding.
+
+Pages are read through an LRU ``PageCache`` capped by a memory budget (counted
+in on-disk page bytes); dirty pages are written back when evicted and on
+``flush()``/``close()``.  ``stats()`` reports the cache hit rate and the pages
+touched and read per lookup, for sizing the budget.
+
+Only names are indexed: phone/email lookups, groups, favorites and birthdays
+are sequential leaf scans.  Deletes do not merge underfull pages, and writes
+are not journaled, so call ``close()`` (the GUI does) to leave a consistent file.
+"""
+import csv
+import os
+import struct
+import tempfile
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date
+from itertools import islice
+
+from main import (CSV_HEADER, EXPORT_BUFFER_SIZE, EXPORT_CHUNK_SIZE, ContactRecord, MessageBoxMixin,
+                  birthday_slot, looks_like_phone, normalize_email, normalize_phone, upcoming_slot_ranges)
+from mmap_book import pack_record, unpack_record
+
+MAGIC = b"CBT1"
+VERSION = 1
+PAGE_SIZE = 4096
+DEFAULT_CACHE_BYTES = 8 << 20
+HEADER = struct.Struct("<4sIIIIIQQ")
+LEAF_HEADER = struct.Struct("<BHI")
+INTERNAL_HEADER = struct.Struct("<BH")
+ENTRY_LENGTHS = struct.Struct("<HH")
+KEY_LENGTH = struct.Struct("<H")
+CHILD = struct.Struct("<I")
+LEAF, INTERNAL = 1, 2
+SEQUENCE = struct.Struct(">Q")
+
+
+class Leaf:
+    __slots__ = ('keys', 'values', 'next')
+
+    def __init__(self, keys=None, values=None, next_leaf=0):
+        self.keys = keys if keys is not None else []
+        self.values = values if values is not None else []
+        self.next = next_leaf
+
+    def size(self):
+        return LEAF_HEADER.size + sum(ENTRY_LENGTHS.size + len(key) + len(value)
+                                      for key, value in zip(self.keys, self.values))
+
+    def encode(self, page_size):
+        parts = [LEAF_HEADER.pack(LEAF, len(self.keys), self.next)]
+        for key, value in zip(self.keys, self.values):
+            parts += (ENTRY_LENGTHS.pack(len(key), len(value)), key, value)
+        return b"".join(parts).ljust(page_size, b"\0")
+
+
+class Internal:
+    __slots__ = ('keys', 'children')
+
+    def __init__(self, keys, children):
+        self.keys = keys
+        self.children = children
+
+    def size(self):
+        return (INTERNAL_HEADER.size + CHILD.size * len(self.children)
+                + sum(KEY_LENGTH.size + len(key) for key in self.keys))
+
+    def encode(self, page_size):
+        parts = [INTERNAL_HEADER.pack(INTERNAL, len(self.keys))]
+        parts += (CHILD.pack(child) for child in self.children)
+        for key in self.keys:
+            parts += (KEY_LENGTH.pack(len(key)), key)
+        return b"".join(parts).ljust(page_size, b"\0")
+
+
+def decode_page(data):
+    kind = data[0]
+    if kind == LEAF:
+        _, count, next_leaf = LEAF_HEADER.unpack_from(data)
+        offset = LEAF_HEADER.size
+        keys, values = [], []
+        for _ in range(count):
+            key_length, value_length = ENTRY_LENGTHS.unpack_from(data, offset)
+            offset += ENTRY_LENGTHS.size
+            keys.append(data[offset:offset + key_length])
+            offset += key_length
+            values.append(data[offset:offset + value_length])
+            offset += value_length
+        return Leaf(keys, values, next_leaf)
+    if kind == INTERNAL:
+        _, count = INTERNAL_HEADER.unpack_from(data)
+        offset = INTERNAL_HEADER.size
+        children = [CHILD.unpack_from(data, offset + i * CHILD.size)[0] for i in range(count + 1)]
+        offset += CHILD.size * (count + 1)
+        keys = []
+        for _ in range(count):
+            (key_length,) = KEY_LENGTH.unpack_from(data, offset)
+            offset += KEY_LENGTH.size
+            keys.append(data[offset:offset + key_length])
+            offset += key_length
+        return Internal(keys, children)
+    raise ValueError(f"corrupt page (type {kind})")
+
+
+class PageCache:
+    """LRU cache of decoded pages holding at most ``capacity`` of them; counts hits, reads and writes."""
+    def __init__(self, file, page_size, capacity):
+        self.file = file
+        self.page_size = page_size
+        self.capacity = max(capacity, 8)
+        self.pages = OrderedDict()
+        self.dirty = set()
+        self.hits = self.reads = self.writes = 0
+
+    def get(self, number):
+        page = self.pages.get(number)
+        if page is not None:
+            self.hits += 1
+            self.pages.move_to_end(number)
+            return page
+        self.reads += 1
+        self.file.seek(number * self.page_size)
+        page = decode_page(self.file.read(self.page_size))
+        self.pages[number] = page
+        self._evict()
+        return page
+
+    def put(self, number, page):
+        """Store a new or modified page; it reaches the file on eviction or flush."""
+        self.pages[number] = page
+        self.pages.move_to_end(number)
+        self.dirty.add(number)
+        self._evict()
+
+    def _write(self, number, page):
+        self.file.seek(number * self.page_size)
+        self.file.write(page.encode(self.page_size))
+        self.writes += 1
+
+    def _evict(self):
+        while len(self.pages) > self.capacity:
+            number, page = self.pages.popitem(last=False)
+            if number in self.dirty:
+                self.dirty.discard(number)
+                self._write(number, page)
+
+    def flush(self):
+        for number in sorted(self.dirty):
+            self._write(number, self.pages[number])
+        self.dirty.clear()
+
+
+def name_key(name):
+    return name.lower().encode("utf-8") + b"\0"
+
+
+class BTreeContactBook(MessageBoxMixin):
+    def __init__(self, file_name=None, notify=True, cache_bytes=DEFAULT_CACHE_BYTES, page_size=PAGE_SIZE):
+        """Open (or create) the B+tree in ``file_name``; None keeps it in an anonymous temporary file.
+
+        ``cache_bytes`` is the page cache budget; ``page_size`` only applies to new files.
+        """
+        self.file_name = file_name
+        self.notify = notify
+        self.last_deleted_contact = None
+        if file_name is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            self.file = open(file_name, "r+b" if os.path.exists(file_name) else "w+b")
+        header = self.file.read(HEADER.size)
+        if header:
+            if len(header) < HEADER.size or header[:4] != MAGIC or HEADER.unpack(header)[1] != VERSION:
+                self.file.close()
+                raise ValueError(f"{file_name} is not a version {VERSION} contact B+tree")
+            (_, _, self.page_size, self.root, self.first_leaf, self.page_count,
+             self.count, self.sequence) = HEADER.unpack(header)
+        else:
+            self.page_size = page_size
+            self.root = self.first_leaf = 1
+            self.page_count = 2
+            self.count = self.sequence = 0
+        # No entry may exceed a quarter page, so any split leaves two pages that fit.
+        self.max_entry = (self.page_size - LEAF_HEADER.size) // 4
+        self.cache = PageCache(self.file, self.page_size, cache_bytes // self.page_size)
+        if not header:
+            self.cache.put(self.root, Leaf())
+            self.flush()
+        self.lookups = self.lookup_accesses = self.lookup_reads = 0
+
+    def __len__(self):
+        return self.count
+
+    # -- pages ------------------------------------------------------------------
+
+    def _allocate(self, page):
+        number = self.page_count
+        self.page_count += 1
+        self.cache.put(number, page)
+        return number
+
+    def flush(self):
+        """Write every dirty page and the header."""
+        self.cache.flush()
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.page_size, self.root, self.first_leaf,
+                                    self.page_count, self.count, self.sequence).ljust(self.page_size, b"\0"))
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def stats(self):
+        """Page cache and lookup counters since the book was opened (or reset_stats)."""
+        accesses = self.cache.hits + self.cache.reads
+        return {
+            "cache_pages": len(self.cache.pages),
+            "cache_capacity": self.cache.capacity,
+            "hit_rate": self.cache.hits / accesses if accesses else 0.0,
+            "page_reads": self.cache.reads,
+            "page_writes": self.cache.writes,
+            "lookups": self.lookups,
+            "pages_per_lookup": self.lookup_accesses / self.lookups if self.lookups else 0.0,
+            "page_reads_per_lookup": self.lookup_reads / self.lookups if self.lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        self.cache.hits = self.cache.reads = self.cache.writes = 0
+        self.lookups = self.lookup_accesses = self.lookup_reads = 0
+
+    def height(self):
+        levels, page = 1, self.cache.get(self.root)
+        while isinstance(page, Internal):
+            levels += 1
+            page = self.cache.get(page.children[0])
+        return levels
+
+    # -- tree operations ----------------------------------------------------------
+
+    def _descend(self, key):
+        """Pages from the root to the leaf that would hold ``key``, as (number, page, child index)."""
+        path = []
+        number = self.root
+        page = self.cache.get(number)
+        while isinstance(page, Internal):
+            i = bisect_right(page.keys, key)
+            path.append((number, page, i))
+            number = page.children[i]
+            page = self.cache.get(number)
+        path.append((number, page, None))
+        return path
+
+    def _scan(self, start=None):
+        """Yield (key, value) in key order from the first key >= ``start`` along the leaf chain."""
+        if start is None:
+            page, i = self.cache.get(self.first_leaf), 0
+        else:
+            page = self._descend(start)[-1][1]
+            i = bisect_left(page.keys, start)
+        while True:
+            keys, values = page.keys, page.values
+            for j in range(i, len(keys)):
+                yield keys[j], values[j]
+            if not page.next:
+                return
+            page, i = self.cache.get(page.next), 0
+
+    def _first_with_prefix(self, prefix):
+        """(key, record) of the first entry whose key starts with ``prefix``, counted as one lookup."""
+        hits, reads = self.cache.hits, self.cache.reads
+        found = None
+        for key, value in islice(self._scan(prefix), 1):
+            if key.startswith(prefix):
+                found = key, unpack_record(value)
+        self.lookups += 1
+        self.lookup_accesses += self.cache.hits + self.cache.reads - hits - reads
+        self.lookup_reads += self.cache.reads - reads
+        return found
+
+    def _insert(self, key, value):
+        if ENTRY_LENGTHS.size + len(key) + len(value) > self.max_entry:
+            raise ValueError(f"contact too large for a {self.page_size}-byte page")
+        path = self._descend(key)
+        number, leaf, _ = path.pop()
+        i = bisect_left(leaf.keys, key)
+        leaf.keys.insert(i, key)
+        leaf.values.insert(i, value)
+        self.cache.put(number, leaf)
+        if leaf.size() <= self.page_size:
+            return
+        # Split the leaf at its byte midpoint and push the right half's first key up.
+        half, used, split = leaf.size() // 2, LEAF_HEADER.size, 1
+        for split, (k, v) in enumerate(zip(leaf.keys, leaf.values), 1):
+            used += ENTRY_LENGTHS.size + len(k) + len(v)
+            if used >= half:
+                break
+        right = Leaf(leaf.keys[split:], leaf.values[split:], leaf.next)
+        del leaf.keys[split:], leaf.values[split:]
+        right_number = self._allocate(right)
+        leaf.next = right_number
+        self.cache.put(number, leaf)
+        self._insert_separator(path, number, right.keys[0], right_number)
+
+    def _insert_separator(self, path, left_number, separator, right_number):
+        while path:
+            number, parent, i = path.pop()
+            parent.keys.insert(i, separator)
+            parent.children.insert(i + 1, right_number)
+            self.cache.put(number, parent)
+            if parent.size() <= self.page_size:
+                return
+            middle = len(parent.keys) // 2
+            separator = parent.keys[middle]
+            right = Internal(parent.keys[middle + 1:], parent.children[middle + 1:])
+            del parent.keys[middle:], parent.children[middle + 1:]
+            self.cache.put(number, parent)
+            left_number, right_number = number, self._allocate(right)
+        # The root split: grow the tree by one level.
+        self.root = self._allocate(Internal([separator], [left_number, right_number]))
+
+    def _replace(self, key, value):
+        """Swap the record stored under an existing ``key``; re-inserts if it no longer fits."""
+        number, leaf, _ = self._descend(key)[-1]
+        i = bisect_left(leaf.keys, key)
+        leaf.values[i] = value
+        self.cache.put(number, leaf)
+        if leaf.size() > self.page_size:
+            del leaf.keys[i], leaf.values[i]
+            self._insert(key, value)
+
+    def _delete(self, key):
+        # Underfull leaves are left as they are; scans simply skip empty ones.
+        number, leaf, _ = self._descend(key)[-1]
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            del leaf.keys[i], leaf.values[i]
+            self.cache.put(number, leaf)
+            return True
+        return False
+
+    def _bulk_build(self, entries):
+        """Replace an empty tree with packed leaves and internal levels built from sorted ``entries``."""
+        level = []
+        leaf, number, used = Leaf(), self.root, LEAF_HEADER.size
+        for key, value in entries:
+            entry_size = ENTRY_LENGTHS.size + len(key) + len(value)
+            if entry_size > self.max_entry:
+                raise ValueError(f"contact too large for a {self.page_size}-byte page")
+            if used + entry_size > self.page_size:
+                leaf.next = self.page_count
+                self.cache.put(number, leaf)
+                level.append((leaf.keys[0], number))
+                leaf, number, used = Leaf(), self.page_count, LEAF_HEADER.size
+                self.page_count += 1
+            leaf.keys.append(key)
+            leaf.values.append(value)
+            used += entry_size
+        self.cache.put(number, leaf)
+        level.append((leaf.keys[0] if leaf.keys else b"", number))
+        self.first_leaf = level[0][1]
+        while len(level) > 1:
+            parents = []
+            node = Internal([], [level[0][1]])
+            first_key = level[0][0]
+            for key, child in level[1:]:
+                if node.size() + KEY_LENGTH.size + len(key) + CHILD.size > self.page_size:
+                    parents.append((first_key, self._allocate(node)))
+                    node, first_key = Internal([], [child]), key
+                    continue
+                node.keys.append(key)
+                node.children.append(child)
+            parents.append((first_key, self._allocate(node)))
+            level = parents
+        self.root = level[0][1]
+
+    # -- contacts -----------------------------------------------------------------
+
+    def _new_key(self, name):
+        self.sequence += 1
+        return name_key(name) + SEQUENCE.pack(self.sequence)
+
+    def _find(self, query):
+        """(key, record) for a name, falling back to email or phone like ContactBookBST.find_contact."""
+        found = self._first_with_prefix(name_key(query))
+        if found is None and "@" in query:
+            found = self._scan_for(lambda contact: normalize_email(contact.email or "") == normalize_email(query))
+        elif found is None and looks_like_phone(query):
+            key = normalize_phone(query)
+            found = self._scan_for(lambda contact: normalize_phone(contact.phone or "") == key)
+        return found or (None, None)
+
+    def _scan_for(self, predicate):
+        for key, value in self._scan():
+            contact = unpack_record(value)
+            if predicate(contact):
+                return key, contact
+        return None
+
+    def _records(self):
+        return (unpack_record(value) for _, value in self._scan())
+
+    def add_contact(self, name, phone, email, group=None, birthday=None):
+        contact = ContactRecord(name, phone, email, group or None, False, birthday or None)
+        self._insert(self._new_key(name), pack_record(contact))
+        self.count += 1
+        self._info(f"Contact '{name}' added successfully!")
+        return contact
+
+    def find_contact(self, name):
+        return self._find(name)[1]
+
+    def find_by_phone(self, phone):
+        key = normalize_phone(phone)
+        if not key:
+            return None
+        found = self._scan_for(lambda contact: normalize_phone(contact.phone or "") == key)
+        return found[1] if found else None
+
+    def find_by_email(self, email):
+        key = normalize_email(email)
+        if not key:
+            return None
+        found = self._scan_for(lambda contact: normalize_email(contact.email or "") == key)
+        return found[1] if found else None
+
+    def prefix_search(self, prefix, limit=20):
+        """Contacts whose name starts with ``prefix`` (case-insensitive), in O(log n + k) pages."""
+        start = prefix.lower().encode("utf-8")
+        matches = []
+        for key, value in self._scan(start):
+            if len(matches) >= limit or not key.startswith(start):
+                break
+            matches.append(unpack_record(value))
+        return matches
+
+    def update_contact(self, name, new_phone, new_email):
+        key, contact = self._find(name)
+        if contact:
+            contact = contact._replace(phone=new_phone or contact.phone, email=new_email or contact.email)
+            self._replace(key, pack_record(contact))
+            self._info(f"Contact '{name}' updated successfully!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def delete_contact(self, name):
+        key, contact = self._find(name)
+        if contact:
+            self._delete(key)
+            self.count -= 1
+            self.last_deleted_contact = contact
+            self._info(f"Contact '{name}' deleted successfully!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def toggle_favorite(self, name):
+        key, contact = self._find(name)
+        if contact:
+            contact = contact._replace(favorite=not contact.favorite)
+            self._replace(key, pack_record(contact))
+            status = "Favorite" if contact.favorite else "Not Favorite"
+            self._info(f"Contact '{name}' is now {status}!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def iter_contacts(self):
+        return self._records()
+
+    def contacts_page(self, offset, limit):
+        """Up to ``limit`` contacts from position ``offset``; whole leaves before it are skipped by count."""
+        page = self.cache.get(self.first_leaf)
+        while offset >= len(page.keys) and page.next:
+            offset -= len(page.keys)
+            page = self.cache.get(page.next)
+        contacts = []
+        while len(contacts) < limit:
+            contacts += map(unpack_record, page.values[offset:offset + limit - len(contacts)])
+            if not page.next:
+                break
+            page, offset = self.cache.get(page.next), 0
+        return contacts
+
+    def list_contacts(self):
+        return [f"{contact.name}: {contact.phone}, {contact.email}" for contact in self._records()]
+
+    def list_favorite_contacts(self):
+        return [f"{contact.name}: {contact.phone}, {contact.email}" for contact in self._records() if contact.favorite]
+
+    def favorites_count(self):
+        return sum(contact.favorite for contact in self._records())
+
+    def list_group(self, group):
+        key = group.strip().lower()
+        return [f"{contact.name}: {contact.phone}, {contact.email}" for contact in self._records()
+                if contact.group and contact.group.strip().lower() == key]
+
+    def group_count(self, group):
+        return len(self.list_group(group))
+
+    def list_upcoming_birthdays(self, days_ahead=7, today=None):
+        """Birthdays from today through ``days_ahead`` days ahead, soonest first, from one leaf scan."""
+        ranges = upcoming_slot_ranges(today or date.today(), days_ahead)
+        matches = []
+        for contact in self._records():
+            slot = birthday_slot(contact.birthday)
+            for rank, (start, end) in enumerate(ranges):
+                if slot and start <= slot <= end:
+                    matches.append((rank, slot, len(matches), contact))
+                    break
+        matches.sort(key=lambda match: match[:3])
+        return [f"{contact.name} has a birthday on {contact.birthday}" for *_, contact in matches]
+
+    def export_contacts_to_csv(self, file_name='contacts.csv', progress=None):
+        """Stream the leaves to ``file_name`` in name order and return the number of rows written.
+
+        ``progress(written, total)`` is called after every chunk of rows.
+        """
+        rows = ((contact.name, contact.phone, contact.email, contact.group, contact.favorite, contact.birthday)
+                for contact in self._records())
+        written = 0
+        with open(file_name, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            while True:
+                chunk = list(islice(rows, EXPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written, self.count)
+        self._info(f"Contacts exported to {file_name}")
+        return written
+
+    def import_contacts_from_csv(self, file_name='contacts.csv'):
+        """Import a CSV file; an empty book is bulk-built from sorted rows. Returns count and timings."""
+        start = time.perf_counter()
+        with open(file_name, mode='r', newline='', encoding='utf-8-sig') as file:
+            entries = [(self._new_key(row['Name']),
+                        pack_record(ContactRecord(row['Name'], row['Phone'], row['Email'], row.get('Group') or None,
+                                                  row.get('Favorite') == 'True', row.get('Birthday') or None)))
+                       for row in csv.DictReader(file)]
+        parsed_at = time.perf_counter()
+        if self.count == 0 and self.page_count == 2:
+            entries.sort(key=lambda entry: entry[0])
+            self._bulk_build(entries)
+        else:
+            for key, value in entries:
+                self._insert(key, value)
+        self.count += len(entries)
+        self.flush()
+        timings = {"parse": parsed_at - start, "build": time.perf_counter() - parsed_at}
+        self._info(f"Imported {len(entries)} contacts from {file_name}\n"
+                   f"(parse {timings['parse']:.2f}s, build {timings['build']:.2f}s)")
+        return len(entries), timings
+
+    def undo_delete(self):
+        contact = self.last_deleted_contact
+        if contact:
+            self._insert(self._new_key(contact.name), pack_record(contact))
+            self.count += 1
+            self._info(f"Contact '{contact.name}' restored!")
+            self.last_deleted_contact = None
+        else:
+            self._warn("No contact to undo delete.")
+        return contact
+
+    def check_invariants(self):
+        """Assert key order inside and across pages, separator bounds and the count; returns the count."""
+        def check(number, low, high):
+            page = self.cache.get(number)
+            assert all(a < b for a, b in zip(page.keys, page.keys[1:])), f"page {number} out of order"
+            assert all((low is None or low <= key) and (high is None or key < high) for key in page.keys), \
+                f"page {number} outside its separators"
+            if isinstance(page, Leaf):
+                return [number]
+            bounds = [low] + page.keys + [high]
+            leaves = []
+            for i, child in enumerate(page.children):
+                leaves += check(child, bounds[i], bounds[i + 1])
+            return leaves
+
+        leaves = check(self.root, None, None)
+        chain, number = [], self.first_leaf
+        while number:
+            chain.append(number)
+            number = self.cache.get(number).next
+        assert chain == leaves, "leaf chain does not follow key order"
+        count = sum(len(self.cache.get(number).keys) for number in leaves)
+        assert count == self.count, f"count {self.count} != {count} entries"
+        return count
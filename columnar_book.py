@@ -0,0 +1,453 @@
+"""Struct-of-arrays contact store for read-heavy workloads.
+
+``ColumnarContactBook`` offers the same public methods as ``ContactBookBST`` but
+keeps each field in its own column instead of one object per contact:
+
+* names, phones and email local parts are plain lists of strings;
+* email domains and groups are interned into small tables and stored as
+  ``array('I')`` codes;
+* birthdays are ``date.toordinal()`` values in an ``array('i')`` (0 = none);
+* favorites are one bit each in a ``bytearray``.
+
+A row id is an index into every column.  ``order`` holds the live row ids
+sorted by lowercased name, so name lookups are a binary search and listing or
+exporting is one sequential pass over flat arrays with no pointers to chase.
+Deleted rows are tombstoned (their name becomes None) and the columns are
+compacted once tombstones outnumber live rows.
+
+The trade-offs: adds shift part of ``order`` (a memmove, cheap but O(n)),
+phone/email lookups and birthday queries are column scans rather than index
+probes, there is no fuzzy search, and a birthday that is not a valid
+YYYY-MM-DD date is dropped.
+"""
+from array import array
+from datetime import date
+from itertools import islice
+import csv
+import time
+
+from main import (CSV_HEADER, EXPORT_BUFFER_SIZE, EXPORT_CHUNK_SIZE, LEAP_YEAR_MONTH_OFFSETS,
+                  ContactRecord, MessageBoxMixin, OrderStatisticsMixin, looks_like_phone, normalize_email,
+                  normalize_phone, upcoming_slot_ranges)
+
+# Compaction is not worth it for a handful of tombstones.
+MIN_COMPACT_ROWS = 1024
+
+
+def birthday_ordinal(birthday):
+    """``date.toordinal()`` of a YYYY-MM-DD birthday, or 0 if there is none or it does not parse."""
+    if not birthday:
+        return 0
+    try:
+        return date.fromisoformat(birthday).toordinal()
+    except ValueError:
+        return 0
+
+
+class InternTable:
+    """Maps repeated strings (groups, email domains) to small integer codes; code 0 means None."""
+    def __init__(self):
+        self.values = [None]
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values) - 1
+
+    def code(self, value):
+        if value is None:
+            return 0
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarContactBook(MessageBoxMixin, OrderStatisticsMixin):
+    def __init__(self, notify=True):
+        self.notify = notify
+        self.last_deleted_contact = None
+        self.names = []
+        self.phones = []
+        self.email_users = []
+        self.email_domains = array('I')
+        self.domains = InternTable()
+        self.group_codes = array('I')
+        self.groups = InternTable()
+        self.birthdays = array('i')
+        self.favorite_bits = bytearray()
+        self.favorite_total = 0
+        # Live row ids in name order.
+        self.order = array('I')
+
+    def __len__(self):
+        return len(self.order)
+
+    # -- rows ---------------------------------------------------------------
+
+    def _append_row(self, name, phone, email, group=None, favorite=False, birthday=None):
+        """Append one row to every column and return its row id (not yet in ``order``)."""
+        row = len(self.names)
+        self.names.append(name)
+        self.phones.append(phone)
+        self._set_email(row, email, append=True)
+        self.group_codes.append(self.groups.code(group or None))
+        self.birthdays.append(birthday_ordinal(birthday))
+        if row >> 3 >= len(self.favorite_bits):
+            self.favorite_bits.append(0)
+        if favorite:
+            self._set_favorite(row, True)
+        return row
+
+    def _set_email(self, row, email, append=False):
+        # Domains repeat across thousands of contacts, so "example.com" is stored once.
+        user, at, domain = (email or "").rpartition("@")
+        if not at:
+            user, code = email or "", 0
+        else:
+            code = self.domains.code(domain)
+        if append:
+            self.email_users.append(user)
+            self.email_domains.append(code)
+        else:
+            self.email_users[row] = user
+            self.email_domains[row] = code
+
+    def _email(self, row):
+        code = self.email_domains[row]
+        if code:
+            return f"{self.email_users[row]}@{self.domains.values[code]}"
+        return self.email_users[row]
+
+    def _is_favorite(self, row):
+        return bool(self.favorite_bits[row >> 3] >> (row & 7) & 1)
+
+    def _set_favorite(self, row, favorite):
+        if favorite == self._is_favorite(row):
+            return
+        self.favorite_bits[row >> 3] ^= 1 << (row & 7)
+        self.favorite_total += 1 if favorite else -1
+
+    def _birthday(self, row):
+        ordinal = self.birthdays[row]
+        return date.fromordinal(ordinal).isoformat() if ordinal else None
+
+    def _record(self, row):
+        return ContactRecord(self.names[row], self.phones[row], self._email(row),
+                             self.groups.values[self.group_codes[row]], self._is_favorite(row),
+                             self._birthday(row))
+
+    def _lines(self, rows):
+        names, phones, users, domains = self.names, self.phones, self.email_users, self.email_domains
+        at_domains = [""] + [f"@{domain}" for domain in self.domains.values[1:]]
+        return [f"{names[row]}: {phones[row]}, {users[row]}{at_domains[domains[row]]}" for row in rows]
+
+    # -- name order -----------------------------------------------------------
+
+    def _lower_bound(self, key):
+        """Position in ``order`` of the first row whose lowercased name is >= ``key``."""
+        names, order = self.names, self.order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if names[order[mid]].lower() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _position(self, name):
+        """Position in ``order`` of the row named ``name`` (case-insensitive), or None."""
+        key = name.lower()
+        i = self._lower_bound(key)
+        if i < len(self.order) and self.names[self.order[i]].lower() == key:
+            return i
+        return None
+
+    def _row_position(self, row):
+        """Position of ``row`` in ``order``: a binary search to its name, then a step along equal names."""
+        i = self._lower_bound(self.names[row].lower())
+        order = self.order
+        while order[i] != row:
+            i += 1
+        return i
+
+    def _insert_row(self, row):
+        key = self.names[row].lower()
+        # Insert after any equal names, like the tree does.
+        names, order = self.names, self.order
+        lo, hi = self._lower_bound(key), len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < names[order[mid]].lower():
+                hi = mid
+            else:
+                lo = mid + 1
+        order.insert(lo, row)
+
+    def _find_row(self, query):
+        """Row id for a name, falling back to an email or phone scan like ContactBookBST.find_contact."""
+        i = self._position(query)
+        if i is not None:
+            return self.order[i]
+        if "@" in query:
+            return self._scan_email(query)
+        if looks_like_phone(query):
+            return self._scan_phone(query)
+        return None
+
+    def _scan_phone(self, phone):
+        key = normalize_phone(phone)
+        if not key:
+            return None
+        for row in self.order:
+            if normalize_phone(self.phones[row]) == key:
+                return row
+        return None
+
+    def _scan_email(self, email):
+        user, _, domain = normalize_email(email).rpartition("@")
+        codes = {code for code, value in enumerate(self.domains.values) if value is not None and value.lower() == domain}
+        if not codes:
+            return None
+        # The domain codes column rules out almost every row before any string is compared.
+        domains, users = self.email_domains, self.email_users
+        for row in self.order:
+            if domains[row] in codes and users[row].lower() == user:
+                return row
+        return None
+
+    def _compact(self):
+        """Rewrite the columns with only live rows, in name order, dropping tombstones."""
+        rows = self.order
+        names, phones, users = self.names, self.phones, self.email_users
+        domains, groups, birthdays = self.email_domains, self.group_codes, self.birthdays
+        favorites = [self._is_favorite(row) for row in rows]
+        self.names = [names[row] for row in rows]
+        self.phones = [phones[row] for row in rows]
+        self.email_users = [users[row] for row in rows]
+        self.email_domains = array('I', (domains[row] for row in rows))
+        self.group_codes = array('I', (groups[row] for row in rows))
+        self.birthdays = array('i', (birthdays[row] for row in rows))
+        self.favorite_bits = bytearray((len(rows) + 7) >> 3)
+        self.favorite_total = 0
+        for row, favorite in enumerate(favorites):
+            if favorite:
+                self._set_favorite(row, True)
+        self.order = array('I', range(len(rows)))
+
+    # -- public API (mirrors ContactBookBST) ----------------------------------
+
+    def add_contact(self, name, phone, email, group=None, birthday=None):
+        row = self._append_row(name, phone, email, group, birthday=birthday)
+        self._insert_row(row)
+        self._info(f"Contact '{name}' added successfully!")
+        return self._record(row)
+
+    def find_contact(self, name):
+        row = self._find_row(name)
+        return None if row is None else self._record(row)
+
+    def find_by_phone(self, phone):
+        row = self._scan_phone(phone)
+        return None if row is None else self._record(row)
+
+    def find_by_email(self, email):
+        row = self._scan_email(email)
+        return None if row is None else self._record(row)
+
+    def prefix_search(self, prefix, limit=20):
+        """Contacts whose name starts with ``prefix`` (case-insensitive), in O(log n + k)."""
+        key = prefix.lower()
+        matches = []
+        for row in islice(self.order, self._lower_bound(key), None):
+            if len(matches) >= limit or not self.names[row].lower().startswith(key):
+                break
+            matches.append(self._record(row))
+        return matches
+
+    def update_contact(self, name, new_phone, new_email):
+        row = self._find_row(name)
+        contact = None
+        if row is not None:
+            if new_phone:
+                self.phones[row] = new_phone
+            if new_email:
+                self._set_email(row, new_email)
+            contact = self._record(row)
+            self._info(f"Contact '{name}' updated successfully!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def delete_contact(self, name):
+        row = self._find_row(name)
+        contact = None
+        if row is not None:
+            contact = self.last_deleted_contact = self._record(row)
+            del self.order[self._row_position(row)]
+            self._set_favorite(row, False)
+            # Tombstone: drop the strings now, reclaim the slots at the next compaction.
+            self.names[row] = None
+            self.phones[row] = self.email_users[row] = ""
+            dead = len(self.names) - len(self.order)
+            if dead > MIN_COMPACT_ROWS and dead > len(self.order):
+                self._compact()
+            self._info(f"Contact '{name}' deleted successfully!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def toggle_favorite(self, name):
+        row = self._find_row(name)
+        contact = None
+        if row is not None:
+            favorite = not self._is_favorite(row)
+            self._set_favorite(row, favorite)
+            contact = self._record(row)
+            status = "Favorite" if favorite else "Not Favorite"
+            self._info(f"Contact '{name}' is now {status}!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def iter_contacts(self):
+        return map(self._record, self.order)
+
+    def contacts_page(self, offset, limit):
+        return [self._record(row) for row in self.order[offset:offset + limit]]
+
+    def select(self, i):
+        if not 0 <= i < len(self.order):
+            raise IndexError("contact position out of range")
+        return self._record(self.order[i])
+
+    def rank(self, name):
+        return self._lower_bound(name.lower())
+
+    def list_contacts(self):
+        return self._lines(self.order)
+
+    def list_favorite_contacts(self):
+        bits = self.favorite_bits
+        return self._lines(row for row in self.order if bits[row >> 3] >> (row & 7) & 1)
+
+    def favorites_count(self):
+        return self.favorite_total
+
+    def _group_codes_for(self, group):
+        key = group.strip().lower()
+        return {code for code, value in enumerate(self.groups.values) if value and value.strip().lower() == key}
+
+    def list_group(self, group):
+        """Members of ``group`` (case-insensitive) in name order, from one scan of the group codes."""
+        codes = self._group_codes_for(group)
+        column = self.group_codes
+        return self._lines(row for row in self.order if column[row] in codes) if codes else []
+
+    def group_count(self, group):
+        codes = self._group_codes_for(group)
+        return sum(1 for row in self.order if self.group_codes[row] in codes) if codes else 0
+
+    def list_upcoming_birthdays(self, days_ahead=7, today=None):
+        """Birthdays from today through ``days_ahead`` days ahead, soonest first, from one column scan."""
+        today = today or date.today()
+        ranges = upcoming_slot_ranges(today, days_ahead)
+        # Ordinals repeat a lot (one per calendar day), so each is turned into a slot once.
+        slots = {}
+        matches = []
+        birthdays = self.birthdays
+        for row in self.order:
+            ordinal = birthdays[row]
+            if not ordinal:
+                continue
+            slot = slots.get(ordinal)
+            if slot is None:
+                born = date.fromordinal(ordinal)
+                slot = slots[ordinal] = LEAP_YEAR_MONTH_OFFSETS[born.month] + born.day
+            for rank, (start, end) in enumerate(ranges):
+                if start <= slot <= end:
+                    # ``order`` is already by name, so a stable sort on (range, slot) is enough.
+                    matches.append((rank, slot, row))
+                    break
+        matches.sort(key=lambda match: match[:2])
+        return [f"{self.names[row]} has a birthday on {self._birthday(row)}" for _, _, row in matches]
+
+    def export_contacts_to_csv(self, file_name='contacts.csv', progress=None):
+        """Stream the book to ``file_name`` in name order and return the number of rows written.
+
+        ``progress(written, total)`` is called after every chunk of rows.
+        """
+        names, phones, users, group_codes = self.names, self.phones, self.email_users, self.group_codes
+        groups, domains, birthdays, bits = self.groups.values, self.email_domains, self.birthdays, self.favorite_bits
+        # Decode each interned domain and each distinct birthday once, not once per row.
+        at_domains = [""] + [f"@{domain}" for domain in self.domains.values[1:]]
+        iso_dates = {ordinal: date.fromordinal(ordinal).isoformat() for ordinal in set(birthdays) if ordinal}
+        iso_dates[0] = None
+        rows = ((names[row], phones[row], users[row] + at_domains[domains[row]], groups[group_codes[row]],
+                 bits[row >> 3] >> (row & 7) & 1 == 1, iso_dates[birthdays[row]])
+                for row in self.order)
+        total = len(self.order)
+        written = 0
+        with open(file_name, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            while True:
+                chunk = list(islice(rows, EXPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written, total)
+        self._info(f"Contacts exported to {file_name}")
+        return written
+
+    def import_contacts_from_csv(self, file_name='contacts.csv'):
+        """Append every CSV row, then sort and compact once; returns the row count and timings."""
+        start = time.perf_counter()
+        first = len(self.names)
+        with open(file_name, mode='r', newline='', encoding='utf-8-sig') as file:
+            for row in csv.DictReader(file):
+                self._append_row(row['Name'], row['Phone'], row['Email'], row.get('Group'),
+                                 row.get('Favorite') == 'True', row.get('Birthday'))
+        parsed_at = time.perf_counter()
+        names = self.names
+        # Existing rows are already one sorted run, so Timsort mostly merges.
+        order = list(self.order)
+        order.extend(range(first, len(names)))
+        order.sort(key=lambda row: names[row].lower())
+        self.order = array('I', order)
+        # Rewrite the columns in name order so later scans walk memory front to back.
+        self._compact()
+        timings = {"parse": parsed_at - start, "sort": time.perf_counter() - parsed_at}
+        count = len(names) - first
+        self._info(f"Imported {count} contacts from {file_name}\n"
+                   f"(parse {timings['parse']:.2f}s, sort {timings['sort']:.2f}s)")
+        return count, timings
+
+    def undo_delete(self):
+        contact = self.last_deleted_contact
+        if contact:
+            self._insert_row(self._append_row(contact.name, contact.phone, contact.email, contact.group,
+                                              contact.favorite, contact.birthday))
+            self._info(f"Contact '{contact.name}' restored!")
+            self.last_deleted_contact = None
+        else:
+            self._warn("No contact to undo delete.")
+        return contact
+
+    def check_invariants(self):
+        """Assert equal column lengths, name order and the favorite counter; returns the contact count."""
+        rows = len(self.names)
+        for column in (self.phones, self.email_users, self.email_domains, self.group_codes, self.birthdays):
+            assert len(column) == rows, "column lengths differ"
+        assert len(self.favorite_bits) >= (rows + 7) >> 3, "favorite bitmap too short"
+        keys = [self.names[row].lower() for row in self.order]
+        assert keys == sorted(keys), "order is not sorted by name"
+        assert len(set(self.order)) == len(self.order), "row listed twice in order"
+        live = sum(name is not None for name in self.names)
+        assert live == len(self.order), f"{live} live rows but {len(self.order)} in order"
+        favorites = sum(self._is_favorite(row) for row in self.order)
+        assert favorites == self.favorite_total, f"favorite counter {self.favorite_total} != {favorites}"
+        return len(self.order)
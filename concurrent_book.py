@@ -0,0 +1,343 @@
+"""Thread-safe access to a contact book through a reader-writer lock.
+
+``ConcurrentContactBook`` wraps an engine and exposes the same public methods:
+
+* lookups, searches and ``list_*`` calls share the lock, so they run side by side;
+* add, update, delete, favorite toggles, undo and redo take it exclusively;
+* ``import_contacts_from_csv`` parses the file before locking and holds the
+  lock only for ``bulk_load``; ``export_contacts_to_csv`` and
+  ``iter_contacts`` read EXPORT_CHUNK_SIZE contacts at a time under the
+  shared lock, so writes can run between chunks and memory stays constant.
+
+ContactBookBST defers some work to the next read (queued index keys, indexes a
+deferred bulk load skipped); each write calls the engine's ``settle()`` before
+releasing the lock, so shared readers only ever read.  Engines without
+``settle()`` are not known to read without side effects, so their reads are
+taken exclusively too.  Contacts returned are the engine's own objects: read
+their fields, do not modify them.
+"""
+import csv
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from main import CSV_HEADER, EXPORT_BUFFER_SIZE, EXPORT_CHUNK_SIZE, MessageBoxMixin, read_contacts_csv
+
+
+class RWLock:
+    """Many readers or one writer; a waiting writer holds back new readers so it is not starved."""
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read_locked(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_locked(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class ConcurrentContactBook(MessageBoxMixin):
+    def __init__(self, book):
+        self.book = book
+        self.lock = RWLock()
+        self._settle = getattr(book, "settle", None)
+        if self._settle is not None:
+            self._settle()
+            self._reading = self.lock.read_locked
+        else:
+            self._reading = self.lock.write_locked
+
+    @property
+    def notify(self):
+        return self.book.notify
+
+    @notify.setter
+    def notify(self, value):
+        self.book.notify = value
+
+    @contextmanager
+    def _writing(self):
+        with self.lock.write_locked():
+            yield
+            if self._settle is not None:
+                self._settle()
+
+    def close(self):
+        with self.lock.write_locked():
+            if hasattr(self.book, "close"):
+                self.book.close()
+
+    # -- shared reads ---------------------------------------------------------
+
+    def __len__(self):
+        with self._reading():
+            return len(self.book)
+
+    def find_contact(self, name):
+        with self._reading():
+            return self.book.find_contact(name)
+
+    def find_by_phone(self, phone):
+        with self._reading():
+            return self.book.find_by_phone(phone)
+
+    def find_by_email(self, email):
+        with self._reading():
+            return self.book.find_by_email(email)
+
+    def prefix_search(self, prefix, limit=20):
+        with self._reading():
+            return self.book.prefix_search(prefix, limit)
+
+    def fuzzy_search(self, query, limit=10, min_similarity=0.2):
+        with self._reading():
+            return self.book.fuzzy_search(query, limit, min_similarity)
+
+    @property
+    def trigram_index(self):
+        # The GUI only checks this for None to decide whether fuzzy search is available.
+        return getattr(self.book, "trigram_index", None)
+
+    def _chunks(self, convert):
+        """Yield every contact in name order as lists of ``convert(contact)``, one shared lock per list.
+
+        Each chunk resumes after the last name already yielded (by ``rank``, for
+        engines that have it), so contacts added or deleted elsewhere while the
+        caller works never shift what is left.  Engines without ``rank`` (sqlite,
+        btree) resume at the number of contacts yielded so far, so there a write
+        before that position repeats or skips a contact at the chunk boundary.
+        """
+        rank = getattr(self.book, "rank", None)
+        done = 0
+        last_key, repeats = None, 0  # Contacts yielded so far whose lowercased name is last_key.
+        while True:
+            with self._reading():
+                start = done if rank is None or last_key is None else rank(last_key) + repeats
+                contacts = self.book.contacts_page(start, EXPORT_CHUNK_SIZE)
+                chunk = [convert(contact) for contact in contacts]
+            if not chunk:
+                return
+            done += len(chunk)
+            key = contacts[-1].name.lower()
+            run = 0
+            for contact in reversed(contacts):
+                if contact.name.lower() != key:
+                    break
+                run += 1
+            repeats = repeats + run if key == last_key and run == len(contacts) else run
+            last_key = key
+            yield chunk
+
+    def iter_contacts(self):
+        """Every contact in name order, read a chunk at a time (see _chunks), so writes can run meanwhile."""
+        for chunk in self._chunks(lambda contact: contact):
+            yield from chunk
+
+    def contacts_page(self, offset, limit):
+        with self._reading():
+            return self.book.contacts_page(offset, limit)
+
+    def select(self, i):
+        with self._reading():
+            return self.book.select(i)
+
+    def rank(self, name):
+        with self._reading():
+            return self.book.rank(name)
+
+    def count_range(self, low, high):
+        with self._reading():
+            return self.book.count_range(low, high)
+
+    def letter_counts(self):
+        with self._reading():
+            return self.book.letter_counts()
+
+    def list_contacts(self):
+        with self._reading():
+            return self.book.list_contacts()
+
+    def list_favorite_contacts(self):
+        with self._reading():
+            return self.book.list_favorite_contacts()
+
+    def favorites_count(self):
+        with self._reading():
+            return self.book.favorites_count()
+
+    def list_group(self, group):
+        with self._reading():
+            return self.book.list_group(group)
+
+    def group_count(self, group):
+        with self._reading():
+            return self.book.group_count(group)
+
+    def list_upcoming_birthdays(self, days_ahead=7, today=None):
+        with self._reading():
+            return self.book.list_upcoming_birthdays(days_ahead, today)
+
+    def check_invariants(self):
+        with self._reading():
+            return self.book.check_invariants()
+
+    def export_contacts_to_csv(self, file_name='contacts.csv', progress=None):
+        """Stream the book to ``file_name`` a chunk at a time, each chunk copied under the shared lock.
+
+        Only one chunk is held in memory, and writes wait for at most one chunk.
+        ``progress(written, total)`` is called after every chunk.
+        """
+        written = 0
+        with open(file_name, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            for chunk in self._chunks(lambda contact: (contact.name, contact.phone, contact.email, contact.group,
+                                                       contact.favorite, contact.birthday)):
+                writer.writerows(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written, max(written, len(self)))
+        self._info(f"Contacts exported to {file_name}")
+        return written
+
+    # -- exclusive writes -----------------------------------------------------
+
+    def add_contact(self, name, phone, email, group=None, birthday=None):
+        with self._writing():
+            return self.book.add_contact(name, phone, email, group, birthday)
+
+    def update_contact(self, name, new_phone, new_email):
+        with self._writing():
+            return self.book.update_contact(name, new_phone, new_email)
+
+    def delete_contact(self, name):
+        with self._writing():
+            return self.book.delete_contact(name)
+
+    def toggle_favorite(self, name):
+        with self._writing():
+            return self.book.toggle_favorite(name)
+
+    def import_contacts_from_csv_files(self, file_names, presorted=(), progress=None):
+        """Merge-import several CSV files, merging them before the lock is taken.
+
+        Engines without ``bulk_load`` only read files with CSV_HEADER's
+        columns, so the merged rows are written to one such temporary file and
+        imported from it, under the exclusive lock, by the engine's own reader.
+        """
+        from merge_import import read_contacts_csv_files
+        start = time.perf_counter()
+        if not hasattr(self.book, "bulk_load"):
+            descriptor, merged_name = tempfile.mkstemp(suffix=".csv")
+            try:
+                with open(descriptor, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as file:
+                    writer = csv.writer(file)
+                    writer.writerow(CSV_HEADER)
+                    writer.writerows((node.name, node.phone, node.email, node.group, node.favorite, node.birthday)
+                                     for node in read_contacts_csv_files(file_names, presorted, progress=progress))
+                timings = {"merge": time.perf_counter() - start}
+                locked_at = time.perf_counter()
+                with self._writing():
+                    timings["wait"] = time.perf_counter() - locked_at
+                    # Its own message would name the temporary file.
+                    notify, self.book.notify = self.book.notify, False
+                    try:
+                        count, engine_timings = self.book.import_contacts_from_csv(merged_name)
+                    finally:
+                        self.book.notify = notify
+            finally:
+                os.remove(merged_name)
+            timings.update(engine_timings)
+            self._info(f"Imported {count} contacts from {len(file_names)} files")
+            return count, timings
+        new_nodes = list(read_contacts_csv_files(file_names, presorted, progress=progress))
+        timings = {"merge": time.perf_counter() - start}
+        locked_at = time.perf_counter()
+        with self._writing():
+            timings["wait"] = time.perf_counter() - locked_at
+            timings.update(self.book.bulk_load(new_nodes))
+        self._info(f"Imported {len(new_nodes)} contacts from {len(file_names)} files")
+        return len(new_nodes), timings
+
+    def undo_delete(self):
+        with self._writing():
+            return self.book.undo_delete()
+
+    def undo(self):
+        with self._writing():
+            return self.book.undo()
+
+    def redo(self):
+        with self._writing():
+            return self.book.redo()
+
+    def add_many(self, rows):
+        with self._writing():
+            return self.book.add_many(rows)
+
+    def update_many(self, updates):
+        with self._writing():
+            return self.book.update_many(updates)
+
+    def delete_many(self, names):
+        with self._writing():
+            return self.book.delete_many(names)
+
+    def bulk_load(self, new_nodes, defer_index=False):
+        with self._writing():
+            return self.book.bulk_load(new_nodes, defer_index)
+
+    def import_contacts_from_csv(self, file_name='contacts.csv', progress=None, workers=1):
+        """Parse ``file_name`` without the lock, then link the contacts in under it.
+
+        ``progress`` is passed to read_contacts_csv; if it raises, the book is left
+        untouched.  ``workers`` > 1 parses with that many processes.  Engines
+        without ``bulk_load`` import entirely under the exclusive lock, serially
+        and with no progress reports.
+        """
+        if not hasattr(self.book, "bulk_load"):
+            with self._writing():
+                return self.book.import_contacts_from_csv(file_name)
+        start = time.perf_counter()
+        if workers > 1:
+            from parallel_import import read_contacts_csv_parallel
+            new_nodes = read_contacts_csv_parallel(file_name, workers, progress)
+        else:
+            new_nodes = read_contacts_csv(file_name, progress)
+        timings = {"parse": time.perf_counter() - start}
+        locked_at = time.perf_counter()
+        with self._writing():
+            timings["wait"] = time.perf_counter() - locked_at
+            timings.update(self.book.bulk_load(new_nodes))
+        self._info(f"Imported {len(new_nodes)} contacts from {file_name}\n"
+                   f"(parse {timings['parse']:.2f}s, sort {timings['sort']:.2f}s, "
+                   f"build {timings['build']:.2f}s, index {timings['index']:.2f}s)")
+        return len(new_nodes), timings
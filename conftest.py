@@ -0,0 +1,48 @@
+"""Shared fixtures: every engine, and consistency checks for ContactBookBST."""
+import pytest
+
+from concurrent_book import ConcurrentContactBook
+from main import ENGINES, ContactBookBST, open_contact_book
+
+
+@pytest.fixture(params=[(engine, wrapped) for engine in ENGINES for wrapped in (False, True)],
+                ids=lambda param: param[0] + ("-locked" if param[1] else ""))
+def book(request):
+    """An empty book of every engine in ENGINES, bare and behind ConcurrentContactBook."""
+    engine, wrapped = request.param
+    contact_book = open_contact_book(engine, notify=False)
+    if wrapped:
+        contact_book = ConcurrentContactBook(contact_book)
+    yield contact_book
+    if hasattr(contact_book, "close"):
+        contact_book.close()
+
+
+def index_contents(book):
+    """Every secondary index of ``book`` reduced to comparable node identities."""
+    def ids(value):
+        return sorted(map(id, value)) if isinstance(value, list) else [id(value)]
+
+    return {
+        "phone": {key: ids(value) for key, value in book.phone_index.items()},
+        "email": {key: ids(value) for key, value in book.email_index.items()},
+        "trigram": book.trigram_index,
+        "birthday": [id(node) for node in book.birthday_index],
+        "favorites": [id(node) for node in book.favorites],
+        "groups": {key: [id(node) for node in members] for key, members in book.group_index.items()},
+    }
+
+
+@pytest.fixture
+def assert_consistent():
+    """Check a ContactBookBST's tree invariants, and that its indexes match ones rebuilt from its contacts."""
+    def check(book):
+        count = book.check_invariants()
+        book._ensure_indexed()
+        rebuilt = ContactBookBST(notify=False, fuzzy_index=book.trigram_index is not None)
+        for node in book.iter_contacts():
+            rebuilt._index_contact(node)
+        assert index_contents(book) == index_contents(rebuilt)
+        return count
+
+    return check
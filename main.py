@@ -1,92 +1,678 @@
 import tkinter as tk
-from tkinter import messagebox, filedialog
-from datetime import datetime, timedelta
+from tkinter import messagebox, filedialog, simpledialog, ttk
+from datetime import date, timedelta
+from bisect import bisect_left, insort
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import islice
+import calendar
 import csv
+import io
+import math
+import os
+import queue
+import re
+import string
+import sys
+import threading
+import time
+
+NON_DIGITS = re.compile(r"\D")
+CSV_HEADER = ['Name', 'Phone', 'Email', 'Group', 'Favorite', 'Birthday']
+# Rows handed to csv.writer per batch during export; also the progress callback interval.
+EXPORT_CHUNK_SIZE = 50_000
+EXPORT_BUFFER_SIZE = 1 << 20
+# CSV files at least this large are parsed by a process pool when imported from the GUI.
+PARALLEL_IMPORT_BYTES = 64 << 20
+# Days before the first of each month in a leap year, so Feb 29 gets its own slot.
+LEAP_YEAR_MONTH_OFFSETS = (0, 0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+# Default undo journal limits: steps kept, and contacts those steps may hold on to.
+DEFAULT_UNDO_STEPS = 1000
+DEFAULT_UNDO_CONTACTS = 1_000_000
+
+
+def normalize_phone(phone):
+    """Reduce a phone number to its digits so '033-949 459' and '033949459' match."""
+    return NON_DIGITS.sub("", phone)
+
+
+def looks_like_phone(text):
+    text = text.strip()
+    return bool(normalize_phone(text)) and all(ch.isdigit() or ch in "+-(). " for ch in text)
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each lowercased word padded with two leading and one trailing space."""
+    grams = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def contact_trigrams(node):
+    # Only the local part of the email: shared domains would match everybody.
+    return trigrams(node.name) | trigrams((node.email or "").partition("@")[0])
+
+
+# Phone and email indexes map a key to a single node, switching to a list only
+# for the rare shared value; a one-element list per contact would cost ~90 bytes.
+
+def multimap_add(index, key, node):
+    current = index.get(key)
+    if current is None:
+        index[key] = node
+    elif isinstance(current, list):
+        current.append(node)
+    else:
+        index[key] = [current, node]
+
+
+def multimap_remove(index, key, node):
+    current = index.get(key)
+    if current is node:
+        del index[key]
+    elif isinstance(current, list) and node in current:
+        current.remove(node)
+        if len(current) == 1:
+            index[key] = current[0]
+
+
+def multimap_first(index, key):
+    current = index.get(key)
+    return current[0] if isinstance(current, list) else current
+
+
+# Birthdays repeat (a million contacts share ~20k dates), so parsed slots are cached.
+@lru_cache(maxsize=1 << 16)
+def birthday_slot(birthday):
+    """Day of the year (1-366, leap-year calendar) of a YYYY-MM-DD birthday, or None."""
+    if not birthday:
+        return None
+    try:
+        parsed = date.fromisoformat(birthday)
+    except ValueError:
+        return None
+    return LEAP_YEAR_MONTH_OFFSETS[parsed.month] + parsed.day
+
+
+def upcoming_slot_ranges(today, days_ahead):
+    """Inclusive birthday-slot ranges covering ``today`` .. ``today + days_ahead``, wrapping at year end.
+
+    In common years a Feb 29 birthday falls on Mar 1.  A window of a year or
+    more covers every slot once, still starting from today.
+    """
+    start = LEAP_YEAR_MONTH_OFFSETS[today.month] + today.day
+    if (today.month, today.day) == (3, 1) and not calendar.isleap(today.year):
+        start -= 1
+    if days_ahead >= 365:
+        return [(start, 366), (1, start - 1)] if start > 1 else [(1, 366)]
+    last = today + timedelta(days=days_ahead)
+    end = LEAP_YEAR_MONTH_OFFSETS[last.month] + last.day
+    if start <= end:
+        return [(start, end)]
+    return [(start, 366), (1, end)]
+
+
+# What engines without node objects (columnar, SQLite, mmap) return from lookups:
+# a read-only snapshot of one contact with ContactNode's field names.
+ContactRecord = namedtuple("ContactRecord", ["name", "phone", "email", "group", "favorite", "birthday"])
+
+
+class OrderedIndex:
+    """Nodes kept sorted by a tuple key in a plain list, for bisect range scans.
+
+    ``id(node)`` is appended to every key so equal keys stay distinct and removable.
+    Adds only queue the key; the queue is merged on the next read or remove, with
+    insort for a handful of keys (interactive edits) and one Timsort for many
+    (bulk loads), so neither path degrades to O(n) per key or O(n^2) overall.
+    """
+    # Above this many queued keys, re-sorting beats inserting them one by one.
+    MAX_INSORT = 64
+
+    def __init__(self):
+        self.keys = []
+        self.pending = []
+        self.nodes = {}
+
+    def __len__(self):
+        return len(self.keys) + len(self.pending)
+
+    def _ordered(self):
+        pending = self.pending
+        if pending:
+            if len(pending) <= self.MAX_INSORT:
+                for key in pending:
+                    insort(self.keys, key)
+            else:
+                self.keys.extend(pending)
+                self.keys.sort()
+            pending.clear()
+        return self.keys
+
+    def add(self, key, node):
+        key = key + (id(node),)
+        self.pending.append(key)
+        self.nodes[key] = node
+
+    def remove(self, key, node):
+        key = key + (id(node),)
+        keys = self._ordered()
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+            del self.nodes[key]
+
+    def remove_many(self, items):
+        """Remove ``(key, node)`` pairs with one filtering pass instead of one list deletion each."""
+        gone = {key + (id(node),) for key, node in items}
+        self.keys = [key for key in self._ordered() if key not in gone]
+        for key in gone:
+            self.nodes.pop(key, None)
+
+    def between(self, low, high):
+        """Yield nodes whose key k satisfies low <= k < high (tuple prefixes are fine)."""
+        keys = self._ordered()
+        nodes = self.nodes
+        for i in range(bisect_left(keys, low), bisect_left(keys, high)):
+            yield nodes[keys[i]]
+
+    def __iter__(self):
+        nodes = self.nodes
+        return (nodes[key] for key in self._ordered())
+
+
+class UndoJournal:
+    """Bounded undo and redo stacks of inverse operations.
+
+    An entry is a tuple naming the change that reverses an edit, applied by
+    ContactBookBST._apply_step:
+
+    ``("link", node)`` / ``("unlink", node)``
+        re-link a deleted contact / unlink an added one
+    ``("fields", node, phone, email)``
+        put back the phone and email an update replaced
+    ``("favorite", node)``
+        flip the favorite flag again
+    ``("link_many", nodes)`` / ``("unlink_many", nodes)``
+        re-link / unlink a whole batch (a bulk load, add_many or delete_many)
+    ``("fields_many", [(node, phone, email), ...])``
+        put back everything an update_many replaced, last update first
+
+    Entries reference the contacts themselves, so a deleted contact comes back
+    with its group, birthday and favorite flag.  Beyond ``max_steps`` entries,
+    or once the entries reference more than ``max_contacts`` contacts in total
+    (a bulk load counts each of its rows), the oldest undo steps are dropped.
+    """
+    def __init__(self, max_steps=DEFAULT_UNDO_STEPS, max_contacts=DEFAULT_UNDO_CONTACTS):
+        self.max_steps = max_steps
+        self.max_contacts = max_contacts
+        self.undo_steps = deque()
+        self.redo_steps = []
+        self.undo_contacts = 0
+        self.redo_contacts = 0
+        # Set while a step is being applied or a log replayed, so those edits are not recorded.
+        self.paused = False
+
+    @staticmethod
+    def _weight(entry):
+        return len(entry[1]) if entry[0] in ("link_many", "unlink_many", "fields_many") else 1
+
+    def record(self, entry):
+        """Push the inverse of a new edit; this forgets everything that could be redone."""
+        if self.paused:
+            return
+        self.redo_steps.clear()
+        self.redo_contacts = 0
+        self.undo_steps.append(entry)
+        self.undo_contacts += self._weight(entry)
+        # A single entry over max_contacts empties the journal: there is nothing left to undo past it.
+        while self.undo_steps and (len(self.undo_steps) > self.max_steps
+                                   or self.undo_contacts > self.max_contacts):
+            self.undo_contacts -= self._weight(self.undo_steps.popleft())
+
+    def pop_undo(self):
+        if not self.undo_steps:
+            return None
+        entry = self.undo_steps.pop()
+        self.undo_contacts -= self._weight(entry)
+        return entry
+
+    def push_undo(self, entry):
+        self.undo_steps.append(entry)
+        self.undo_contacts += self._weight(entry)
+
+    def pop_redo(self):
+        if not self.redo_steps:
+            return None
+        entry = self.redo_steps.pop()
+        self.redo_contacts -= self._weight(entry)
+        return entry
+
+    def push_redo(self, entry):
+        self.redo_steps.append(entry)
+        self.redo_contacts += self._weight(entry)
+
+    @contextmanager
+    def pause(self):
+        paused, self.paused = self.paused, True
+        try:
+            yield
+        finally:
+            self.paused = paused
+
 
 class ContactNode:
+    # Slotted: at millions of contacts a per-node __dict__ dominates memory.
+    __slots__ = ('name', 'phone', 'email', 'group', 'favorite', 'birthday', 'birthday_day',
+                 'left', 'right', 'height', 'size')
+
     def __init__(self, name, phone, email, group=None, favorite=False, birthday=None):
         self.name = name
         self.phone = phone
         self.email = email
-        self.group = group
+        # Groups repeat across many contacts; share one string object per group.
+        self.group = sys.intern(group) if group else group
         self.favorite = favorite
         self.birthday = birthday
+        # Parsed once here so birthday queries never call strptime per node.
+        self.birthday_day = birthday_slot(birthday)
         self.left = None
         self.right = None
-
-
-class ContactBookBST:
-    def __init__(self):
+        self.height = 1
+        # Contacts in the subtree rooted here, for rank/select by position.
+        self.size = 1
+
+
+def read_contacts_csv(file_name, progress=None):
+    """Parse a UTF-8 contacts CSV file (a leading byte order mark is skipped) into unlinked ContactNodes, in file order.
+
+    ``progress(rows, bytes_read, total_bytes)`` is called after every chunk of rows.
+    """
+    with open(file_name, mode='rb') as raw:
+        total = os.fstat(raw.fileno()).st_size
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        nodes = []
+        while True:
+            chunk = [ContactNode(row['Name'], row['Phone'], row['Email'], row.get('Group'),
+                                 row.get('Favorite') == 'True', row.get('Birthday'))
+                     for row in islice(reader, EXPORT_CHUNK_SIZE)]
+            if not chunk:
+                return nodes
+            nodes += chunk
+            if progress:
+                progress(len(nodes), raw.tell(), total)
+
+
+class MessageBoxMixin:
+    """Success/error message boxes shared by the contact book engines.
+
+    Engines set ``self.notify``; when it is False (scripts, benchmarks) nothing is shown.
+    Tk may only be used from the main thread, so calls from worker threads are silent
+    too; the code that started the worker reports the outcome instead.
+    """
+    notify = True
+
+    def _info(self, message):
+        if self.notify and threading.current_thread() is threading.main_thread():
+            messagebox.showinfo("Success", message)
+
+    def _warn(self, message):
+        if self.notify and threading.current_thread() is threading.main_thread():
+            messagebox.showwarning("Error", message)
+
+
+class OrderStatisticsMixin:
+    """count_range and letter_counts for engines that provide ``rank(name)`` and ``__len__``."""
+
+    def count_range(self, low, high):
+        """Contacts whose lowercased name is >= ``low`` and < ``high`` (names or prefixes)."""
+        return max(0, self.rank(high) - self.rank(low))
+
+    def letter_counts(self):
+        """Contacts per starting letter 'a'-'z', plus '#' for any other first character, from 27 ranks."""
+        counts = {"#": self.rank("a")}
+        start = counts["#"]
+        for letter in string.ascii_lowercase:
+            end = self.rank(chr(ord(letter) + 1))
+            counts[letter] = end - start
+            start = end
+        counts["#"] += len(self) - start
+        return counts
+
+
+class ContactBookBST(MessageBoxMixin, OrderStatisticsMixin):
+    def __init__(self, notify=True, fuzzy_index=True):
         self.root = None
-        self.last_deleted_contact = None
+        self.size = 0
+        # When False, success/error message boxes are suppressed (scripts, benchmarks).
+        self.notify = notify
+        # Inverse operations for undo/redo; replace it to change the limits.
+        self.journal = UndoJournal()
+        # Secondary indexes: normalized phone / email -> contacts with that value.
+        self.phone_index = {}
+        self.email_index = {}
+        # Inverted trigram index for fuzzy_search; None when disabled to save memory.
+        self.trigram_index = {} if fuzzy_index else None
+        # Contacts with a birthday, ordered by (day of year, name).
+        self.birthday_index = OrderedIndex()
+        # Favorite contacts ordered by name, so listing them costs O(k).
+        self.favorites = OrderedIndex()
+        # Lowercased group name -> members ordered by name.
+        self.group_index = {}
+        # Nodes whose secondary indexes have not been built yet (see bulk_load's
+        # defer_index); None once every node is indexed.
+        self.unindexed = None
+
+    def _ensure_indexed(self):
+        """Build the secondary indexes for nodes a deferred bulk load left unindexed."""
+        pending, self.unindexed = self.unindexed, None
+        if pending:
+            for node in pending:
+                self._index_contact(node)
+
+    def _index_contact(self, node):
+        if self.unindexed is not None:
+            # Still deferred: every node gets indexed together on first use.
+            self.unindexed[node] = None
+            return
+        self._index_lookups(node)
+        if node.birthday_day:
+            self.birthday_index.add((node.birthday_day, node.name.lower()), node)
+        if node.favorite:
+            self.favorites.add((node.name.lower(),), node)
+        if node.group:
+            self.group_index.setdefault(node.group.strip().lower(), OrderedIndex()).add((node.name.lower(),), node)
+
+    def _index_lookups(self, node):
+        """Add ``node`` to the indexes that depend on its phone or email (hash maps and trigrams)."""
+        # Phones without digits and blank emails stay out, so an empty key never matches anyone.
+        if phone_key := normalize_phone(node.phone or ""):
+            multimap_add(self.phone_index, phone_key, node)
+        if email_key := normalize_email(node.email or ""):
+            multimap_add(self.email_index, email_key, node)
+        if self.trigram_index is not None:
+            for gram in contact_trigrams(node):
+                self.trigram_index.setdefault(gram, set()).add(node)
+
+    def _unindex_lookups(self, node):
+        multimap_remove(self.phone_index, normalize_phone(node.phone or ""), node)
+        multimap_remove(self.email_index, normalize_email(node.email or ""), node)
+        if self.trigram_index is not None:
+            for gram in contact_trigrams(node):
+                nodes = self.trigram_index.get(gram)
+                if nodes:
+                    nodes.discard(node)
+                    if not nodes:
+                        del self.trigram_index[gram]
+
+    def _set_fields(self, contact, phone, email):
+        """Replace phone and email, re-indexing only what depends on them (not birthday, favorite or group)."""
+        if self.unindexed is not None:
+            contact.phone, contact.email = phone, email
+            return
+        self._unindex_lookups(contact)
+        contact.phone, contact.email = phone, email
+        self._index_lookups(contact)
+
+    def _unindex_contact(self, node):
+        if self.unindexed is not None:
+            del self.unindexed[node]
+            return
+        self._unindex_lookups(node)
+        if node.birthday_day:
+            self.birthday_index.remove((node.birthday_day, node.name.lower()), node)
+        if node.favorite:
+            self.favorites.remove((node.name.lower(),), node)
+        if node.group:
+            group_key = node.group.strip().lower()
+            members = self.group_index.get(group_key)
+            if members is not None:
+                members.remove((node.name.lower(),), node)
+                if not members:
+                    del self.group_index[group_key]
+
+    def _clear_indexes(self):
+        self.phone_index = {}
+        self.email_index = {}
+        if self.trigram_index is not None:
+            self.trigram_index = {}
+        self.birthday_index = OrderedIndex()
+        self.favorites = OrderedIndex()
+        self.group_index = {}
+
+    def settle(self):
+        """Finish deferred indexing and merge queued index keys now, so reads stop mutating the book.
+
+        Readers sharing a lock (see concurrent_book) must never trigger that work themselves.
+        """
+        self._ensure_indexed()
+        for index in (self.birthday_index, self.favorites, *self.group_index.values()):
+            if index.pending:
+                index._ordered()
+
+    def __len__(self):
+        return self.size
+
+    def height(self):
+        """Number of levels in the tree; stays O(log n) thanks to AVL rebalancing."""
+        return self._height(self.root)
+
+    def _height(self, node):
+        return node.height if node else 0
+
+    def _size(self, node):
+        return node.size if node else 0
+
+    def _update(self, node):
+        """Recompute ``node``'s height and subtree size from its children."""
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+        node.size = 1 + self._size(node.left) + self._size(node.right)
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rebalance(self, node):
+        """Restore the AVL invariant at ``node`` and return the new subtree root."""
+        self._update(node)
+        balance = self._height(node.left) - self._height(node.right)
+        if balance > 1:
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def _rebalance_path(self, path):
+        """Rebalance ``path`` (root first) bottom-up and return the new root."""
+        for i in range(len(path) - 1, 0, -1):
+            node = path[i]
+            old_height = node.height
+            subtree = self._rebalance(node)
+            if subtree is node and node.height == old_height:
+                # No height above this node can have changed, but every subtree size has.
+                for ancestor in reversed(path[:i]):
+                    ancestor.size = 1 + self._size(ancestor.left) + self._size(ancestor.right)
+                return path[0]
+            parent = path[i - 1]
+            if parent.left is node:
+                parent.left = subtree
+            else:
+                parent.right = subtree
+        return self._rebalance(path[0])
 
     def insert(self, root, node):
         if root is None:
             return node
-        if node.name.lower() < root.name.lower():
-            root.left = self.insert(root.left, node)
+        key = node.name.lower()
+        path = []
+        current = root
+        while current is not None:
+            path.append(current)
+            current = current.left if key < current.name.lower() else current.right
+        parent = path[-1]
+        if key < parent.name.lower():
+            parent.left = node
         else:
-            root.right = self.insert(root.right, node)
-        return root
+            parent.right = node
+        return self._rebalance_path(path)
 
     def add_contact(self, name, phone, email, group=None, birthday=None):
-        new_contact = ContactNode(name, phone, email, group, birthday=birthday)
-        if self.root is None:
-            self.root = new_contact
-        else:
-            self.insert(self.root, new_contact)
-        messagebox.showinfo("Success", f"Contact '{name}' added successfully!")
-
-    def search(self, root, query):
-        if root is None:
-            return None
-        if query.lower() in [root.name.lower(), root.email.lower(), root.phone]:
-            return root
-        if query.lower() < root.name.lower():
-            return self.search(root.left, query)
-        return self.search(root.right, query)
+        node = ContactNode(name, phone, email, group, birthday=birthday)
+        self.insert_node(node)
+        self.journal.record(("unlink", node))
+        self._info(f"Contact '{name}' added successfully!")
+        return node
+
+    def insert_node(self, node):
+        """Link ``node`` into the tree and every index; it keeps its favorite flag and other fields."""
+        node.left = node.right = None
+        node.height = node.size = 1
+        self.root = self.insert(self.root, node)
+        self._index_contact(node)
+        self.size += 1
+
+    def search(self, root, name):
+        key = name.lower()
+        current = root
+        while current is not None:
+            current_key = current.name.lower()
+            if key == current_key:
+                return current
+            current = current.left if key < current_key else current.right
+        return None
+
+    def find_by_phone(self, phone):
+        """The first contact whose phone has the same digits, or None (also for a query with no digits)."""
+        self._ensure_indexed()
+        return multimap_first(self.phone_index, normalize_phone(phone))
+
+    def find_by_email(self, email):
+        self._ensure_indexed()
+        return multimap_first(self.email_index, normalize_email(email))
 
     def find_contact(self, name):
-        return self.search(self.root, name)
+        """Look a contact up by name, falling back to the phone and email indexes."""
+        contact = self.search(self.root, name)
+        if contact is None and "@" in name:
+            contact = self.find_by_email(name)
+        elif contact is None and looks_like_phone(name):
+            contact = self.find_by_phone(name)
+        return contact
 
     def update_contact(self, name, new_phone, new_email):
         contact = self.find_contact(name)
         if contact:
-            if new_phone:
-                contact.phone = new_phone
-            if new_email:
-                contact.email = new_email
-            messagebox.showinfo("Success", f"Contact '{name}' updated successfully!")
+            self.journal.record(("fields", contact, contact.phone, contact.email))
+            self._set_fields(contact, new_phone or contact.phone, new_email or contact.email)
+            self._info(f"Contact '{name}' updated successfully!")
         else:
-            messagebox.showwarning("Error", f"Contact '{name}' not found.")
+            self._warn(f"Contact '{name}' not found.")
+        return contact
 
     def delete_contact(self, name):
         contact = self.find_contact(name)
         if contact:
-            self.root = self.delete_contact_util(self.root, name)
-            self.last_deleted_contact = contact
-            messagebox.showinfo("Success", f"Contact '{name}' deleted successfully!")
+            self.remove_node(contact)
+            self.journal.record(("link", contact))
+            self._info(f"Contact '{name}' deleted successfully!")
         else:
-            messagebox.showwarning("Error", f"Contact '{name}' not found.")
-
-    def delete_contact_util(self, root, name):
-        if root is None:
-            return root
-        if name.lower() < root.name.lower():
-            root.left = self.delete_contact_util(root.left, name)
-        elif name.lower() > root.name.lower():
-            root.right = self.delete_contact_util(root.right, name)
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def path_to(self, target):
+        """Ancestors of ``target`` from the root down, or None if it is not in the tree."""
+        key = target.name.lower()
+        pending = [(self.root, [])]
+        while pending:
+            current, path = pending.pop()
+            while current is not None:
+                if current is target:
+                    return path
+                current_key = current.name.lower()
+                if key < current_key:
+                    path.append(current)
+                    current = current.left
+                elif key > current_key:
+                    path.append(current)
+                    current = current.right
+                else:
+                    # Duplicate names can sit on either side after rotations.
+                    path.append(current)
+                    pending.append((current.right, list(path)))
+                    current = current.left
+        return None
+
+    def remove_node(self, node):
+        """Unlink ``node`` from the tree and drop it from the secondary indexes."""
+        if not self._detach(node):
+            return False
+        self._unindex_contact(node)
+        return True
+
+    def _detach(self, node):
+        """Unlink ``node`` from the name order only; False if it is not in the book."""
+        path = self.path_to(node)
+        if path is None:
+            return False
+        self.root = self.unlink_node(self.root, path, node)
+        self.size -= 1
+        return True
+
+    def unlink_node(self, root, path, target):
+        """Remove ``target`` (reached through ancestors ``path``) and return the new root."""
+        if target.left is None or target.right is None:
+            replacement = target.left or target.right
+            below = []
         else:
-            if root.left is None:
-                return root.right
-            elif root.right is None:
-                return root.left
-            temp_val = self.min_value_node(root.right)
-            root.name = temp_val.name
-            root.phone = temp_val.phone
-            root.email = temp_val.email
-            root.right = self.delete_contact_util(root.right, temp_val.name)
-        return root
+            # Move the successor node into place instead of copying its fields,
+            # so group, favorite and birthday travel with the contact.
+            chain = []
+            successor = target.right
+            while successor.left is not None:
+                chain.append(successor)
+                successor = successor.left
+            if chain:
+                chain[-1].left = successor.right
+                successor.right = target.right
+            successor.left = target.left
+            successor.height = target.height
+            replacement = successor
+            below = [successor] + chain
+        if path:
+            parent = path[-1]
+            if parent.left is target:
+                parent.left = replacement
+            else:
+                parent.right = replacement
+        target.left = target.right = None
+        target.height = target.size = 1
+        path.extend(below)
+        if not path:
+            return replacement
+        return self._rebalance_path(path)
 
     def min_value_node(self, node):
         current = node
@@ -94,78 +680,627 @@ class ContactBookBST:
             current = current.left
         return current
 
+    def in_order(self, root):
+        """Yield the nodes under ``root`` in name order using an explicit stack."""
+        stack = []
+        current = root
+        while stack or current is not None:
+            while current is not None:
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            yield current
+            current = current.right
+
+    def iter_from(self, key):
+        """Yield nodes in name order starting at the first one whose lowercased name is >= ``key``."""
+        stack = []
+        current = self.root
+        while current is not None:
+            if current.name.lower() >= key:
+                stack.append(current)
+                current = current.left
+            else:
+                current = current.right
+        while stack:
+            node = stack.pop()
+            yield node
+            current = node.right
+            while current is not None:
+                stack.append(current)
+                current = current.left
+
+    def iter_at(self, i):
+        """Yield nodes in name order starting at position ``i``, found by subtree sizes in O(log n)."""
+        stack = []
+        current = self.root
+        while current is not None:
+            left = self._size(current.left)
+            if i <= left:
+                stack.append(current)
+                if i == left:
+                    break
+                current = current.left
+            else:
+                i -= left + 1
+                current = current.right
+        while stack:
+            node = stack.pop()
+            yield node
+            current = node.right
+            while current is not None:
+                stack.append(current)
+                current = current.left
+
+    def select(self, i):
+        """The contact at position ``i`` (0-based) in name order, in O(log n)."""
+        if not 0 <= i < self.size:
+            raise IndexError("contact position out of range")
+        current = self.root
+        while True:
+            left = self._size(current.left)
+            if i < left:
+                current = current.left
+            elif i == left:
+                return current
+            else:
+                i -= left + 1
+                current = current.right
+
+    def rank(self, name):
+        """How many contacts sort before ``name`` (case-insensitive), i.e. its position, in O(log n)."""
+        key = name.lower()
+        position = 0
+        current = self.root
+        while current is not None:
+            if current.name.lower() < key:
+                position += self._size(current.left) + 1
+                current = current.right
+            else:
+                current = current.left
+        return position
+
+    def prefix_search(self, prefix, limit=20):
+        """Contacts whose name starts with ``prefix`` (case-insensitive), in O(log n + k)."""
+        key = prefix.lower()
+        matches = []
+        for node in self.iter_from(key):
+            if len(matches) >= limit or not node.name.lower().startswith(key):
+                break
+            matches.append(node)
+        return matches
+
+    def fuzzy_search(self, query, limit=10, min_similarity=0.2):
+        """Typo-tolerant lookup: the ``limit`` contacts most similar to ``query``.
+
+        Candidates are ranked by how many of the query's rarer trigrams they share, counted
+        straight from the posting lists; only a short list of the best is then scored
+        with trigram Jaccard and edit similarity, so no contact is compared one by one.
+        """
+        if self.trigram_index is None:
+            raise ValueError("fuzzy_search needs a book created with fuzzy_index=True")
+        self._ensure_indexed()
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        # The rarer half of the query's trigrams is enough to surface a contact that
+        # shares most of them, and skips the huge posting lists of common trigrams.
+        postings = sorted((self.trigram_index.get(gram, ()) for gram in query_grams), key=len)
+        shared = Counter()
+        for nodes in postings[:(len(postings) + 1) // 2]:
+            shared.update(nodes)
+        query = query.lower()
+        scored = []
+        for node, _ in shared.most_common(limit * 5):
+            grams = trigrams(node.name)
+            similarity = len(query_grams & grams) / len(query_grams | grams)
+            email_grams = trigrams((node.email or "").partition("@")[0])
+            if email_grams:
+                similarity = max(similarity, len(query_grams & email_grams) / len(query_grams | email_grams))
+            if similarity >= min_similarity:
+                # Trigrams are blunt about transpositions ("Jonh"), so edit similarity breaks ties.
+                scored.append((SequenceMatcher(None, query, node.name.lower()).ratio() + similarity, node))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [node for _, node in scored[:limit]]
+
+    def check_invariants(self):
+        """Assert BST ordering and the AVL height bound; returns the contact count."""
+        def check(node, low, high):
+            if node is None:
+                return 0, 0
+            key = node.name.lower()
+            assert (low is None or low <= key) and (high is None or key <= high), "BST order violated"
+            left_height, left_count = check(node.left, low, key)
+            right_height, right_count = check(node.right, key, high)
+            assert abs(left_height - right_height) <= 1, f"unbalanced at '{node.name}'"
+            assert node.height == 1 + max(left_height, right_height), f"stale height at '{node.name}'"
+            assert node.size == left_count + right_count + 1, f"stale subtree size at '{node.name}'"
+            return node.height, node.size
+
+        height, count = check(self.root, None, None)
+        assert count == self.size, f"size counter {self.size} != {count} nodes"
+        # An AVL tree with n nodes is never taller than 1.44 * log2(n + 2).
+        assert height <= 1.4405 * math.log2(count + 2), f"height {height} too large for {count} contacts"
+        return count
+
     def toggle_favorite(self, name):
         contact = self.find_contact(name)
         if contact:
-            contact.favorite = not contact.favorite
+            self._flip_favorite(contact)
+            self.journal.record(("favorite", contact))
             status = "Favorite" if contact.favorite else "Not Favorite"
-            messagebox.showinfo("Success", f"Contact '{name}' is now {status}!")
+            self._info(f"Contact '{name}' is now {status}!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def _flip_favorite(self, contact):
+        if self.unindexed is not None:
+            pass  # The favorites index will read the flag when it is built.
+        elif contact.favorite:
+            self.favorites.remove((contact.name.lower(),), contact)
         else:
-            messagebox.showwarning("Error", f"Contact '{name}' not found.")
-
-    def list_favorite_contacts(self, root, favorites_list):
-        if root:
-            self.list_favorite_contacts(root.left, favorites_list)
-            if root.favorite:
-                favorites_list.append(f"{root.name}: {root.phone}, {root.email}")
-            self.list_favorite_contacts(root.right, favorites_list)
-        return favorites_list
-
-    def list_contacts(self, root, contacts_list):
-        if root:
-            self.list_contacts(root.left, contacts_list)
-            contacts_list.append(f"{root.name}: {root.phone}, {root.email}")
-            self.list_contacts(root.right, contacts_list)
-        return contacts_list
-
-    def list_upcoming_birthdays(self, root, birthdays_list, days_ahead=7):
-        if root:
-            self.list_upcoming_birthdays(root.left, birthdays_list, days_ahead)
-            if root.birthday:
-                birth_date = datetime.strptime(root.birthday, '%Y-%m-%d')
-                upcoming_date = datetime.now() + timedelta(days=days_ahead)
-                if birth_date.month == upcoming_date.month and birth_date.day >= upcoming_date.day:
-                    birthdays_list.append(f"{root.name} has a birthday on {root.birthday}")
-            self.list_upcoming_birthdays(root.right, birthdays_list, days_ahead)
+            self.favorites.add((contact.name.lower(),), contact)
+        contact.favorite = not contact.favorite
+
+    def list_favorite_contacts(self):
+        self._ensure_indexed()
+        return [f"{node.name}: {node.phone}, {node.email}" for node in self.favorites]
+
+    def favorites_count(self):
+        self._ensure_indexed()
+        return len(self.favorites)
+
+    def list_group(self, group):
+        """Members of ``group`` (case-insensitive) in name order, in time proportional to the group."""
+        self._ensure_indexed()
+        members = self.group_index.get(group.strip().lower(), ())
+        return [f"{node.name}: {node.phone}, {node.email}" for node in members]
+
+    def group_count(self, group):
+        self._ensure_indexed()
+        members = self.group_index.get(group.strip().lower())
+        return len(members) if members else 0
+
+    def iter_contacts(self):
+        """Every contact in name order; the one traversal all engines provide."""
+        return self.in_order(self.root)
+
+    def contacts_page(self, offset, limit):
+        """Up to ``limit`` contacts in name order starting at position ``offset``, in O(log n + limit)."""
+        return list(islice(self.iter_at(offset), limit))
+
+    def list_contacts(self):
+        return [f"{node.name}: {node.phone}, {node.email}" for node in self.in_order(self.root)]
+
+    def list_upcoming_birthdays(self, days_ahead=7, today=None):
+        """Birthdays from today through ``days_ahead`` days ahead, soonest first, in O(log n + k)."""
+        today = today or date.today()
+        self._ensure_indexed()
+        birthdays_list = []
+        for start, end in upcoming_slot_ranges(today, days_ahead):
+            birthdays_list.extend(f"{node.name} has a birthday on {node.birthday}"
+                                  for node in self.birthday_index.between((start,), (end + 1,)))
         return birthdays_list
 
-    def export_contacts_to_csv(self, file_name='contacts.csv'):
-        with open(file_name, mode='w', newline='') as file:
+    def export_contacts_to_csv(self, file_name='contacts.csv', progress=None):
+        """Stream the book to ``file_name`` as UTF-8 and return the number of rows written.
+
+        ``progress(written, total)`` is called after every chunk of rows.
+        """
+        with open(file_name, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as file:
             writer = csv.writer(file)
-            writer.writerow(['Name', 'Phone', 'Email', 'Group', 'Favorite', 'Birthday'])
-            self.write_node(self.root, writer)
-        messagebox.showinfo("Success", f"Contacts exported to {file_name}")
-
-    def write_node(self, root, writer):
-        if root:
-            self.write_node(root.left, writer)
-            writer.writerow([root.name, root.phone, root.email, root.group, root.favorite, root.birthday])
-            self.write_node(root.right, writer)
-
-    def import_contacts_from_csv(self, file_name='contacts.csv'):
-        with open(file_name, mode='r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                self.add_contact(row['Name'], row['Phone'], row['Email'], row['Group'], row['Birthday'])
-        messagebox.showinfo("Success", f"Contacts imported from {file_name}")
+            writer.writerow(CSV_HEADER)
+            written = self.write_node(self.root, writer, progress)
+        self._info(f"Contacts exported to {file_name}")
+        return written
+
+    def write_node(self, root, writer, progress=None):
+        rows = ((node.name, node.phone, node.email, node.group, node.favorite, node.birthday)
+                for node in self.in_order(root))
+        written = 0
+        while True:
+            # Only one chunk of rows is ever materialized, whatever the book size.
+            chunk = list(islice(rows, EXPORT_CHUNK_SIZE))
+            if not chunk:
+                return written
+            writer.writerows(chunk)
+            written += len(chunk)
+            if progress:
+                progress(written, self.size)
+
+    def build_balanced(self, nodes):
+        """Link already-sorted ``nodes`` into a perfectly balanced tree in O(n) and return its root."""
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.left = build(lo, mid)
+            node.right = build(mid + 1, hi)
+            node.height = 1 + max(node.left.height if node.left else 0,
+                                  node.right.height if node.right else 0)
+            node.size = hi - lo
+            return node
 
-    def undo_delete(self):
-        if self.last_deleted_contact:
-            self.add_contact(self.last_deleted_contact.name, self.last_deleted_contact.phone,
-                             self.last_deleted_contact.email, self.last_deleted_contact.group,
-                             self.last_deleted_contact.birthday)
-            messagebox.showinfo("Success", f"Contact '{self.last_deleted_contact.name}' restored!")
-            self.last_deleted_contact = None
+        return build(0, len(nodes))
+
+    def bulk_load(self, new_nodes, defer_index=False):
+        """Add ``new_nodes`` with one sort and one balanced rebuild instead of per-node inserts.
+
+        With ``defer_index`` the phone, email, birthday, favorite, group and trigram
+        indexes are only built the first time one of them is needed, so name lookups
+        and listing work straight away. Returns a dict with the sort, build and
+        index times in seconds.
+        """
+        was_indexed = self.size > 0 and self.unindexed is None
+        # One journal step for the whole load, so undoing an import is one rebuild.
+        self.journal.record(("unlink_many", list(new_nodes)))
+        timings = self._link_many(new_nodes)
+        built_at = time.perf_counter()
+        # Deferral is all or nothing: either every node is indexed or none is.
+        if defer_index and not was_indexed:
+            if self.unindexed is None:
+                self.unindexed = {}
+            self.unindexed.update(dict.fromkeys(new_nodes))
+        else:
+            for node in new_nodes:
+                self._index_contact(node)
+        timings["index"] = time.perf_counter() - built_at
+        return timings
+
+    def _link_many(self, new_nodes):
+        """Link ``new_nodes`` into the name order (not the indexes); returns sort and build times."""
+        start = time.perf_counter()
+        nodes = list(self.in_order(self.root))
+        # The existing contacts already form a sorted run, so Timsort only
+        # really has to order the new ones and merge the two runs.
+        nodes.extend(new_nodes)
+        nodes.sort(key=lambda node: node.name.lower())
+        sorted_at = time.perf_counter()
+        self.root = self.build_balanced(nodes)
+        self.size = len(nodes)
+        return {"sort": sorted_at - start, "build": time.perf_counter() - sorted_at}
+
+    def _unlink_many(self, nodes):
+        """Drop ``nodes`` from the name order (not the indexes) with one O(n) rebuild."""
+        gone = set(nodes)
+        kept = [node for node in self.in_order(self.root) if node not in gone]
+        self.root = self.build_balanced(kept)
+        self.size = len(kept)
+
+    def _unindex_many(self, nodes):
+        if self.unindexed is None and len(nodes) > self.size:
+            # Fewer contacts remain than are leaving: rebuilding their indexes on
+            # first use is cheaper than taking every leaving contact out.
+            self._clear_indexes()
+            self.unindexed = dict.fromkeys(self.in_order(self.root))
+        elif self.unindexed is not None or len(nodes) <= OrderedIndex.MAX_INSORT:
+            for node in nodes:
+                self._unindex_contact(node)
+        else:
+            # One filtering pass per ordered index instead of a list deletion per contact.
+            groups = {}
+            for node in nodes:
+                self._unindex_lookups(node)
+                if node.group:
+                    groups.setdefault(node.group.strip().lower(), []).append(((node.name.lower(),), node))
+            self.birthday_index.remove_many(((node.birthday_day, node.name.lower()), node)
+                                            for node in nodes if node.birthday_day)
+            self.favorites.remove_many(((node.name.lower(),), node) for node in nodes if node.favorite)
+            for group_key, members in groups.items():
+                index = self.group_index.get(group_key)
+                if index is not None:
+                    index.remove_many(members)
+                    if not index:
+                        del self.group_index[group_key]
+
+    def _sparse(self, count):
+        """Whether ``count`` O(log n) tree operations cost less than one O(n) pass over the book."""
+        return count * max(self.height(), 1) < self.size
+
+    def _link_batch(self, nodes):
+        if self._sparse(len(nodes)):
+            for node in nodes:
+                self.insert_node(node)
+        else:
+            self._link_many(nodes)
+            for node in nodes:
+                self._index_contact(node)
+
+    def _unlink_batch(self, nodes):
+        if self._sparse(len(nodes)):
+            for node in nodes:
+                self._detach(node)
+        else:
+            self._unlink_many(nodes)
+        self._unindex_many(nodes)
+
+    def _match_names(self, names, consume):
+        """The contact each of ``names`` refers to (None if none), found in one ordered pass.
+
+        The names are sorted and then met either by one walk of the whole name
+        order or, for a few names in a big book, by an iter_from seek per
+        distinct name.  With ``consume`` a name given twice matches two contacts
+        of that name (deletes); otherwise it matches the same one again
+        (updates).  Names matching no contact fall back to find_contact's phone
+        and email lookups.
+        """
+        keys = [name.lower() for name in names]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        matches = [None] * len(keys)
+        walk = not self._sparse(len(keys))
+        nodes = self.in_order(self.root) if walk else iter(())
+        node = next(nodes, None)
+        previous = None
+        for i in order:
+            key = keys[i]
+            if key != previous:
+                if not walk:
+                    nodes = self.iter_from(key)
+                    node = next(nodes, None)
+                while node is not None and node.name.lower() < key:
+                    node = next(nodes, None)
+                previous, first = key, i
+            elif not consume:
+                matches[i] = matches[first]
+                continue
+            if node is not None and node.name.lower() == key:
+                matches[i] = node
+                if consume:
+                    node = next(nodes, None)
+        taken = set(matches) if consume else None
+        for i, name in enumerate(names):
+            if matches[i] is None and ("@" in name or looks_like_phone(name)):
+                contact = self.find_contact(name)
+                if contact is not None and (taken is None or contact not in taken):
+                    matches[i] = contact
+                    if taken is not None:
+                        taken.add(contact)
+        return matches
+
+    def add_many(self, rows):
+        """Add contacts from ``(name, phone, email[, group[, birthday]])`` rows; returns the new contacts in order.
+
+        Linked with one rebuild when that beats per-contact inserts, and undone as one step.
+        """
+        new_nodes = [ContactNode(*row[:4], birthday=row[4] if len(row) > 4 else None) for row in rows]
+        self._link_batch(new_nodes)
+        self.journal.record(("unlink_many", new_nodes))
+        self._info(f"Added {len(new_nodes)} contacts.")
+        return new_nodes
+
+    def update_many(self, updates):
+        """Apply ``(name, new_phone, new_email)`` updates in order; returns each updated contact or None.
+
+        Blank values keep the current ones, as in update_contact.  Every name is
+        looked up before any update is applied, so an update never redirects a
+        later one through a changed phone or email.  Undone as one step.
+        """
+        updates = list(updates)
+        matches = self._match_names([update[0] for update in updates], consume=False)
+        replaced = []
+        for (_, new_phone, new_email), contact in zip(updates, matches):
+            if contact is None:
+                continue
+            replaced.append((contact, contact.phone, contact.email))
+            self._set_fields(contact, new_phone or contact.phone, new_email or contact.email)
+        if replaced:
+            self.journal.record(("fields_many", replaced))
+        self._batch_info("Updated", len(replaced), len(updates))
+        return matches
+
+    def delete_many(self, names):
+        """Delete the named contacts; returns each deleted contact or None, in the order given.
+
+        Unlinked with one rebuild when that beats per-contact deletes, and undone as one step.
+        """
+        matches = self._match_names(list(names), consume=True)
+        deleted = [contact for contact in matches if contact is not None]
+        if deleted:
+            self._unlink_batch(deleted)
+            self.journal.record(("link_many", deleted))
+        self._batch_info("Deleted", len(deleted), len(matches))
+        return matches
+
+    def _batch_info(self, verb, done, total):
+        missing = f" ({total - done} not found)" if done < total else ""
+        self._info(f"{verb} {done} contacts{missing}.")
+
+    def import_contacts_from_csv(self, file_name='contacts.csv', workers=1):
+        """Bulk-import a CSV file and return the number of rows and per-phase timings.
+
+        With ``workers`` > 1 the file is parsed by that many processes (see parallel_import.py).
+        """
+        start = time.perf_counter()
+        if workers > 1:
+            from parallel_import import read_contacts_csv_parallel
+            new_nodes = read_contacts_csv_parallel(file_name, workers)
         else:
-            messagebox.showwarning("Error", "No contact to undo delete.")
+            new_nodes = read_contacts_csv(file_name)
+        timings = {"parse": time.perf_counter() - start}
+        timings.update(self.bulk_load(new_nodes))
+        self._info(f"Imported {len(new_nodes)} contacts from {file_name}\n"
+                   f"(parse {timings['parse']:.2f}s, sort {timings['sort']:.2f}s, "
+                   f"build {timings['build']:.2f}s, index {timings['index']:.2f}s)")
+        return len(new_nodes), timings
+
+    def import_contacts_from_csv_files(self, file_names, presorted=()):
+        """Merge-import several CSV files, whatever their column layout (see merge_import.py).
+
+        ``presorted`` names files already sorted by name.  Returns the number of
+        rows and per-phase timings, like import_contacts_from_csv.
+        """
+        from merge_import import read_contacts_csv_files
+        start = time.perf_counter()
+        new_nodes = list(read_contacts_csv_files(file_names, presorted))
+        timings = {"merge": time.perf_counter() - start}
+        timings.update(self.bulk_load(new_nodes))
+        self._info(f"Imported {len(new_nodes)} contacts from {len(file_names)} files")
+        return len(new_nodes), timings
+
+    def _apply_step(self, entry):
+        """Apply one journal entry and return the entry that reverses it, plus a message."""
+        op, target = entry[0], entry[1]
+        if op == "link":
+            # The deleted node itself is re-linked, so group, birthday and favorite survive.
+            self.insert_node(target)
+            return ("unlink", target), f"Contact '{target.name}' restored"
+        if op == "unlink":
+            self.remove_node(target)
+            return ("link", target), f"Contact '{target.name}' removed"
+        if op == "fields":
+            inverse = ("fields", target, target.phone, target.email)
+            self._set_fields(target, entry[2], entry[3])
+            return inverse, f"Contact '{target.name}' details restored"
+        if op == "favorite":
+            self._flip_favorite(target)
+            status = "Favorite" if target.favorite else "Not Favorite"
+            return entry, f"Contact '{target.name}' is now {status}"
+        if op == "link_many":
+            self._link_batch(target)
+            return ("unlink_many", target), f"{len(target)} contacts restored"
+        if op == "unlink_many":
+            self._unlink_batch(target)
+            return ("link_many", target), f"{len(target)} contacts removed"
+        if op == "fields_many":
+            # Latest change first, so a contact updated twice ends with its oldest details.
+            inverse = []
+            for node, phone, email in reversed(target):
+                inverse.append((node, node.phone, node.email))
+                self._set_fields(node, phone, email)
+            return ("fields_many", inverse), f"details of {len(target)} contacts restored"
+        raise ValueError(f"unknown journal entry {op!r}")
+
+    def undo(self):
+        """Undo the latest add, update, delete, favorite toggle or bulk load; returns what it touched."""
+        entry = self.journal.pop_undo()
+        if entry is None:
+            self._warn("Nothing to undo.")
+            return None
+        with self.journal.pause():
+            inverse, message = self._apply_step(entry)
+        self.journal.push_redo(inverse)
+        self._info(f"Undone: {message}.")
+        return entry[1]
+
+    def redo(self):
+        """Re-apply the latest undone step; any new edit clears what can be redone."""
+        entry = self.journal.pop_redo()
+        if entry is None:
+            self._warn("Nothing to redo.")
+            return None
+        with self.journal.pause():
+            inverse, message = self._apply_step(entry)
+        self.journal.push_undo(inverse)
+        self._info(f"Redone: {message}.")
+        return entry[1]
+
+    def undo_delete(self):
+        """Undo the latest step if it was a delete (the single-step API the other engines share)."""
+        steps = self.journal.undo_steps
+        if not steps or steps[-1][0] != "link":
+            self._warn("No contact to undo delete.")
+            return None
+        return self.undo()
+
+
+# Storage engines with ContactBookBST's public methods: name -> (module, class).
+ENGINES = {
+    "tree": ("main", "ContactBookBST"),
+    "sorted-array": ("sorted_array_book", "SortedArrayContactBook"),
+    "columnar": ("columnar_book", "ColumnarContactBook"),
+    "sqlite": ("sqlite_book", "SQLiteContactBook"),
+    "btree": ("btree_book", "BTreeContactBook"),
+}
+
+
+def create_contact_book(engine="tree", *args, **kwargs):
+    """Construct the contact book ``engine`` (a key of ENGINES) with the given arguments."""
+    if engine == "tree":
+        return ContactBookBST(*args, **kwargs)
+    try:
+        module_name, class_name = ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"unknown engine {engine!r}; choose one of {', '.join(ENGINES)}") from None
+    # Imported on demand: the engine modules import this one.
+    module = __import__(module_name)
+    return getattr(module, class_name)(*args, **kwargs)
+
+
+def open_contact_book(engine="tree", data_dir=None, notify=True):
+    """The book ``engine`` stored under ``data_dir``, or a throwaway one when ``data_dir`` is None.
+
+    tree, sqlite and btree persist there; sorted-array and columnar always start empty.
+    """
+    if data_dir is not None and engine in ("sqlite", "btree"):
+        os.makedirs(data_dir, exist_ok=True)
+    if engine == "sqlite":
+        return create_contact_book("sqlite", ":memory:" if data_dir is None else os.path.join(data_dir, "contacts.db"),
+                                   notify=notify)
+    if engine == "btree":
+        return create_contact_book("btree", None if data_dir is None else os.path.join(data_dir, "contacts.btree"),
+                                   notify=notify)
+    if engine == "tree" and data_dir is not None:
+        from storage import PersistentContactBook
+        return PersistentContactBook(data_dir, notify=notify)
+    return create_contact_book(engine, notify=notify)
+
+
+class JobCancelled(Exception):
+    """Raised from a BackgroundJob's progress callback once the job has been cancelled."""
+
+
+class BackgroundJob:
+    """Runs ``work(progress)`` on a daemon thread and reports back through a queue.
+
+    ``progress(done, total, rows)`` is safe to call from the worker and raises
+    JobCancelled after ``cancel()``.  The Tk side drains ``messages`` from an
+    ``after`` callback: ("progress", done, total, rows), then one of ("done", result),
+    ("cancelled",) or ("error", exception).
+    """
+    def __init__(self, work):
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self.thread.start()
+
+    def progress(self, done, total, rows):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.messages.put(("progress", done, total, rows))
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self, work):
+        try:
+            self.messages.put(("done", work(self.progress)))
+        except JobCancelled:
+            self.messages.put(("cancelled",))
+        except Exception as error:
+            self.messages.put(("error", error))
+
+
+# Milliseconds between polls of a running BackgroundJob's queue.
+JOB_POLL_INTERVAL = 100
 
 
 class ContactBookApp:
-    def __init__(self, root):
+    def __init__(self, root, contact_book=None):
         self.root = root
         self.root.title("Welcome to Contact Book Application")
 
-        self.contact_book = ContactBookBST()
+        # Any engine with ContactBookBST's public methods will do (see columnar_book.py).
+        # It is wrapped in a reader-writer lock because import and export run on a worker thread.
+        from concurrent_book import ConcurrentContactBook
+        contact_book = contact_book if contact_book is not None else ContactBookBST()
+        if not isinstance(contact_book, ConcurrentContactBook):
+            contact_book = ConcurrentContactBook(contact_book)
+        self.contact_book = contact_book
+        self.job = None
+        self.list_window = None
 
         # Create frames for layout
         self.frame = tk.Frame(self.root)
@@ -202,13 +1337,26 @@ class ContactBookApp:
         self.birthday_button = tk.Button(self.frame, text="List Upcoming Birthdays", command=self.list_upcoming_birthdays_window)
         self.birthday_button.grid(row=4, column=1, padx=10, pady=10)
 
-        self.undo_button = tk.Button(self.frame, text="Undo Delete", command=self.undo_delete)
+        # Engines with an undo journal undo and redo any edit; the rest only undo a delete.
+        self.journaled = hasattr(self.contact_book.book, "undo")
+        self.undo_button = tk.Button(self.frame, text="Undo" if self.journaled else "Undo Delete",
+                                     command=self.undo if self.journaled else self.undo_delete)
         self.undo_button.grid(row=5, column=0, padx=10, pady=10)
 
+        self.group_button = tk.Button(self.frame, text="List Group", command=self.list_group_window)
+        self.group_button.grid(row=5, column=1, padx=10, pady=10)
+
+        if self.journaled:
+            self.redo_button = tk.Button(self.frame, text="Redo", command=self.redo)
+            self.redo_button.grid(row=6, column=0, padx=10, pady=10)
+
         # Output Text
         self.output_text = tk.Text(self.root, height=10, width=50)
         self.output_text.pack(pady=20)
 
+        self.status_label = tk.Label(self.root, text="")
+        self.status_label.pack(pady=5)
+
     def add_contact_window(self):
         self.new_window = tk.Toplevel(self.root)
         self.new_window.title("Add Contact")
@@ -235,33 +1383,275 @@ class ContactBookApp:
         ToggleFavoriteWindow(self.new_window, self.contact_book)
 
     def list_contacts(self):
-        contacts_list = self.contact_book.list_contacts(self.contact_book.root, [])
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, "\n".join(contacts_list) if contacts_list else "No contacts found.")
+        # A virtual list: only the rows on screen are ever fetched or drawn.
+        if self.list_window is not None and self.list_window.winfo_exists():
+            self.contact_list.refresh()
+            self.list_window.lift()
+        else:
+            self.list_window = tk.Toplevel(self.root)
+            self.list_window.title("All Contacts")
+            # Letter jumps need rank(); engines without it (sqlite, btree) just scroll.
+            ranked = hasattr(self.contact_book.book, "rank")
+            self.contact_list = ContactListView(self.list_window, self.contact_book.contacts_page,
+                                                lambda: len(self.contact_book),
+                                                lambda contact: f"{contact.name}: {contact.phone}, {contact.email}",
+                                                rank=self.contact_book.rank if ranked else None,
+                                                letter_counts=self.contact_book.letter_counts if ranked else None)
+            self.contact_list.pack(fill=tk.BOTH, expand=True)
+        self.status_label.config(text=f"{self.contact_list.total:,} contacts")
 
     def list_favorite_contacts(self):
-        favorites_list = self.contact_book.list_favorite_contacts(self.contact_book.root, [])
+        favorites_list = self.contact_book.list_favorite_contacts()
         self.output_text.delete(1.0, tk.END)
         self.output_text.insert(tk.END, "\n".join(favorites_list) if favorites_list else "No favorite contacts found.")
+        self.status_label.config(text=f"{self.contact_book.favorites_count()} favorite contacts")
 
     def import_contacts(self):
-        file_path = filedialog.askopenfilename(title="Select CSV File", filetypes=[("CSV Files", "*.csv")])
-        if file_path:
-            self.contact_book.import_contacts_from_csv(file_path)
+        file_paths = filedialog.askopenfilenames(title="Select CSV Files", filetypes=[("CSV Files", "*.csv")])
+        if not file_paths:
+            return
+        if len(file_paths) > 1:
+            self.import_contact_files(file_paths)
+            return
+        file_path = file_paths[0]
+
+        # Big files are parsed on every core; below that the pool's startup costs more than it saves.
+        workers = (os.cpu_count() or 1) if os.path.getsize(file_path) >= PARALLEL_IMPORT_BYTES else 1
+
+        def work(progress):
+            # Parsing reports bytes read; the book only changes, all at once, after the last row.
+            return self.contact_book.import_contacts_from_csv(
+                file_path, progress=lambda rows, done, total: progress(done, total, rows), workers=workers)
+
+        def finished(result):
+            count, timings = result
+            return f"Imported {count:,} contacts from {file_path}\n" + \
+                ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+
+        self.start_job("Importing contacts", work, finished)
+
+    def import_contact_files(self, file_paths):
+        def work(progress):
+            return self.contact_book.import_contacts_from_csv_files(
+                file_paths, progress=lambda rows, done, total: progress(done, total, rows))
+
+        def finished(result):
+            count, timings = result
+            return f"Imported {count:,} contacts from {len(file_paths)} files\n" + \
+                ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+
+        self.start_job("Importing contacts", work, finished)
 
     def export_contacts(self):
-        file_path = filedialog.asksaveasfilename(title="Save CSV File", defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-        if file_path:
-            self.contact_book.export_contacts_to_csv(file_path)
+        file_path = filedialog.asksaveasfilename(title="Save CSV File", defaultextension=".csv",
+                                                 filetypes=[("CSV Files", "*.csv"),
+                                                            ("Sorted contact files (mmap lookups)", "*.cbk")])
+        if not file_path:
+            return
+
+        def work(progress):
+            # Written next to the target and renamed over it, so a cancelled export leaves no partial file.
+            temporary_path = file_path + ".part"
+            try:
+                if file_path.endswith(".cbk"):
+                    from mmap_book import write_sorted_file
+                    count = write_sorted_file(self.contact_book.iter_contacts(), temporary_path)
+                else:
+                    count = self.contact_book.export_contacts_to_csv(
+                        temporary_path, progress=lambda written, total: progress(written, total, written))
+                os.replace(temporary_path, file_path)
+                return count
+            finally:
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+
+        self.start_job("Exporting contacts", work, lambda count: f"{count:,} contacts written to {file_path}")
+
+    def start_job(self, title, work, finished):
+        """Run ``work`` in a BackgroundJob behind a progress window; ``finished(result)`` gives the message."""
+        if self.job is not None:
+            messagebox.showwarning("Busy", "Wait for the current import or export to finish.")
+            return
+        self.import_button.config(state=tk.DISABLED)
+        self.export_button.config(state=tk.DISABLED)
+        self.job = BackgroundJob(work)
+        self.progress_window = ProgressWindow(tk.Toplevel(self.root), title, self.job)
+        self.root.after(JOB_POLL_INTERVAL, self.poll_job, finished)
+
+    def poll_job(self, finished):
+        """Drain the job's queue on the Tk thread; reschedules itself until the job ends."""
+        outcome = None
+        while outcome is None:
+            try:
+                message = self.job.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress":
+                self.progress_window.show(*message[1:])
+            else:
+                outcome = message
+        if outcome is None:
+            self.root.after(JOB_POLL_INTERVAL, self.poll_job, finished)
+            return
+        self.job = None
+        self.progress_window.close()
+        self.import_button.config(state=tk.NORMAL)
+        self.export_button.config(state=tk.NORMAL)
+        if outcome[0] == "done":
+            messagebox.showinfo("Success", finished(outcome[1]))
+        elif outcome[0] == "error":
+            messagebox.showwarning("Error", str(outcome[1]))
+        self.status_label.config(text="Cancelled; nothing was changed." if outcome[0] == "cancelled" else "")
 
     def list_upcoming_birthdays_window(self):
+        days_ahead = simpledialog.askinteger("Upcoming Birthdays", "Number of days ahead:",
+                                             initialvalue=7, minvalue=0, parent=self.root)
+        if days_ahead is None:
+            return
         self.output_text.delete(1.0, tk.END)
-        birthdays_list = self.contact_book.list_upcoming_birthdays(self.contact_book.root, [])
+        birthdays_list = self.contact_book.list_upcoming_birthdays(days_ahead)
         self.output_text.insert(tk.END, "\n".join(birthdays_list) if birthdays_list else "No upcoming birthdays.")
 
+    def list_group_window(self):
+        group = simpledialog.askstring("List Group", "Group name:", parent=self.root)
+        if not group:
+            return
+        members = self.contact_book.list_group(group)
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(tk.END, "\n".join(members) if members else f"No contacts in group '{group}'.")
+        self.status_label.config(text=f"{self.contact_book.group_count(group)} contacts in group '{group}'")
+
     def undo_delete(self):
         self.contact_book.undo_delete()
 
+    def undo(self):
+        self.contact_book.undo()
+
+    def redo(self):
+        self.contact_book.redo()
+
+
+class ContactListView(tk.Frame):
+    """Scrollable list that only ever holds the rows on screen.
+
+    ``fetch(offset, limit)`` returns contacts in display order and ``count()`` how
+    many there are.  Rows are fetched FETCH_SIZE at a time around the visible
+    window and the scrollbar is driven by hand, so drawing costs the same for 100
+    or 10M contacts; each scroll only costs what one ``fetch`` does.
+
+    With ``rank(name)`` (a position) and ``letter_counts()`` a row of letter
+    buttons jumps straight to the first contact starting with that letter.
+    """
+    FETCH_SIZE = 200
+
+    def __init__(self, master, fetch, count, format_row, rows=20, width=60, rank=None, letter_counts=None):
+        super().__init__(master)
+        self.fetch = fetch
+        self.count = count
+        self.format_row = format_row
+        self.rank = rank
+        self.letter_counts = letter_counts
+        self.rows = rows
+        self.first = 0
+        self.total = 0
+        self.cache_offset = 0
+        self.cache = []
+        self.letter_buttons = {}
+        if rank is not None and letter_counts is not None:
+            letters = tk.Frame(self)
+            letters.pack(side=tk.TOP, fill=tk.X)
+            for letter in "#" + string.ascii_lowercase:
+                button = tk.Button(letters, text=letter.upper(), padx=1, pady=0,
+                                   command=lambda letter=letter: self.jump_to_letter(letter))
+                button.pack(side=tk.LEFT)
+                self.letter_buttons[letter] = button
+        self.position_label = tk.Label(self, anchor=tk.W)
+        self.position_label.pack(side=tk.BOTTOM, fill=tk.X)
+        self.listbox = tk.Listbox(self, height=rows, width=width, activestyle='none')
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_by(-3 if event.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.listbox.bind("<Prior>", lambda event: self.scroll_by(-self.rows))
+        self.listbox.bind("<Next>", lambda event: self.scroll_by(self.rows))
+        self.listbox.bind("<Home>", lambda event: self.scroll_to(0))
+        self.listbox.bind("<End>", lambda event: self.scroll_to(self.total))
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the total and drop the fetched rows, after the book changed."""
+        self.total = self.count()
+        self.cache = []
+        if self.letter_buttons:
+            for letter, count in self.letter_counts().items():
+                self.letter_buttons[letter].config(state=tk.NORMAL if count else tk.DISABLED)
+        self.scroll_to(self.first)
+
+    def jump_to_letter(self, letter):
+        # '#' also covers names after 'z' (accented and other scripts); the top of the list is the useful stop.
+        self.scroll_to(0 if letter == "#" else self.rank(letter))
+
+    def scroll(self, action, amount, unit=None):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``."""
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(amount) * self.total))
+        elif unit == tk.PAGES:
+            self.scroll_by(int(amount) * self.rows)
+        else:
+            self.scroll_by(int(amount))
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+        return "break"  # The listbox must not scroll its few rows by itself.
+
+    def scroll_to(self, first):
+        self.first = max(0, min(first, self.total - self.rows))
+        end = min(self.first + self.rows, self.total)
+        if not self.cache_offset <= self.first <= end <= self.cache_offset + len(self.cache):
+            # Centre the fetched block on the window, so small scrolls either way stay cached.
+            self.cache_offset = max(0, self.first - (self.FETCH_SIZE - self.rows) // 2)
+            self.cache = self.fetch(self.cache_offset, self.FETCH_SIZE)
+        start = self.first - self.cache_offset
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *map(self.format_row, self.cache[start:start + end - self.first]))
+        if self.total:
+            self.scrollbar.set(self.first / self.total, end / self.total)
+            self.position_label.config(text=f"{self.first + 1:,}-{end:,} of {self.total:,} "
+                                            f"(page {self.first // self.rows + 1:,} of {-(-self.total // self.rows):,})")
+        else:
+            self.scrollbar.set(0, 1)
+            self.position_label.config(text="No contacts found.")
+
+
+class ProgressWindow:
+    """Progress bar, rows/sec and a Cancel button for a BackgroundJob."""
+    def __init__(self, master, title, job):
+        self.master = master
+        self.job = job
+        master.title(title)
+        master.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.bar = ttk.Progressbar(master, length=300, mode='determinate')
+        self.bar.pack(padx=10, pady=10)
+        self.label = tk.Label(master, text="Starting...")
+        self.label.pack()
+        self.cancel_button = tk.Button(master, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=10)
+
+    def show(self, done, total, rows):
+        self.bar.config(maximum=max(total, 1), value=done)
+        elapsed = time.perf_counter() - self.job.started
+        self.label.config(text=f"{rows:,} rows ({rows / elapsed if elapsed else 0:,.0f} rows/sec)")
+
+    def cancel(self):
+        self.job.cancel()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.label.config(text="Cancelling...")
+
+    def close(self):
+        self.master.destroy()
+
 
 class AddContactWindow:
     def __init__(self, master, contact_book):
@@ -309,17 +1699,52 @@ class FindContactWindow:
         self.label_name.pack()
         self.entry_name = tk.Entry(master)
         self.entry_name.pack()
+        self.entry_name.bind("<KeyRelease>", self.update_suggestions)
+        self.suggestions = tk.Listbox(master, height=8, width=50)
+        self.suggestions.pack()
+        self.suggestions.bind("<Double-Button-1>", self.show_suggestion)
+        self.suggested_contacts = []
         self.button_find = tk.Button(master, text="Find", command=self.find_contact)
         self.button_find.pack()
 
+    def update_suggestions(self, event=None):
+        prefix = self.entry_name.get()
+        self.suggested_contacts = self.contact_book.prefix_search(prefix) if prefix else []
+        self.suggestions.delete(0, tk.END)
+        for contact in self.suggested_contacts:
+            self.suggestions.insert(tk.END, f"{contact.name}: {contact.phone}, {contact.email}")
+
+    def show_suggestion(self, event=None):
+        selection = self.suggestions.curselection()
+        if selection:
+            contact = self.suggested_contacts[selection[0]]
+            messagebox.showinfo("Contact Found", f"Name: {contact.name}\nPhone: {contact.phone}\nEmail: {contact.email}")
+
     def find_contact(self):
         query = self.entry_name.get()
-        contact = self.contact_book.find_contact(query)
+        if "@" in query:
+            contact = self.contact_book.find_by_email(query)
+        elif looks_like_phone(query):
+            contact = self.contact_book.find_by_phone(query)
+        else:
+            contact = self.contact_book.find_contact(query)
         if contact:
             messagebox.showinfo("Contact Found", f"Name: {contact.name}\nPhone: {contact.phone}\nEmail: {contact.email}")
+            self.master.destroy()
+            return
+        # Engines without a trigram index have no fuzzy_search.
+        fuzzy = getattr(self.contact_book, "trigram_index", None) is not None
+        similar = self.contact_book.fuzzy_search(query) if fuzzy else []
+        if similar:
+            # Keep the window open and offer the closest matches instead.
+            self.suggested_contacts = similar
+            self.suggestions.delete(0, tk.END)
+            for contact in similar:
+                self.suggestions.insert(tk.END, f"{contact.name}: {contact.phone}, {contact.email}")
+            messagebox.showwarning("Not Found", f"No exact match for '{query}'. Closest matches are listed.")
         else:
             messagebox.showwarning("Not Found", f"No contact found for '{query}'.")
-        self.master.destroy()
+            self.master.destroy()
 
 
 class DeleteContactWindow:
@@ -384,6 +1809,23 @@ class ToggleFavoriteWindow:
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Contact Book Application")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.expanduser("~"), ".contact_book"),
+                        help="where contacts are stored between sessions (default: ~/.contact_book)")
+    parser.add_argument("--in-memory", action="store_true", help="start empty and keep nothing on exit")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="tree",
+                        help="tree (default), sqlite and btree keep contacts in --data-dir; "
+                             "sorted-array and columnar always start empty")
+    args = parser.parse_args()
+    from storage import BookInUseError
+    try:
+        contact_book = open_contact_book(args.engine, None if args.in_memory else args.data_dir)
+    except BookInUseError as error:
+        parser.exit(1, f"{error}\n")
     root = tk.Tk()
-    app = ContactBookApp(root)
+    app = ContactBookApp(root, contact_book)
     root.mainloop()
+    if hasattr(contact_book, "close"):
+        contact_book.close()
@@ -0,0 +1,136 @@
+"""Importing many contact CSV files at once, whatever their column layout.
+
+``read_contacts_csv_files`` yields the contacts of several files as one
+stream in name order:
+
+* each file is read as UTF-8, with or without the byte order mark
+  spreadsheet programs write;
+* each file's header is read once and mapped onto CSV_HEADER, so
+  ``Name,Phone,Email,Birthday,Favorite`` (app.py's export, no Group),
+  ``E-mail`` or ``Mobile`` columns and any column order are all accepted;
+* each file is cut into sorted runs of at most ``run_size`` rows.  Runs stay
+  in memory while the rows held in memory fit in ``run_size`` and are
+  spilled to temporary files otherwise;
+* all runs are combined by one ``heapq.merge``.
+
+So at most about ``2 * run_size`` rows are in memory while the files are
+sorted and ``run_size + runs * SPILL_BLOCK_SIZE`` while they are merged,
+however large the files are.
+
+Files flagged as already sorted by name are streamed without sorting or
+spilling.  The flag is trusted, not checked: a wrongly flagged file only
+costs ``bulk_load`` a real sort instead of a merge check, the result is the
+same.
+"""
+import csv
+import heapq
+import io
+import os
+import pickle
+import tempfile
+from contextlib import ExitStack
+from itertools import islice
+
+from main import CSV_HEADER, ContactNode
+
+# Rows held in memory while sorting, across all files.
+DEFAULT_RUN_SIZE = 500_000
+# Rows per pickle record in a spilled run; the merge holds one record per spilled run.
+SPILL_BLOCK_SIZE = 1000
+
+# Lowercased header spellings seen in exports, mapped to the canonical column.
+HEADER_ALIASES = {
+    "name": "Name", "full name": "Name", "contact": "Name",
+    "phone": "Phone", "phone number": "Phone", "mobile": "Phone", "tel": "Phone", "telephone": "Phone",
+    "email": "Email", "e-mail": "Email", "mail": "Email", "email address": "Email",
+    "group": "Group", "groups": "Group", "category": "Group",
+    "favorite": "Favorite", "favourite": "Favorite", "fav": "Favorite", "starred": "Favorite",
+    "birthday": "Birthday", "birth date": "Birthday", "birthdate": "Birthday", "dob": "Birthday",
+}
+TRUE_VALUES = {"true", "yes", "1", "y"}
+
+
+def header_columns(fieldnames):
+    """Position of each CSV_HEADER column in a file with header ``fieldnames`` (None where it is missing)."""
+    positions = {}
+    for i, field in enumerate(fieldnames):
+        canonical = HEADER_ALIASES.get(field.strip().lower())
+        if canonical is not None:
+            positions.setdefault(canonical, i)
+    if "Name" not in positions:
+        raise ValueError(f"no name column in header {fieldnames}")
+    return tuple(positions.get(column) for column in CSV_HEADER)
+
+
+def normalized_rows(reader, columns):
+    """(name, phone, email, group, favorite, birthday) tuples from csv ``reader`` rows, in CSV_HEADER order."""
+    width = max(column for column in columns if column is not None) + 1
+    # Missing columns read the empty string appended to every row.
+    name, phone, email, group, favorite, birthday = (-1 if column is None else column for column in columns)
+    for row in reader:
+        if len(row) < width:
+            row += [""] * (width - len(row))
+        row.append("")
+        contact_name = row[name].strip()
+        if not contact_name:
+            continue  # Blank line or a row with no name.
+        yield (contact_name, row[phone].strip(), row[email].strip(), row[group].strip() or None,
+               row[favorite].strip().lower() in TRUE_VALUES, row[birthday].strip() or None)
+
+
+def _sort_key(row):
+    return row[0].lower()
+
+
+def _spill(run, spill):
+    """Write a sorted run to the temporary file ``spill`` and return an iterator that streams it back."""
+    for start in range(0, len(run), SPILL_BLOCK_SIZE):
+        pickle.dump(run[start:start + SPILL_BLOCK_SIZE], spill, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def read_back():
+        spill.seek(0)
+        try:
+            while True:
+                yield from pickle.load(spill)
+        except EOFError:
+            spill.close()
+    return read_back()
+
+
+def read_contacts_csv_files(file_names, presorted=(), run_size=DEFAULT_RUN_SIZE, progress=None):
+    """Yield unlinked ContactNodes from every file in ``file_names``, merged into name order.
+
+    ``presorted`` names the files already sorted by name.  Equal names keep
+    file order, then row order.  ``progress(rows, bytes_read, total_bytes)`` is
+    called after every ``run_size`` rows read while sorting.  Every file and
+    spilled run is closed when the merge ends, fails or is abandoned.
+    """
+    presorted = set(presorted)
+    total = sum(os.path.getsize(file_name) for file_name in file_names)
+    done = rows_read = held = 0
+    runs = []
+    with ExitStack() as stack:
+        for file_name in file_names:
+            raw = stack.enter_context(open(file_name, mode='rb'))
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+            rows = normalized_rows(reader, header_columns(next(reader, [])))
+            if file_name in presorted:
+                runs.append(rows)
+                continue
+            while True:
+                run = list(islice(rows, run_size))
+                if not run:
+                    break
+                run.sort(key=_sort_key)
+                rows_read += len(run)
+                if held + len(run) <= run_size:
+                    held += len(run)
+                    runs.append(run)
+                else:
+                    runs.append(_spill(run, stack.enter_context(tempfile.TemporaryFile())))
+                if progress:
+                    progress(rows_read, done + raw.tell(), total)
+            raw.close()
+            done += os.path.getsize(file_name)
+        for row in heapq.merge(*runs, key=_sort_key):
+            yield ContactNode(*row)
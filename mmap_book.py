@@ -0,0 +1,181 @@
+"""Read-only, memory-mapped contact files searchable by binary search.
+
+A sorted contact file is laid out as::
+
+    header   magic b"CBK1", version, contact count, offset of the entry table
+    heap     for each contact: lowercased UTF-8 name (the search key), then the
+             record: name, phone, email, group, favorite, birthday joined by \\x1f
+    table    one fixed 16-byte entry per contact, in key order:
+             heap offset (u64), key length (u32), record length (u32)
+
+``MappedContactBook`` maps the file and binary-searches the table in place:
+a lookup touches O(log n) entries and keys plus one record, and nothing is
+parsed at open time.  Every process that maps the same file shares one copy
+of it in the page cache.
+
+Usage: ``python mmap_book.py contacts.cbk "Some Name" ...``
+"""
+import argparse
+import mmap
+import os
+import struct
+
+from main import ContactRecord
+
+MAGIC = b"CBK1"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ")
+ENTRY = struct.Struct("<QII")
+FIELD_SEPARATOR = "\x1f"
+# Heap bytes buffered before each write while exporting.
+WRITE_CHUNK_SIZE = 1 << 20
+
+
+def pack_record(contact):
+    """UTF-8 bytes of a contact's fields joined by FIELD_SEPARATOR (empty for None).
+
+    Raises ValueError if a field itself contains FIELD_SEPARATOR, which could not be read back.
+    """
+    fields = (contact.name, contact.phone or "", contact.email or "", contact.group or "",
+              "1" if contact.favorite else "", contact.birthday or "")
+    text = FIELD_SEPARATOR.join(fields)
+    if text.count(FIELD_SEPARATOR) != len(fields) - 1:
+        raise ValueError(f"contact {contact.name!r} contains the field separator {FIELD_SEPARATOR!r}")
+    return text.encode("utf-8")
+
+
+def unpack_record(data):
+    fields = bytes(data).decode("utf-8").split(FIELD_SEPARATOR)
+    if len(fields) != 6:
+        raise ValueError(f"corrupt contact record: {len(fields)} fields")
+    name, phone, email, group, favorite, birthday = fields
+    return ContactRecord(name, phone, email, group or None, favorite == "1", birthday or None)
+
+
+def write_sorted_file(contacts, file_name):
+    """Write ``contacts`` (nodes with name, phone, email, group, favorite, birthday) as a sorted file.
+
+    ``contacts`` must already be in lowercased-name order, as ``ContactBookBST.in_order``
+    yields them; UTF-8 byte order matches that string order.  The file is written
+    next to ``file_name`` and renamed over it, so processes that still have the
+    old file mapped keep reading a consistent copy.  Returns the contact count; a
+    contact ``pack_record`` rejects raises ValueError and leaves ``file_name`` as it was.
+    """
+    temporary_name = file_name + ".tmp"
+    try:
+        count = _write_entries(contacts, temporary_name)
+    except BaseException:
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
+        raise
+    os.replace(temporary_name, file_name)
+    return count
+
+
+def _write_entries(contacts, file_name):
+    table = bytearray()
+    count = 0
+    with open(file_name, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        offset = HEADER.size
+        chunk = bytearray()
+        for contact in contacts:
+            key = contact.name.lower().encode("utf-8")
+            record = pack_record(contact)
+            table += ENTRY.pack(offset, len(key), len(record))
+            chunk += key
+            chunk += record
+            offset += len(key) + len(record)
+            count += 1
+            if len(chunk) >= WRITE_CHUNK_SIZE:
+                file.write(chunk)
+                chunk.clear()
+        file.write(chunk)
+        file.write(table)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, count, offset))
+    return count
+
+
+class MappedContactBook:
+    """Name lookups straight from a sorted contact file; the contacts are never loaded."""
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.table_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{file_name} is not a version {VERSION} sorted contact file")
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.map.close()
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self.map, self.table_offset + i * ENTRY.size)
+
+    def _key(self, i):
+        offset, key_length, _ = self._entry(i)
+        return self.map[offset:offset + key_length]
+
+    def _record(self, i):
+        offset, key_length, record_length = self._entry(i)
+        start = offset + key_length
+        return unpack_record(self.map[start:start + record_length])
+
+    def _lower_bound(self, key):
+        """Index of the first entry whose key is >= ``key`` (bytes)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_contact(self, name):
+        """The contact named ``name`` (case-insensitive), or None, in O(log n) entry reads."""
+        key = name.lower().encode("utf-8")
+        i = self._lower_bound(key)
+        if i < self.count and self._key(i) == key:
+            return self._record(i)
+        return None
+
+    def prefix_search(self, prefix, limit=20):
+        """Contacts whose name starts with ``prefix`` (case-insensitive), in O(log n + k)."""
+        key = prefix.lower().encode("utf-8")
+        matches = []
+        i = self._lower_bound(key)
+        while i < self.count and len(matches) < limit and self._key(i).startswith(key):
+            matches.append(self._record(i))
+            i += 1
+        return matches
+
+    def list_contacts(self):
+        return [f"{contact.name}: {contact.phone}, {contact.email}"
+                for contact in map(self._record, range(self.count))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look contacts up in a sorted contact file.")
+    parser.add_argument("file", help="file written by write_sorted_file (Export Contacts as .cbk)")
+    parser.add_argument("names", nargs="+")
+    args = parser.parse_args()
+    with MappedContactBook(args.file) as book:
+        for name in args.names:
+            contact = book.find_contact(name)
+            print(f"{contact.name}: {contact.phone}, {contact.email}" if contact else f"{name}: not found")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,27 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import csv
-from datetime import datetime, timedelta
+from datetime import date
+
+from main import days_until_birthday, parse_birthday
+
 
 class Contact:
+    __slots__ = ('name', 'phone', 'email', 'group', 'birthday', 'birthday_date', 'favorite')
+
     def __init__(self, name, phone, email, group=None, birthday=None, favorite=False):
         self.name = name
         self.phone = phone
         self.email = email
         self.group = group
         self.birthday = birthday
+        self.birthday_date = parse_birthday(birthday)
         self.favorite = favorite
 
 
 class Node:
+    __slots__ = ('contact', 'left', 'right')
+
     def __init__(self, contact):
         self.contact = contact
         self.left = None
@@ -24,6 +32,23 @@ class BinarySearchTree:
     def __init__(self):
         self.root = None
         self.deleted_contact = None
+        self.phone_index = {}
+        self.email_index = {}
+
+    def _index(self, contact):
+        if contact.phone:
+            self.phone_index.setdefault("".join(ch for ch in contact.phone if ch.isdigit()), []).append(contact)
+        if contact.email:
+            self.email_index.setdefault(contact.email.strip().lower(), []).append(contact)
+
+    def _unindex(self, contact):
+        for index, key in ((self.phone_index, "".join(ch for ch in contact.phone or "" if ch.isdigit())),
+                           (self.email_index, (contact.email or "").strip().lower())):
+            contacts = index.get(key)
+            if contacts and contact in contacts:
+                contacts.remove(contact)
+                if not contacts:
+                    del index[key]
 
     def add_contact(self, name, phone, email, group, birthday):
         new_contact = Contact(name, phone, email, group, birthday)
@@ -31,50 +56,74 @@ class BinarySearchTree:
             self.root = Node(new_contact)
         else:
             self._insert(self.root, new_contact)
+        self._index(new_contact)
 
     def _insert(self, node, new_contact):
-        if new_contact.name < node.contact.name:
-            if node.left is None:
-                node.left = Node(new_contact)
+        while True:
+            if new_contact.name < node.contact.name:
+                if node.left is None:
+                    node.left = Node(new_contact)
+                    return
+                node = node.left
             else:
-                self._insert(node.left, new_contact)
-        else:
-            if node.right is None:
-                node.right = Node(new_contact)
-            else:
-                self._insert(node.right, new_contact)
+                if node.right is None:
+                    node.right = Node(new_contact)
+                    return
+                node = node.right
+
+    def _in_order(self, node):
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
 
     def find_contact(self, query):
         return self._find(self.root, query)
 
     def _find(self, node, query):
-        if node is None:
-            return None
-        if query in (node.contact.name, node.contact.phone, node.contact.email):
-            return node.contact
-        left_result = self._find(node.left, query)
-        return left_result if left_result else self._find(node.right, query)
+        while node is not None:
+            if node.contact.name == query:
+                return node.contact
+            node = node.left if query < node.contact.name else node.right
+        if "@" in query:
+            contacts = self.email_index.get(query.strip().lower())
+        else:
+            contacts = self.phone_index.get("".join(ch for ch in query if ch.isdigit()))
+        return contacts[0] if contacts else None
 
     def delete_contact(self, name):
         self.deleted_contact = self.find_contact(name)
         if self.deleted_contact:
-            self.root = self._delete(self.root, name)
+            self.root = self._delete(self.root, self.deleted_contact.name)
+            self._unindex(self.deleted_contact)
 
     def _delete(self, node, name):
-        if node is None:
+        parent = None
+        current = node
+        while current is not None and current.contact.name != name:
+            parent = current
+            current = current.left if name < current.contact.name else current.right
+        if current is None:
             return node
-        if name < node.contact.name:
-            node.left = self._delete(node.left, name)
-        elif name > node.contact.name:
-            node.right = self._delete(node.right, name)
+        if current.left is not None and current.right is not None:
+            parent = current
+            temp = current.right
+            while temp.left is not None:
+                parent = temp
+                temp = temp.left
+            current.contact = temp.contact
+            current = temp
+        child = current.left or current.right
+        if parent is None:
+            return child
+        if parent.left is current:
+            parent.left = child
         else:
-            if node.left is None:
-                return node.right
-            elif node.right is None:
-                return node.left
-            temp = self._min_value_node(node.right)
-            node.contact = temp.contact
-            node.right = self._delete(node.right, temp.contact.name)
+            parent.right = child
         return node
 
     def _min_value_node(self, node):
@@ -86,10 +135,12 @@ class BinarySearchTree:
     def update_contact(self, name, new_phone=None, new_email=None):
         contact = self.find_contact(name)
         if contact:
+            self._unindex(contact)
             if new_phone:
                 contact.phone = new_phone
             if new_email:
                 contact.email = new_email
+            self._index(contact)
 
     def toggle_favorite(self, name):
         contact = self.find_contact(name)
@@ -97,27 +148,25 @@ class BinarySearchTree:
             contact.favorite = not contact.favorite
 
     def list_contacts(self, node, contacts):
-        if node:
-            self.list_contacts(node.left, contacts)
-            contacts.append(f"{node.contact.name} - {node.contact.phone} - {node.contact.email}")
-            self.list_contacts(node.right, contacts)
+        for current in self._in_order(node):
+            contacts.append(f"{current.contact.name} - {current.contact.phone} - {current.contact.email}")
         return contacts
 
     def list_favorite_contacts(self, node, favorites):
-        if node:
-            self.list_favorite_contacts(node.left, favorites)
-            if node.contact.favorite:
-                favorites.append(f"{node.contact.name} - {node.contact.phone} - {node.contact.email}")
-            self.list_favorite_contacts(node.right, favorites)
+        for current in self._in_order(node):
+            if current.contact.favorite:
+                favorites.append(f"{current.contact.name} - {current.contact.phone} - {current.contact.email}")
         return favorites
 
     def export_contacts_to_csv(self, file_name):
-        contacts = self.list_contacts(self.root, [])
-        with open(file_name, mode='w', newline='') as file:
+        # Write straight from the tree; splitting formatted list lines on " - "
+        # broke names containing a hyphen and dropped group and birthday.
+        with open(file_name, mode='w', newline='', buffering=1 << 20) as file:
             writer = csv.writer(file)
             writer.writerow(["Name", "Phone", "Email", "Group", "Birthday"])
-            for contact in contacts:
-                writer.writerow(contact.split(" - "))
+            writer.writerows((node.contact.name, node.contact.phone, node.contact.email,
+                              node.contact.group, node.contact.birthday)
+                             for node in self._in_order(self.root))
 
     def import_contacts_from_csv(self, file_name):
         with open(file_name, mode='r') as file:
@@ -126,16 +175,11 @@ class BinarySearchTree:
                 self.add_contact(row['Name'], row['Phone'], row['Email'], row.get('Group', ''), row.get('Birthday', ''))
 
     def list_upcoming_birthdays(self, node, birthdays, days_ahead):
-        today = datetime.now()
-        upcoming_date = today + timedelta(days=days_ahead)
-        if node:
-            self.list_upcoming_birthdays(node.left, birthdays, days_ahead)
-            if node.contact.birthday:
-                birthday_date = datetime.strptime(node.contact.birthday, "%Y-%m-%d")
-                birthday_this_year = birthday_date.replace(year=today.year)
-                if today <= birthday_this_year <= upcoming_date:
-                    birthdays.append(f"{node.contact.name} - {birthday_date.strftime('%Y-%m-%d')}")
-            self.list_upcoming_birthdays(node.right, birthdays, days_ahead)
+        today = date.today()
+        for current in self._in_order(node):
+            birthday_date = current.contact.birthday_date
+            if birthday_date and days_until_birthday(birthday_date, today) <= days_ahead:
+                birthdays.append(f"{current.contact.name} - {birthday_date.strftime('%Y-%m-%d')}")
         return birthdays
 
     def undo_delete(self):
@@ -1,5 +1,25 @@
 import csv
-from datetime import datetime, timedelta
+import string
+from datetime import date, datetime
+
+
+def parse_birthday(birthday):
+    try:
+        return datetime.strptime(birthday, '%Y-%m-%d').date() if birthday else None
+    except ValueError:
+        return None
+
+
+def days_until_birthday(birth_date, today):
+    """Days from ``today`` to the next ``birth_date`` anniversary (Feb 29 falls on Mar 1 in common years)."""
+    for year in (today.year, today.year + 1):
+        try:
+            upcoming = birth_date.replace(year=year)
+        except ValueError:
+            upcoming = date(year, 3, 1)
+        if upcoming >= today:
+            return (upcoming - today).days
+
 
 class ContactNode:
     def __init__(self, name, phone, email, group=None, favorite=False, birthday=None):
@@ -9,11 +29,25 @@ class ContactNode:
         self.group = group
         self.favorite = favorite
         self.birthday = birthday
+        self.birthday_date = parse_birthday(birthday)
         self.left = None
         self.right = None
+        self.height = 1
+        # Number of nodes in this subtree, for rank/select.
+        self.size = 1
+
+
+def size(node):
+    return node.size if node is not None else 0
+
+
+def height(node):
+    return node.height if node is not None else 0
 
 
 class ContactBookBST:
+    PAGE_SIZE = 20
+
     def __init__(self):
         self.root = None
         self.last_deleted_contact = None
@@ -21,32 +55,143 @@ class ContactBookBST:
     def insert(self, root, node):
         if root is None:
             return node
-        if node.name.lower() < root.name.lower():
-            root.left = self.insert(root.left, node)
+        key = node.name.lower()
+        path = []
+        current = root
+        while current is not None:
+            path.append(current)
+            current = current.left if key < current.name.lower() else current.right
+        parent = path[-1]
+        if key < parent.name.lower():
+            parent.left = node
         else:
-            root.right = self.insert(root.right, node)
-        return root
+            parent.right = node
+        return self._rebalance_path(path)
+
+    def _update(self, node):
+        node.height = 1 + max(height(node.left), height(node.right))
+        node.size = 1 + size(node.left) + size(node.right)
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rebalance(self, node):
+        self._update(node)
+        balance = height(node.left) - height(node.right)
+        if balance > 1:
+            if height(node.left.left) < height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if height(node.right.right) < height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def _rebalance_path(self, path):
+        """Rebalance (and refresh the sizes of) the ancestors in ``path``, deepest first; returns the root."""
+        for i in range(len(path) - 1, 0, -1):
+            node = path[i]
+            parent = path[i - 1]
+            if parent.left is node:
+                parent.left = self._rebalance(node)
+            else:
+                parent.right = self._rebalance(node)
+        return self._rebalance(path[0])
 
     def add_contact(self, name, phone, email, group=None, birthday=None):
         new_contact = ContactNode(name, phone, email, group, birthday=birthday)
-        if self.root is None:
-            self.root = new_contact
-        else:
-            self.insert(self.root, new_contact)
+        self.root = self.insert(self.root, new_contact)
         print(f"Contact '{name}' added successfully!")
 
     def search(self, root, query):
-        if root is None:
-            return None
-        if query.lower() in [root.name.lower(), root.email.lower(), root.phone]:
-            return root
-        if query.lower() < root.name.lower():
-            return self.search(root.left, query)
-        return self.search(root.right, query)
+        query = query.lower()
+        current = root
+        while current is not None:
+            if query in (current.name.lower(), current.email.lower(), current.phone):
+                return current
+            current = current.left if query < current.name.lower() else current.right
+        return None
+
+    def in_order(self, root):
+        """Yield the nodes under ``root`` in name order using an explicit stack."""
+        stack = []
+        current = root
+        while stack or current is not None:
+            while current is not None:
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            yield current
+            current = current.right
 
     def find_contact(self, name):
         return self.search(self.root, name)
 
+    def select(self, i):
+        """The contact at position ``i`` (0-based) in name order."""
+        if not 0 <= i < size(self.root):
+            raise IndexError(i)
+        current = self.root
+        while True:
+            left = size(current.left)
+            if i < left:
+                current = current.left
+            elif i == left:
+                return current
+            else:
+                i -= left + 1
+                current = current.right
+
+    def rank(self, name):
+        """How many contacts sort before ``name``, i.e. where it is or would be listed."""
+        key = name.lower()
+        count = 0
+        current = self.root
+        while current is not None:
+            if current.name.lower() < key:
+                count += size(current.left) + 1
+                current = current.right
+            else:
+                current = current.left
+        return count
+
+    def iter_from(self, i):
+        """Yield the nodes from position ``i`` on, without walking the ones before it."""
+        stack = []
+        current = self.root
+        while current is not None:
+            left = size(current.left)
+            if i < left:
+                stack.append(current)
+                current = current.left
+            elif i == left:
+                stack.append(current)
+                break
+            else:
+                i -= left + 1
+                current = current.right
+        while stack:
+            node = stack.pop()
+            yield node
+            current = node.right
+            while current is not None:
+                stack.append(current)
+                current = current.left
+
     def update_contact(self, name):
         contact = self.find_contact(name)
         if contact:
@@ -73,35 +218,48 @@ class ContactBookBST:
             print(f"Contact '{name}' not found.")
 
     def list_favorite_contacts(self):
-        def favorite_filter(root):
-            if root:
-                favorite_filter(root.left)
-                if root.favorite:
-                    print(f"{root.name}: {root.phone}, {root.email}")
-                favorite_filter(root.right)
         print("Favorite Contacts:")
-        favorite_filter(self.root)
+        for node in self.in_order(self.root):
+            if node.favorite:
+                print(f"{node.name}: {node.phone}, {node.email}")
 
     def delete_contact_util(self, root, name):
-        if root is None:
+        key = name.lower()
+        path = []
+        current = root
+        while current is not None and current.name.lower() != key:
+            path.append(current)
+            current = current.left if key < current.name.lower() else current.right
+        if current is None:
             return root
-        if name.lower() < root.name.lower():
-            root.left = self.delete_contact_util(root.left, name)
-        elif name.lower() > root.name.lower():
-            root.right = self.delete_contact_util(root.right, name)
-        else:
-            if root.left is None:
-                return root.right
-            elif root.right is None:
-                return root.left
 
-            temp_val = self.min_value_node(root.right)
-            root.name = temp_val.name
-            root.phone = temp_val.phone
-            root.email = temp_val.email
-            root.right = self.delete_contact_util(root.right, temp_val.name)
+        if current.left is not None and current.right is not None:
+            # Splice out the in-order successor and move it into the target's place.
+            chain = []
+            successor = current.right
+            while successor.left is not None:
+                chain.append(successor)
+                successor = successor.left
+            if chain:
+                chain[-1].left = successor.right
+                successor.right = current.right
+            successor.left = current.left
+            replacement = successor
+            below = [successor] + chain
+        else:
+            replacement = current.left or current.right
+            below = []
 
-        return root
+        if path:
+            parent = path[-1]
+            if parent.left is current:
+                parent.left = replacement
+            else:
+                parent.right = replacement
+        path.extend(below)
+        if not path:
+            return replacement
+        return self._rebalance_path(path)
 
     def min_value_node(self, node):
         current = node
@@ -129,48 +287,57 @@ class ContactBookBST:
             print("No contact to undo delete.")
 
     def in_order_traversal(self, root):
-        if root:
-            self.in_order_traversal(root.left)
-            print(f"{root.name}: {root.phone}, {root.email}")
-            self.in_order_traversal(root.right)
+        for node in self.in_order(root):
+            print(f"{node.name}: {node.phone}, {node.email}")
 
     def list_contacts(self):
-        print("All Contacts:")
-        self.in_order_traversal(self.root)
+        """Page through the contacts; each page or letter jump costs O(height), not a walk from the start."""
+        total = size(self.root)
+        if not total:
+            print("No contacts found.")
+            return
+        pages = -(-total // self.PAGE_SIZE)
+        first = 0
+        while True:
+            print(f"All Contacts (page {first // self.PAGE_SIZE + 1} of {pages}, {total} contacts):")
+            for _, node in zip(range(self.PAGE_SIZE), self.iter_from(first)):
+                print(f"{node.name}: {node.phone}, {node.email}")
+            choice = input("n = next, p = previous, page number or letter to jump, Enter to stop: ").strip().lower()
+            if not choice:
+                return
+            if choice == 'n':
+                first = min(first + self.PAGE_SIZE, (pages - 1) * self.PAGE_SIZE)
+            elif choice == 'p':
+                first = max(first - self.PAGE_SIZE, 0)
+            elif choice.isdigit():
+                first = (min(max(int(choice), 1), pages) - 1) * self.PAGE_SIZE
+            elif len(choice) == 1 and choice in string.ascii_lowercase:
+                first = min(self.rank(choice), total - 1)
+            else:
+                print("Invalid choice.")
 
     def list_upcoming_birthdays(self, days_ahead=7):
-        upcoming_date = datetime.now() + timedelta(days=days_ahead)
-
-        def birthday_filter(root):
-            if root:
-                birthday_filter(root.left)
-                if root.birthday:
-                    birth_date = datetime.strptime(root.birthday, '%Y-%m-%d')
-                    if birth_date <= upcoming_date:
-                        print(f"{root.name} has a birthday on {root.birthday}")
-                birthday_filter(root.right)
-
-        birthday_filter(self.root)
+        today = date.today()
+        for node in self.in_order(self.root):
+            if node.birthday_date and days_until_birthday(node.birthday_date, today) <= days_ahead:
+                print(f"{node.name} has a birthday on {node.birthday}")
 
     def export_contacts_to_csv(self, file_name='contacts.csv'):
         with open(file_name, mode='w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(['Name', 'Phone', 'Email', 'Group', 'Favorite', 'Birthday'])
-            def write_node(root):
-                if root:
-                    write_node(root.left)
-                    writer.writerow([root.name, root.phone, root.email, root.group,
-                                     root.favorite, root.birthday])
-                    write_node(root.right)
-            write_node(self.root)
+            writer.writerows([node.name, node.phone, node.email, node.group,
+                              node.favorite, node.birthday]
+                             for node in self.in_order(self.root))
         print(f"Contacts exported to {file_name}")
 
     def import_contacts_from_csv(self, file_name='contacts.csv'):
         with open(file_name, mode='r') as file:
             reader = csv.DictReader(file)
             for row in reader:
-                self.add_contact(row['Name'], row['Phone'], row['Email'], row['Group'],
-                                 birthday=row['Birthday'])
+                # app.py's exports have no Group column.
+                self.add_contact(row['Name'], row['Phone'], row['Email'], row.get('Group'),
+                                 birthday=row.get('Birthday'))
         print(f"Contacts imported from {file_name}")
 
 
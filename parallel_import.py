@@ -0,0 +1,137 @@
+"""Parallel CSV parsing for very large imports.
+
+``read_contacts_csv_parallel`` splits the file into byte ranges that end on
+record boundaries, parses the ranges in a process pool and returns the
+contacts as unlinked ContactNodes, ready for ``bulk_load``:
+
+* the parent finds the boundaries with one ``bytes.count`` pass for quote
+  characters, so a newline inside a quoted field never splits a record
+  (the file is UTF-8, where those bytes only ever stand for themselves);
+* each worker reads its own range from the file, parses it with the csv
+  module and sorts its rows by lowercased name;
+* a worker returns its run as one list per column, which pickles and
+  unpickles 1.5-2x faster than a list of row tuples;
+* the parent turns the runs into nodes in range order.  ``bulk_load``'s
+  sort then finds them already in sorted runs and only merges them.
+
+Workers are started with the ``spawn`` method.  Forking the GUI or the
+server would copy their threads' locks in whatever state they happen to
+be, so it is not safe.  Startup is about 0.1-0.3 s per worker; below a few
+megabytes ``read_contacts_csv`` is faster.
+"""
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from main import ContactNode
+
+# Ranges handed to each worker, so a slow range does not leave the others idle.
+RANGES_PER_WORKER = 4
+# Bytes read at a time while counting quote characters.
+SCAN_BLOCK_SIZE = 1 << 24
+
+
+def _header(file_name):
+    """The column names and the offset of the first data row."""
+    with open(file_name, mode='rb') as raw:
+        header_line = raw.readline()
+        start = raw.tell()
+    fieldnames = next(csv.reader(io.TextIOWrapper(io.BytesIO(header_line), encoding='utf-8-sig', newline='')), [])
+    return fieldnames, start
+
+
+def split_csv(file_name, parts, start=0):
+    """Byte ranges from ``start`` to the end of ``file_name``, about ``parts`` of them, split only between records.
+
+    A newline ends a record only when an even number of quote characters
+    precede it (csv doubles quotes inside quoted fields, so the count stays
+    even outside them).
+    """
+    size = os.path.getsize(file_name)
+    targets = [start + (size - start) * i // parts for i in range(1, parts)]
+    bounds = [start]
+    quotes = 0
+    position = start
+    with open(file_name, mode='rb') as raw:
+        raw.seek(start)
+        for target in targets:
+            if target <= bounds[-1]:
+                continue
+            while position < target:
+                block = raw.read(min(SCAN_BLOCK_SIZE, target - position))
+                quotes += block.count(b'"')
+                position += len(block)
+            boundary = None
+            while boundary is None:
+                block = raw.read(SCAN_BLOCK_SIZE)
+                if not block:
+                    boundary = size
+                    break
+                newline = block.find(b'\n')
+                while newline != -1:
+                    if (quotes + block.count(b'"', 0, newline)) % 2 == 0:
+                        boundary = position + newline + 1
+                        break
+                    newline = block.find(b'\n', newline + 1)
+                if boundary is None:
+                    quotes += block.count(b'"')
+                    position += len(block)
+                else:
+                    quotes += block.count(b'"', 0, newline + 1)
+                    position = boundary
+                    raw.seek(position)
+            bounds.append(boundary)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return [(low, high) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+
+def parse_range(file_name, start, end, fieldnames):
+    """Parse one byte range into a run sorted by lowercased name, as a tuple of column lists."""
+    with open(file_name, mode='rb') as raw:
+        raw.seek(start)
+        data = raw.read(end - start)
+    reader = csv.DictReader(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', newline=''), fieldnames)
+    rows = [(row['Name'], row['Phone'], row['Email'], row.get('Group'), row.get('Favorite') == 'True',
+             row.get('Birthday'))
+            for row in reader]
+    rows.sort(key=lambda row: row[0].lower())
+    return tuple(map(list, zip(*rows))) if rows else ()
+
+
+def read_contacts_csv_parallel(file_name, workers=None, progress=None):
+    """Parse a contacts CSV file with ``workers`` processes (default: one per CPU) into unlinked ContactNodes.
+
+    The nodes come back as sorted runs, one per range, rather than in file
+    order.  ``progress(rows, bytes_read, total_bytes)`` is called as each
+    range finishes; if it raises, the ranges not yet started are cancelled.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = os.path.getsize(file_name)
+    fieldnames, start = _header(file_name)
+    ranges = split_csv(file_name, workers * RANGES_PER_WORKER, start)
+    runs = [()] * len(ranges)
+    rows = 0
+    done = start
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(parse_range, file_name, low, high, fieldnames): i
+                   for i, (low, high) in enumerate(ranges)}
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                runs[i] = future.result()
+                rows += len(runs[i][0]) if runs[i] else 0
+                done += ranges[i][1] - ranges[i][0]
+                if progress:
+                    progress(rows, done, total)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    nodes = []
+    for i, run in enumerate(runs):
+        if run:
+            nodes.extend(map(ContactNode, *run))
+        runs[i] = None
+    return nodes
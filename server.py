@@ -0,0 +1,321 @@
+"""Local HTTP/JSON API over a contact book, for other tools on this machine.
+
+Endpoints (request and response bodies are JSON; contacts are objects with
+name, phone, email, group, favorite and birthday):
+
+``GET /contacts?offset=0&limit=50``
+    a page of contacts in name order, plus the total count
+``GET /contacts/<name>``
+    one contact by name, phone or email (404 when missing)
+``POST /contacts``
+    add ``{"name", "phone", "email", "group"?, "birthday"?}``
+``PATCH /contacts/<name>``
+    update ``{"phone"?, "email"?}``
+``DELETE /contacts/<name>``, ``POST /contacts/<name>/favorite``
+    delete / toggle favorite
+``GET /search?prefix=jo&limit=20``, ``GET /birthdays?days=7``
+    prefix search and upcoming birthdays
+``POST /batch``
+    ``{"operations": [{"op": "find", "name": "..."}, ...]}`` runs many of the
+    operations above (op names as in OPERATIONS) in one request and returns
+    one ``{"status", "result"}`` per operation, in order
+``POST /import``, ``POST /export``
+    ``{"file": path}``; run in a worker thread, so other requests keep being served
+
+Connections are HTTP/1.1 keep-alive, and requests pipelined on one connection
+are answered in order.  The server binds to 127.0.0.1 only.  The book is
+wrapped in ConcurrentContactBook, so an import or export running in its thread
+never overlaps a write from another request.  Every other operation also runs
+on a thread (one of REQUEST_THREADS): a request waiting for the book's lock
+holds up only itself, never the event loop and the other connections.
+
+Usage: ``python server.py [--port 8765] [--engine tree] [--data-dir DIR | --in-memory]``
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from concurrent_book import ConcurrentContactBook
+from main import ENGINES, open_contact_book
+from storage import BookInUseError
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Requests with a larger body are refused before it is read.
+MAX_BODY_SIZE = 16 << 20
+# Threads running book operations, apart from the ones running imports and exports.
+REQUEST_THREADS = 4
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def contact_json(contact):
+    return {"name": contact.name, "phone": contact.phone, "email": contact.email, "group": contact.group,
+            "favorite": bool(contact.favorite), "birthday": contact.birthday}
+
+
+def required(params, key):
+    value = params.get(key)
+    if not value or not isinstance(value, str):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'{key}' is required")
+    return value
+
+
+def integer(params, key, default, low=0, high=None):
+    try:
+        value = int(params.get(key, default))
+    except (TypeError, ValueError):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'{key}' must be an integer") from None
+    if value < low or (high is not None and value > high):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'{key}' must be between {low} and {high or 'any'}")
+    return value
+
+
+class ContactServer:
+    # Operations that may appear in /batch; import and export are left out because they block.
+    OPERATIONS = ("find", "search", "add", "update", "delete", "favorite", "list", "birthdays")
+
+    def __init__(self, book):
+        self.book = book
+        self.server = None
+        self.executor = ThreadPoolExecutor(REQUEST_THREADS, thread_name_prefix="contact-request")
+
+    async def start(self, port=DEFAULT_PORT):
+        """Listen on HOST:``port`` (0 picks a free port) and return the bound port."""
+        self.server = await asyncio.start_server(self._serve, HOST, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown()
+
+    # -- operations -----------------------------------------------------------
+
+    def _found(self, contact, name):
+        if contact is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Contact '{name}' not found.")
+        return contact_json(contact)
+
+    def find(self, params):
+        name = required(params, "name")
+        return HTTPStatus.OK, self._found(self.book.find_contact(name), name)
+
+    def search(self, params):
+        contacts = self.book.prefix_search(params.get("prefix", ""),
+                                           integer(params, "limit", 20, 1, MAX_PAGE_SIZE))
+        return HTTPStatus.OK, [contact_json(contact) for contact in contacts]
+
+    def add(self, params):
+        contact = self.book.add_contact(required(params, "name"), params.get("phone"), params.get("email"),
+                                        params.get("group"), params.get("birthday"))
+        return HTTPStatus.CREATED, contact_json(contact)
+
+    def update(self, params):
+        name = required(params, "name")
+        return HTTPStatus.OK, self._found(self.book.update_contact(name, params.get("phone"), params.get("email")),
+                                          name)
+
+    def delete(self, params):
+        name = required(params, "name")
+        return HTTPStatus.OK, self._found(self.book.delete_contact(name), name)
+
+    def favorite(self, params):
+        name = required(params, "name")
+        return HTTPStatus.OK, self._found(self.book.toggle_favorite(name), name)
+
+    def list(self, params):
+        offset = integer(params, "offset", 0)
+        limit = integer(params, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        contacts = self.book.contacts_page(offset, limit)
+        return HTTPStatus.OK, {"offset": offset, "total": len(self.book),
+                               "contacts": [contact_json(contact) for contact in contacts]}
+
+    def birthdays(self, params):
+        return HTTPStatus.OK, self.book.list_upcoming_birthdays(integer(params, "days", 7, 0, 366))
+
+    def batch(self, params):
+        operations = params.get("operations")
+        if not isinstance(operations, list):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'operations' must be a list")
+        results = []
+        for operation in operations:
+            op = operation.get("op") if isinstance(operation, dict) else None
+            if op not in self.OPERATIONS:
+                results.append({"status": HTTPStatus.BAD_REQUEST, "result": {"error": f"unknown op {op!r}"}})
+                continue
+            status, result = self._call(getattr(self, op), operation)
+            results.append({"status": status, "result": result})
+        return HTTPStatus.OK, {"results": results}
+
+    async def import_file(self, params):
+        file_name = required(params, "file")
+        count, timings = await asyncio.get_running_loop().run_in_executor(
+            None, self.book.import_contacts_from_csv, file_name)
+        return HTTPStatus.OK, {"imported": count, "timings": timings}
+
+    async def export_file(self, params):
+        file_name = required(params, "file")
+        written = await asyncio.get_running_loop().run_in_executor(
+            None, self.book.export_contacts_to_csv, file_name)
+        return HTTPStatus.OK, {"exported": written}
+
+    def _call(self, operation, params):
+        try:
+            return operation(params)
+        except RequestError as error:
+            return error.status, {"error": str(error)}
+
+    # -- HTTP -----------------------------------------------------------------
+
+    def _route(self, method, path):
+        """(operation, path parameters) for a request, or a RequestError."""
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts[0] == "contacts" and len(parts) == 1:
+            routes = {"GET": self.list, "POST": self.add}
+        elif parts[0] == "contacts" and len(parts) == 2:
+            routes = {"GET": self.find, "PATCH": self.update, "PUT": self.update, "DELETE": self.delete}
+        elif parts[0] == "contacts" and len(parts) == 3 and parts[2] == "favorite":
+            routes = {"POST": self.favorite}
+        elif len(parts) == 1 and parts[0] in ("search", "birthdays"):
+            routes = {"GET": getattr(self, parts[0])}
+        elif len(parts) == 1 and parts[0] in ("batch", "import", "export"):
+            routes = {"POST": {"batch": self.batch, "import": self.import_file, "export": self.export_file}[parts[0]]}
+        else:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no such endpoint: {path}")
+        if method not in routes:
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        return routes[method], ({"name": parts[1]} if len(parts) > 1 else {})
+
+    async def _respond(self, method, target, body):
+        url = urlsplit(target)
+        try:
+            operation, params = self._route(method, url.path)
+            params.update(parse_qsl(url.query))
+            if body:
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "body is not valid JSON") from None
+                if not isinstance(data, dict):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+                params.update(data)
+            if asyncio.iscoroutinefunction(operation):
+                return await operation(params)
+            # Off the event loop: the book's lock may be held by an import or export for seconds.
+            return await asyncio.get_running_loop().run_in_executor(self.executor, operation, params)
+        except RequestError as error:
+            return error.status, {"error": str(error)}
+        except OSError as error:
+            # Import and export report unreadable or unwritable files to the client.
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except Exception as error:
+            # One failing request must not take the connection (and its pipelined requests) down.
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(error).__name__}: {error}"}
+
+    async def _readline(self, reader, status):
+        """One line of the request head; a line over the reader's limit is answered with ``status``."""
+        try:
+            return await reader.readline()
+        except ValueError:
+            raise RequestError(status, "request line or header too long") from None
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await self._readline(reader, HTTPStatus.REQUEST_URI_TOO_LONG)
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await self._readline(reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be skipped without its length, so the connection ends here.
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._respond(method.upper(), target, body)
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except RequestError as error:
+            # The rest of an over-long line is still unread, so the connection ends here.
+            try:
+                await self._send(writer, error.status, {"error": str(error)}, False)
+            except ConnectionError:
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        status = HTTPStatus(status)
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
+        # Returns at once unless the client stops reading, so pipelined replies are not held up.
+        await writer.drain()
+
+
+async def serve(book, port=DEFAULT_PORT):
+    server = ContactServer(book)
+    port = await server.start(port)
+    print(f"Serving {len(book)} contacts on http://{HOST}:{port}/")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a contact book as a local JSON API.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-dir", default=os.path.join(os.path.expanduser("~"), ".contact_book"),
+                        help="where contacts are stored between sessions (default: ~/.contact_book)")
+    parser.add_argument("--in-memory", action="store_true", help="start empty and keep nothing on exit")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="tree")
+    args = parser.parse_args()
+    try:
+        book = ConcurrentContactBook(open_contact_book(args.engine, None if args.in_memory else args.data_dir,
+                                                       notify=False))
+    except BookInUseError as error:
+        parser.exit(1, f"{error}\n")
+    try:
+        asyncio.run(serve(book, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        book.close()
+
+
+if __name__ == "__main__":
+    main()
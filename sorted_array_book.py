@@ -0,0 +1,134 @@
+"""Sorted-array contact book: ContactBookBST with the tree swapped for bisect over flat lists.
+
+``SortedArrayContactBook`` keeps the lowercased names in one sorted list and
+the contacts in a parallel list, so a lookup is a ``bisect`` over contiguous
+memory and listing is a plain walk of a list, with no ``left``/``right``
+pointers to chase.  All secondary indexes, messages and CSV handling are
+inherited unchanged; only the primitives that touch the tree are overridden.
+
+Adds are buffered: they are queued unsorted and merged before the next read,
+with ``insort`` when only a few are waiting and one sort-and-merge when many
+are, so a burst of writes costs O(k log k + n) instead of k list shifts.
+"""
+import math
+import time
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from main import ContactBookBST
+
+
+class SortedArrayContactBook(ContactBookBST):
+    # Above this many queued adds, one merge beats shifting the lists once per add.
+    MAX_INSORT = 64
+
+    def __init__(self, notify=True, fuzzy_index=True):
+        super().__init__(notify=notify, fuzzy_index=fuzzy_index)
+        self.keys = []
+        self.nodes = []
+        # (lowercased name, node) pairs added since the last merge, in arrival order.
+        self.pending = []
+
+    def _merge(self):
+        """Fold queued adds into the sorted lists; equal names keep their arrival order."""
+        pending = self.pending
+        if not pending:
+            return
+        keys, nodes = self.keys, self.nodes
+        if len(pending) <= self.MAX_INSORT:
+            for key, node in pending:
+                i = bisect_right(keys, key)
+                keys.insert(i, key)
+                nodes.insert(i, node)
+        else:
+            keys.extend(key for key, _ in pending)
+            nodes.extend(node for _, node in pending)
+            # Stable: the existing run comes first, so ties stay in arrival order.
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self.keys = [keys[i] for i in order]
+            self.nodes = [nodes[i] for i in order]
+        pending.clear()
+
+    def settle(self):
+        super().settle()
+        self._merge()
+
+    def height(self):
+        """Most comparisons one binary search makes, for comparison with the tree height."""
+        return math.ceil(math.log2(self.size + 1))
+
+    def insert_node(self, node):
+        self.pending.append((node.name.lower(), node))
+        self._index_contact(node)
+        self.size += 1
+
+    def search(self, root, name):
+        self._merge()
+        key = name.lower()
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.nodes[i]
+        return None
+
+    def _detach(self, node):
+        self._merge()
+        key = node.name.lower()
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.nodes[i] is node:
+                del self.keys[i]
+                del self.nodes[i]
+                self.size -= 1
+                return True
+            i += 1
+        return False
+
+    def in_order(self, root=None):
+        """Every contact in name order (``root`` is accepted for ContactBookBST callers and ignored)."""
+        self._merge()
+        return iter(self.nodes)
+
+    def contacts_page(self, offset, limit):
+        self._merge()
+        return self.nodes[offset:offset + limit]
+
+    def iter_at(self, i):
+        self._merge()
+        return islice(self.nodes, i, None)
+
+    def select(self, i):
+        self._merge()
+        if not 0 <= i < len(self.nodes):
+            raise IndexError("contact position out of range")
+        return self.nodes[i]
+
+    def rank(self, name):
+        self._merge()
+        return bisect_left(self.keys, name.lower())
+
+    def iter_from(self, key):
+        self._merge()
+        return islice(self.nodes, bisect_left(self.keys, key), None)
+
+    def _link_many(self, new_nodes):
+        self.pending.extend((node.name.lower(), node) for node in new_nodes)
+        self.size += len(new_nodes)
+        start = time.perf_counter()
+        self._merge()
+        return {"sort": time.perf_counter() - start, "build": 0.0}
+
+    def _unlink_many(self, nodes):
+        self._merge()
+        gone = set(nodes)
+        kept = [i for i, node in enumerate(self.nodes) if node not in gone]
+        self.keys = [self.keys[i] for i in kept]
+        self.nodes = [self.nodes[i] for i in kept]
+        self.size = len(kept)
+
+    def check_invariants(self):
+        """Assert the lists are parallel, sorted and match ``size``; returns the contact count."""
+        self._merge()
+        assert len(self.keys) == len(self.nodes) == self.size, "lists and size counter disagree"
+        assert all(key == node.name.lower() for key, node in zip(self.keys, self.nodes)), "stale key"
+        assert all(a <= b for a, b in zip(self.keys, self.keys[1:])), "keys out of order"
+        return self.size
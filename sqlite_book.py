@@ -0,0 +1,261 @@
+"""SQLite-backed contact book with the same public methods as ContactBookBST.
+
+Contacts live in one table of a local database file, so a book can grow past
+RAM and every query the GUI makes is answered from an index:
+
+* ``name_key`` (lowercased name) for lookups, prefix search and listing;
+* ``phone_key`` (digits only) and ``email_key`` (lowercased) for find_by_*;
+* ``(group_key, name_key)`` for groups and a partial index for favorites;
+* ``(birthday_day, name_key)`` with the same day-of-year slots as the tree.
+
+The keys are computed in Python with the helpers ContactBookBST uses, so both
+engines match and order names identically (SQLite's own lower() is ASCII-only).
+"""
+import csv
+import sqlite3
+import time
+from datetime import date
+
+from main import (CSV_HEADER, EXPORT_BUFFER_SIZE, EXPORT_CHUNK_SIZE, ContactRecord, MessageBoxMixin,
+                  birthday_slot, looks_like_phone, normalize_email, normalize_phone, upcoming_slot_ranges)
+
+# Rows per executemany() call during import; all batches share one transaction.
+IMPORT_BATCH_SIZE = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    phone TEXT,
+    phone_key TEXT,
+    email TEXT,
+    email_key TEXT,
+    group_name TEXT,
+    group_key TEXT,
+    favorite INTEGER NOT NULL DEFAULT 0,
+    birthday TEXT,
+    birthday_day INTEGER
+);
+CREATE INDEX IF NOT EXISTS contacts_name ON contacts (name_key);
+CREATE INDEX IF NOT EXISTS contacts_phone ON contacts (phone_key);
+CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email_key);
+CREATE INDEX IF NOT EXISTS contacts_group ON contacts (group_key, name_key);
+CREATE INDEX IF NOT EXISTS contacts_favorite ON contacts (name_key) WHERE favorite;
+CREATE INDEX IF NOT EXISTS contacts_birthday ON contacts (birthday_day, name_key) WHERE birthday_day IS NOT NULL;
+"""
+
+COLUMNS = "name, phone, email, group_name, favorite, birthday"
+INSERT = ("INSERT INTO contacts (name, name_key, phone, phone_key, email, email_key, group_name, group_key,"
+          " favorite, birthday, birthday_day) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def contact_row(name, phone, email, group=None, favorite=False, birthday=None):
+    """Parameters for INSERT: each field followed by its search key."""
+    return (name, name.lower(), phone, normalize_phone(phone or ""), email, normalize_email(email or ""),
+            group or None, group.strip().lower() if group else None, int(bool(favorite)),
+            birthday or None, birthday_slot(birthday))
+
+
+def record(row):
+    name, phone, email, group, favorite, birthday = row
+    return ContactRecord(name, phone, email, group, bool(favorite), birthday)
+
+
+class SQLiteContactBook(MessageBoxMixin):
+    def __init__(self, file_name='contacts.db', notify=True):
+        """Open (or create) the book in ``file_name``; ``':memory:'`` gives a throwaway book."""
+        self.file_name = file_name
+        self.notify = notify
+        self.last_deleted_contact = None
+        # Usable from any thread: ConcurrentContactBook serializes every call on this engine.
+        self.connection = sqlite3.connect(file_name, check_same_thread=False)
+        # WAL lets readers carry on during writes; NORMAL sync is still crash-safe in WAL mode.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def _lines(self, cursor):
+        return [f"{name}: {phone}, {email}" for name, phone, email in cursor]
+
+    def _find_id(self, query):
+        """(id, record) for a name, falling back to email or phone like ContactBookBST.find_contact."""
+        sql = f"SELECT id, {COLUMNS} FROM contacts WHERE {{}} = ? ORDER BY name_key, id LIMIT 1"
+        row = self.connection.execute(sql.format("name_key"), (query.lower(),)).fetchone()
+        if row is None and "@" in query:
+            row = self.connection.execute(sql.format("email_key"), (normalize_email(query),)).fetchone()
+        elif row is None and looks_like_phone(query):
+            row = self.connection.execute(sql.format("phone_key"), (normalize_phone(query),)).fetchone()
+        return (row[0], record(row[1:])) if row else (None, None)
+
+    def add_contact(self, name, phone, email, group=None, birthday=None):
+        with self.connection:
+            self.connection.execute(INSERT, contact_row(name, phone, email, group, birthday=birthday))
+        self._info(f"Contact '{name}' added successfully!")
+        return ContactRecord(name, phone, email, group or None, False, birthday or None)
+
+    def find_contact(self, name):
+        return self._find_id(name)[1]
+
+    def find_by_phone(self, phone):
+        # An empty key would match every contact without a phone; the tree's index holds no such key.
+        key = normalize_phone(phone)
+        if not key:
+            return None
+        row = self.connection.execute(f"SELECT {COLUMNS} FROM contacts WHERE phone_key = ? LIMIT 1", (key,)).fetchone()
+        return record(row) if row else None
+
+    def find_by_email(self, email):
+        key = normalize_email(email)
+        if not key:
+            return None
+        row = self.connection.execute(f"SELECT {COLUMNS} FROM contacts WHERE email_key = ? LIMIT 1", (key,)).fetchone()
+        return record(row) if row else None
+
+    def prefix_search(self, prefix, limit=20):
+        """Contacts whose name starts with ``prefix`` (case-insensitive), as an index range scan."""
+        key = prefix.lower()
+        # Every string starting with ``key`` sorts below key + the largest code point.
+        cursor = self.connection.execute(
+            f"SELECT {COLUMNS} FROM contacts WHERE name_key >= ? AND name_key < ? ORDER BY name_key, id LIMIT ?",
+            (key, key + "\U0010ffff", limit))
+        return [record(row) for row in cursor]
+
+    def update_contact(self, name, new_phone, new_email):
+        contact_id, contact = self._find_id(name)
+        if contact:
+            phone = new_phone or contact.phone
+            email = new_email or contact.email
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE contacts SET phone = ?, phone_key = ?, email = ?, email_key = ? WHERE id = ?",
+                    (phone, normalize_phone(phone or ""), email, normalize_email(email or ""), contact_id))
+            contact = contact._replace(phone=phone, email=email)
+            self._info(f"Contact '{name}' updated successfully!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def delete_contact(self, name):
+        contact_id, contact = self._find_id(name)
+        if contact:
+            with self.connection:
+                self.connection.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
+            self.last_deleted_contact = contact
+            self._info(f"Contact '{name}' deleted successfully!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def toggle_favorite(self, name):
+        contact_id, contact = self._find_id(name)
+        if contact:
+            with self.connection:
+                self.connection.execute("UPDATE contacts SET favorite = NOT favorite WHERE id = ?", (contact_id,))
+            contact = contact._replace(favorite=not contact.favorite)
+            status = "Favorite" if contact.favorite else "Not Favorite"
+            self._info(f"Contact '{name}' is now {status}!")
+        else:
+            self._warn(f"Contact '{name}' not found.")
+        return contact
+
+    def iter_contacts(self):
+        return map(record, self.connection.execute(f"SELECT {COLUMNS} FROM contacts ORDER BY name_key, id"))
+
+    def contacts_page(self, offset, limit):
+        """Up to ``limit`` contacts from position ``offset``; OFFSET steps over the skipped index entries, O(offset)."""
+        return [record(row) for row in self.connection.execute(
+            f"SELECT {COLUMNS} FROM contacts ORDER BY name_key, id LIMIT ? OFFSET ?", (limit, offset))]
+
+    def list_contacts(self):
+        return self._lines(self.connection.execute("SELECT name, phone, email FROM contacts ORDER BY name_key, id"))
+
+    def list_favorite_contacts(self):
+        return self._lines(self.connection.execute(
+            "SELECT name, phone, email FROM contacts WHERE favorite ORDER BY name_key, id"))
+
+    def favorites_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM contacts WHERE favorite").fetchone()[0]
+
+    def list_group(self, group):
+        """Members of ``group`` (case-insensitive) in name order, from the (group, name) index."""
+        return self._lines(self.connection.execute(
+            "SELECT name, phone, email FROM contacts WHERE group_key = ? ORDER BY name_key, id",
+            (group.strip().lower(),)))
+
+    def group_count(self, group):
+        return self.connection.execute("SELECT COUNT(*) FROM contacts WHERE group_key = ?",
+                                       (group.strip().lower(),)).fetchone()[0]
+
+    def list_upcoming_birthdays(self, days_ahead=7, today=None):
+        """Birthdays from today through ``days_ahead`` days ahead, soonest first, as index range scans."""
+        today = today or date.today()
+        birthdays_list = []
+        for start, end in upcoming_slot_ranges(today, days_ahead):
+            cursor = self.connection.execute(
+                "SELECT name, birthday FROM contacts WHERE birthday_day BETWEEN ? AND ?"
+                " ORDER BY birthday_day, name_key, id", (start, end))
+            birthdays_list.extend(f"{name} has a birthday on {birthday}" for name, birthday in cursor)
+        return birthdays_list
+
+    def export_contacts_to_csv(self, file_name='contacts.csv', progress=None):
+        """Stream the book to ``file_name`` in name order and return the number of rows written.
+
+        ``progress(written, total)`` is called after every chunk of rows.
+        """
+        total = len(self)
+        cursor = self.connection.execute(f"SELECT {COLUMNS} FROM contacts ORDER BY name_key, id")
+        written = 0
+        with open(file_name, mode='w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            while True:
+                chunk = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.writerows((name, phone, email, group, bool(favorite), birthday)
+                                 for name, phone, email, group, favorite, birthday in chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written, total)
+        self._info(f"Contacts exported to {file_name}")
+        return written
+
+    def import_contacts_from_csv(self, file_name='contacts.csv'):
+        """Insert every CSV row in one transaction, in batches; returns the row count and timings."""
+        start = time.perf_counter()
+        parse_time = 0.0
+        count = 0
+        with open(file_name, mode='r', newline='', encoding='utf-8-sig') as file, self.connection:
+            reader = csv.DictReader(file)
+            while True:
+                batch_start = time.perf_counter()
+                batch = [contact_row(row['Name'], row['Phone'], row['Email'], row.get('Group'),
+                                     row.get('Favorite') == 'True', row.get('Birthday'))
+                         for _, row in zip(range(IMPORT_BATCH_SIZE), reader)]
+                parse_time += time.perf_counter() - batch_start
+                if not batch:
+                    break
+                self.connection.executemany(INSERT, batch)
+                count += len(batch)
+        timings = {"parse": parse_time, "insert": time.perf_counter() - start - parse_time}
+        self._info(f"Imported {count} contacts from {file_name}\n"
+                   f"(parse {timings['parse']:.2f}s, insert {timings['insert']:.2f}s)")
+        return count, timings
+
+    def undo_delete(self):
+        contact = self.last_deleted_contact
+        if contact:
+            with self.connection:
+                self.connection.execute(INSERT, contact_row(*contact))
+            self._info(f"Contact '{contact.name}' restored!")
+            self.last_deleted_contact = None
+        else:
+            self._warn("No contact to undo delete.")
+        return contact
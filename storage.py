@@ -0,0 +1,349 @@
+"""Durable storage for ContactBookBST: compacted snapshots plus an append-only operation log.
+
+A storage directory holds two files:
+
+``snapshot.pickle``
+    Every contact as parallel columns in name order, plus the sequence number
+    of the last operation it includes.  Written to a temporary file and
+    renamed into place, so a crash never leaves a half-written snapshot.
+``oplog.jsonl``
+    One JSON array ``[sequence, op, *args]`` per add, update, delete,
+    favorite toggle, undo or redo since the snapshot, flushed as it is written.
+    Undoing or redoing a bulk load, and any batch that would fill the log
+    past ``snapshot_every``, writes a new snapshot instead.
+
+Names may repeat, and replay rebuilds a differently shaped tree than the
+session that wrote the log, so a name lookup can meet another contact of the
+same name first.  Entries that change an existing contact therefore name it
+as ``(name, n)``: the n-th contact with that (case-insensitive) name in name
+order.  That order is the same on replay: snapshots keep it, and an insert
+always goes after the contacts with an equal name.
+
+Opening a book loads the snapshot with one balanced bulk build (secondary
+indexes are deferred until first use) and replays only the log entries newer
+than the snapshot.  A torn final log line from a crash is ignored.
+
+An open book holds an exclusive lock on ``lock`` in the directory, so a
+second process (the GUI and server.py both default to ~/.contact_book)
+cannot interleave its log appends or truncate the log under the first.
+"""
+import gc
+import json
+import os
+import pickle
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from main import ContactBookBST, ContactNode
+
+SNAPSHOT_FILE = "snapshot.pickle"
+LOG_FILE = "oplog.jsonl"
+LOCK_FILE = "lock"
+SNAPSHOT_VERSION = 1
+# Log entries after which a new snapshot is written and the log truncated.
+DEFAULT_SNAPSHOT_EVERY = 10_000
+
+
+class BookInUseError(RuntimeError):
+    """Raised when another process already has the storage directory open."""
+
+
+class PersistentContactBook(ContactBookBST):
+    def __init__(self, directory, notify=True, fuzzy_index=True, snapshot_every=DEFAULT_SNAPSHOT_EVERY,
+                 sync=False):
+        """Open (or create) the book stored in ``directory``.
+
+        ``sync`` fsyncs the log after every operation, trading write speed for
+        surviving power loss rather than just a process crash.
+        """
+        super().__init__(notify=notify, fuzzy_index=fuzzy_index)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self.sequence = 0
+        self.log_entries = 0
+        os.makedirs(directory, exist_ok=True)
+        self.lock_file = self._lock()
+        try:
+            self.load_timings = self._load()
+            self.log = open(self._path(LOG_FILE), "a", encoding="utf-8")
+        except BaseException:
+            self.lock_file.close()
+            raise
+
+    def _path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def _lock(self):
+        """Open and exclusively lock the directory's lock file; it stays locked until the file is closed."""
+        lock_file = open(self._path(LOCK_FILE), "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise BookInUseError(f"{self.directory} is already open in another program (the contact book "
+                                 f"or server.py); close it first or use another data folder") from None
+        return lock_file
+
+    # -- loading --------------------------------------------------------------
+
+    def _load(self):
+        """Load the snapshot and replay the log tail; returns per-phase timings in seconds."""
+        start = time.perf_counter()
+        timings = {"snapshot": 0.0, "replay": 0.0}
+        snapshot_path = self._path(SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            # A million new objects would otherwise trigger several full collections.
+            gc.disable()
+            try:
+                with open(snapshot_path, "rb") as file:
+                    snapshot = pickle.load(file)
+                if snapshot["version"] != SNAPSHOT_VERSION:
+                    raise ValueError(f"unsupported snapshot version {snapshot['version']}")
+                nodes = list(map(ContactNode, snapshot["names"], snapshot["phones"], snapshot["emails"],
+                                 snapshot["groups"], snapshot["favorites"], snapshot["birthdays"]))
+                # Snapshots are written in name order, so bulk_load's sort can be skipped.
+                self.root = self.build_balanced(nodes)
+                self.size = len(nodes)
+                self.unindexed = dict.fromkeys(nodes)
+                self.sequence = snapshot["sequence"]
+                del snapshot
+            finally:
+                gc.enable()
+            # The loaded contacts live as long as the book; keep later collections from rescanning them.
+            gc.freeze()
+            timings["snapshot"] = time.perf_counter() - start
+        replay_start = time.perf_counter()
+        self._replay()
+        timings["replay"] = time.perf_counter() - replay_start
+        return timings
+
+    def _replay(self):
+        log_path = self._path(LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        notify, self.notify = self.notify, False
+        # Replayed edits happened in an earlier session; they are not this session's to undo.
+        self.journal.paused = True
+        try:
+            with open(log_path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+            for number, line in enumerate(lines, 1):
+                try:
+                    sequence, op, *args = json.loads(line)
+                except ValueError:
+                    if number == len(lines):
+                        break  # Torn write from a crash; the operation never completed.
+                    raise
+                self.log_entries += 1
+                # Entries up to the snapshot's sequence are already in it (the log is
+                # truncated only after the snapshot is safely renamed into place).
+                if sequence > self.sequence:
+                    self._apply(op, args)
+                    self.sequence = sequence
+        finally:
+            self.notify = notify
+            self.journal.paused = False
+
+    def _apply(self, op, args):
+        """Redo one logged operation through the in-memory book, without logging it again."""
+        if op == "add":
+            ContactBookBST.add_contact(self, *args)
+        elif op == "set_fields":
+            name, nth, phone, email = args
+            self._set_fields(self._identified(name, nth), phone, email)
+        elif op == "remove":
+            self.remove_node(self._identified(*args))
+        elif op == "flip_favorite":
+            self._flip_favorite(self._identified(*args))
+        # Logs written before contacts were identified by position name them only.
+        elif op == "update":
+            ContactBookBST.update_contact(self, *args)
+        elif op == "delete":
+            ContactBookBST.delete_contact(self, *args)
+        elif op == "favorite":
+            ContactBookBST.toggle_favorite(self, *args)
+        elif op == "restore":
+            self.insert_node(ContactNode(*args))
+        else:
+            raise ValueError(f"unknown log operation {op!r}")
+
+    # -- contact identity -----------------------------------------------------
+
+    def _identity(self, node):
+        """``(name, n)`` for a contact in the book: it is the n-th one with its name, counting from 0."""
+        path = self.path_to(node)
+        position = self._size(node.left)
+        for parent, child in zip(path, path[1:] + [node]):
+            if child is parent.right:
+                position += self._size(parent.left) + 1
+        return node.name, position - self.rank(node.name)
+
+    def _identified(self, name, nth):
+        """The contact a logged ``(name, n)`` identity refers to."""
+        position = self.rank(name) + nth
+        node = self.select(position) if 0 <= position < self.size else None
+        if node is None or node.name != name:
+            raise ValueError(f"log refers to contact '{name}' #{nth}, which is not in the book")
+        return node
+
+    # -- writing --------------------------------------------------------------
+
+    def _log(self, op, *args):
+        self.sequence += 1
+        self.log.write(json.dumps([self.sequence, op, *args]) + "\n")
+        self.log.flush()
+        if self.sync:
+            os.fsync(self.log.fileno())
+        self.log_entries += 1
+        if self.log_entries >= self.snapshot_every:
+            self.snapshot()
+
+    def _fits(self, count):
+        """Whether ``count`` more entries leave the log short of the snapshot threshold."""
+        return self.log_entries + count < self.snapshot_every
+
+    def _log_batch(self, op, count, entries):
+        """Log ``count`` entries, or snapshot straight away if the log would reach the threshold anyway.
+
+        ``entries`` is only iterated when they are logged, so it can be a generator.
+        """
+        if not self._fits(count):
+            self.sequence += count
+            self.snapshot()
+            return
+        for args in entries:
+            self._log(op, *args)
+
+    def snapshot(self):
+        """Write a compacted snapshot of the whole book and truncate the log."""
+        nodes = list(self.in_order(self.root))
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "sequence": self.sequence,
+            "names": [node.name for node in nodes],
+            "phones": [node.phone for node in nodes],
+            "emails": [node.email for node in nodes],
+            "groups": [node.group for node in nodes],
+            "favorites": [node.favorite for node in nodes],
+            "birthdays": [node.birthday for node in nodes],
+        }
+        temporary_path = self._path(SNAPSHOT_FILE + ".tmp")
+        with open(temporary_path, "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self._path(SNAPSHOT_FILE))
+        self.log.close()
+        self.log = open(self._path(LOG_FILE), "w", encoding="utf-8")
+        self.log_entries = 0
+
+    def close(self):
+        self.log.close()
+        self.lock_file.close()
+
+    # -- logged mutations -----------------------------------------------------
+
+    def add_contact(self, name, phone, email, group=None, birthday=None):
+        node = super().add_contact(name, phone, email, group, birthday)
+        self._log("add", name, phone, email, group, birthday)
+        return node
+
+    def update_contact(self, name, new_phone, new_email):
+        contact = super().update_contact(name, new_phone, new_email)
+        if contact:
+            # The resulting values, not the arguments: a blank argument keeps the current value.
+            self._log("set_fields", *self._identity(contact), contact.phone, contact.email)
+        return contact
+
+    def delete_contact(self, name):
+        contact = self.find_contact(name)
+        if contact is None:
+            return super().delete_contact(name)
+        # Identified while still in the book; the delete below finds the same contact.
+        identity = self._identity(contact)
+        super().delete_contact(name)
+        self._log("remove", *identity)
+        return contact
+
+    def toggle_favorite(self, name):
+        contact = super().toggle_favorite(name)
+        if contact:
+            self._log("flip_favorite", *self._identity(contact))
+        return contact
+
+    def _apply_step(self, entry):
+        """Apply an undo or redo step, then log it as the plain operation it amounts to."""
+        op, contact = entry[0], entry[1]
+        # An unlinked contact can no longer be identified, so identify it first.
+        identity = self._identity(contact) if op == "unlink" else None
+        inverse, message = super()._apply_step(entry)
+        if op == "link":
+            # Logged with every field: the deleted node may predate the last snapshot.
+            self._log("restore", contact.name, contact.phone, contact.email, contact.group,
+                      contact.favorite, contact.birthday)
+        elif op == "unlink":
+            self._log("remove", *identity)
+        elif op == "fields":
+            # Verbatim: the restored values may well be blank.
+            self._log("set_fields", *self._identity(contact), contact.phone, contact.email)
+        elif op == "fields_many":
+            self._log_fields(dict.fromkeys(node for node, _, _ in contact))
+        elif op == "favorite":
+            self._log("flip_favorite", *self._identity(contact))
+        else:
+            self.snapshot()
+        return inverse, message
+
+    def _log_fields(self, nodes):
+        """Log the current phone and email of each of ``nodes`` (distinct contacts still in the book)."""
+        self._log_batch("set_fields", len(nodes),
+                        ((*self._identity(node), node.phone, node.email) for node in nodes))
+
+    def add_many(self, rows):
+        nodes = super().add_many(rows)
+        # Replayed one by one, each lands after the contacts with an equal name, as the batch did.
+        self._log_batch("add", len(nodes),
+                        ((node.name, node.phone, node.email, node.group, node.birthday) for node in nodes))
+        return nodes
+
+    def update_many(self, updates):
+        matches = super().update_many(updates)
+        self._log_fields(dict.fromkeys(contact for contact in matches if contact is not None))
+        return matches
+
+    def delete_many(self, names):
+        names = list(names)
+        if not self._fits(len(names)):
+            # Too many to log one by one: snapshot if anything was deleted.
+            matches = super().delete_many(names)
+            deleted = sum(contact is not None for contact in matches)
+            if deleted:
+                self.sequence += deleted
+                self.snapshot()
+            return matches
+        # Identified while still in the book; the delete below matches the same contacts.
+        identities = [self._identity(contact) for contact in self._match_names(names, consume=True)
+                      if contact is not None]
+        matches = super().delete_many(names)
+        # Last of each name first, so no removal shifts an identity logged after it.
+        identities.sort(key=lambda identity: identity[1], reverse=True)
+        self._log_batch("remove", len(identities), identities)
+        return matches
+
+    def bulk_load(self, new_nodes, defer_index=False):
+        """Bulk-load like ContactBookBST (CSV imports included), then snapshot instead of logging every node."""
+        timings = super().bulk_load(new_nodes, defer_index)
+        start = time.perf_counter()
+        self.snapshot()
+        timings["snapshot"] = time.perf_counter() - start
+        return timings
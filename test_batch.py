@@ -0,0 +1,116 @@
+"""ContactBookBST add_many, update_many and delete_many, through both of _match_names' lookup paths."""
+import random
+
+import pytest
+
+from main import ContactBookBST
+
+SIZE = 2000
+# Few enough names for per-name iter_from seeks, and enough to make one walk of the book cheaper.
+BATCH_SIZES = {"seek": 5, "walk": 500}
+
+
+def details(book):
+    return [(node.name, node.phone, node.email) for node in book.iter_contacts()]
+
+
+@pytest.fixture
+def book():
+    contact_book = ContactBookBST(notify=False)
+    # Every name twice, in differing case, so duplicates are matched in name order.
+    contact_book.add_many([(f"Name {i % (SIZE // 2):04d}" if i < SIZE // 2 else f"NAME {i % (SIZE // 2):04d}",
+                            f"{i:06d}", f"contact{i}@example.com", f"Group {i % 7}") for i in range(SIZE)])
+    contact_book.journal.undo_steps.clear()
+    return contact_book
+
+
+@pytest.fixture(params=list(BATCH_SIZES.items()), ids=list(BATCH_SIZES))
+def batch(request, book, monkeypatch):
+    """Random names (some missing, some repeated) and a check that the intended lookup path was taken."""
+    path, count = request.param
+    assert book._sparse(count) == (path == "seek")
+    rng = random.Random(count)
+    names = [f"name {rng.randrange(SIZE // 2 + 50):04d}" for _ in range(count - 3)]
+    names += [names[0], names[0], "Nobody"]
+    rng.shuffle(names)
+    seeks = []
+    iter_from = book.iter_from
+    monkeypatch.setattr(book, "iter_from", lambda key: seeks.append(key) or iter_from(key))
+    yield names
+    assert len(seeks) == (len(set(names)) if path == "seek" else 0)
+
+
+def expected_matches(contacts, names, consume):
+    """Brute force: the n-th use of a name takes the n-th contact of that name (consume) or always the first."""
+    by_name = {}
+    for contact in contacts:
+        by_name.setdefault(contact.name.lower(), []).append(contact)
+    used = {}
+    matches = []
+    for name in names:
+        key = name.lower()
+        candidates = by_name.get(key, [])
+        n = used.get(key, 0) if consume else 0
+        used[key] = n + 1
+        matches.append(candidates[n] if n < len(candidates) else None)
+    return matches
+
+
+def test_update_many(book, batch, assert_consistent):
+    before = details(book)
+    expected = expected_matches(list(book.iter_contacts()), batch, consume=False)
+    updates = [(name, f"9{i:06d}", "" if i % 3 else f"new{i}@example.com") for i, name in enumerate(batch)]
+    # Replayed by hand: the last update wins, and a blank email keeps the previous one.
+    final = {contact: (contact.phone, contact.email) for contact in expected if contact is not None}
+    for (_, phone, email), contact in zip(updates, expected):
+        if contact is not None:
+            final[contact] = (phone, email or final[contact][1])
+    matches = book.update_many(updates)
+    assert matches == expected
+    assert None in matches
+    for contact, (phone, email) in final.items():
+        assert (contact.phone, contact.email) == (phone, email)
+        assert book.find_by_phone(phone) is contact
+    assert assert_consistent(book) == SIZE
+    assert len(book.journal.undo_steps) == 1
+    book.undo()
+    assert details(book) == before
+    assert_consistent(book)
+
+
+def test_delete_many(book, batch, assert_consistent):
+    contacts = list(book.iter_contacts())
+    expected = expected_matches(contacts, batch, consume=True)
+    matches = book.delete_many(batch)
+    assert matches == expected
+    assert None in matches
+    deleted = {id(contact) for contact in matches if contact is not None}
+    assert [node for node in book.iter_contacts()] == [node for node in contacts if id(node) not in deleted]
+    assert assert_consistent(book) == SIZE - len(deleted)
+    assert len(book.journal.undo_steps) == 1
+    book.undo()
+    # Restored contacts go after others of the same name, so compare the contacts, not their order.
+    assert set(book.iter_contacts()) == set(contacts)
+    assert assert_consistent(book) == SIZE
+
+
+@pytest.mark.parametrize("count", list(BATCH_SIZES.values()), ids=list(BATCH_SIZES))
+def test_add_many(book, count, assert_consistent):
+    rows = [(f"Added {i % 50}", f"8{i:06d}", "", "Added") for i in range(count)]
+    before = details(book)
+    added = book.add_many(rows)
+    assert [(node.name, node.phone, node.group) for node in added] == [(row[0], row[1], row[3]) for row in rows]
+    assert book.group_count("added") == len(rows)
+    assert assert_consistent(book) == SIZE + len(rows)
+    assert len(book.journal.undo_steps) == 1
+    book.undo()
+    assert details(book) == before and book.group_count("added") == 0
+    assert_consistent(book)
+
+
+def test_unmatched_names_fall_back_to_phone_and_email(book):
+    by_phone = book.find_by_phone("000007")
+    by_email = book.find_by_email("contact8@example.com")
+    matches = book.delete_many(["000007", "contact8@example.com", "000007", "Nobody"])
+    assert matches == [by_phone, by_email, None, None]
+    assert book.find_by_phone("000007") is None and len(book) == SIZE - 2
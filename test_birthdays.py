@@ -0,0 +1,68 @@
+"""list_upcoming_birthdays windows across month and year ends, Feb 29 and whole years, on every engine."""
+from datetime import date
+
+import pytest
+
+from main import ENGINES, open_contact_book
+
+BIRTHDAYS = {
+    "New Year": "1990-01-01",
+    "Jan Third": "1985-01-03",
+    "Jan Fifth": "1970-01-05",
+    "Jan End": "1999-01-31",
+    "Feb Second": "2001-02-02",
+    "Feb Fourth": "2002-02-04",
+    "Feb End": "1991-02-28",
+    "Leap Day": "2000-02-29",
+    "March First": "1980-03-01",
+    "Dec Twenty-Seven": "1975-12-27",
+    "Dec Thirty": "1960-12-30",
+}
+
+
+@pytest.fixture(params=list(ENGINES))
+def book(request):
+    contact_book = open_contact_book(request.param, notify=False)
+    for name, birthday in BIRTHDAYS.items():
+        contact_book.add_contact(name, "", "", None, birthday)
+    contact_book.add_contact("No Birthday", "", "")
+    yield contact_book
+    if hasattr(contact_book, "close"):
+        contact_book.close()
+
+
+def upcoming(book, days_ahead, today):
+    return [line.partition(" has a birthday on ")[0] for line in book.list_upcoming_birthdays(days_ahead, today)]
+
+
+def test_window_wrapping_into_january(book):
+    assert upcoming(book, 7, date(2024, 12, 28)) == ["Dec Thirty", "New Year", "Jan Third"]
+
+
+def test_window_crossing_a_month_end(book):
+    assert upcoming(book, 5, date(2023, 1, 29)) == ["Jan End", "Feb Second"]
+
+
+def test_leap_day_in_a_leap_year(book):
+    assert upcoming(book, 0, date(2024, 2, 29)) == ["Leap Day"]
+    assert upcoming(book, 0, date(2024, 2, 28)) == ["Feb End"]
+    assert upcoming(book, 0, date(2024, 3, 1)) == ["March First"]
+
+
+def test_leap_day_falls_on_march_first_in_a_common_year(book):
+    assert upcoming(book, 0, date(2023, 2, 28)) == ["Feb End"]
+    assert upcoming(book, 0, date(2023, 3, 1)) == ["Leap Day", "March First"]
+    assert upcoming(book, 1, date(2023, 2, 28)) == ["Feb End", "Leap Day", "March First"]
+
+
+def test_today_only(book):
+    assert upcoming(book, 0, date(2024, 1, 3)) == ["Jan Third"]
+    assert upcoming(book, 0, date(2024, 1, 2)) == []
+
+
+@pytest.mark.parametrize("days_ahead", [365, 366, 1000])
+def test_a_year_or_more_lists_everyone_once_from_today(book, days_ahead):
+    assert upcoming(book, days_ahead, date(2024, 2, 1)) == [
+        "Feb Second", "Feb Fourth", "Feb End", "Leap Day", "March First", "Dec Twenty-Seven", "Dec Thirty",
+        "New Year", "Jan Third", "Jan Fifth", "Jan End"]
+    assert sorted(upcoming(book, days_ahead, date(2024, 1, 1))) == sorted(BIRTHDAYS)
@@ -0,0 +1,80 @@
+"""BTreeContactBook on tiny pages, so leaf and internal splits happen, and files it refuses to open."""
+import io
+import random
+
+import pytest
+
+import btree_book
+from btree_book import BTreeContactBook, Internal
+
+PAGE_SIZE = 256
+SIZE = 600
+
+
+def names(contacts):
+    return [contact.name for contact in contacts]
+
+
+@pytest.fixture
+def edited(tmp_path):
+    """A small-page book after random adds and deletes, with the names it should hold in order."""
+    rng = random.Random(17)
+    book = BTreeContactBook(str(tmp_path / "contacts.btree"), notify=False, page_size=PAGE_SIZE)
+    # Equal names keep insertion order, so the expected order is a stable sort of the insertion order.
+    expected = []
+    for i in range(SIZE):
+        name = f"Contact {rng.randrange(SIZE // 2):04d}"
+        book.add_contact(rng.choice([name, name.upper()]), f"555-{i:04d}", "")
+        expected.append(book.find_by_phone(f"555-{i:04d}").name)
+    for _ in range(SIZE // 3):
+        # A name lookup deletes the earliest contact of that name, in any case.
+        key = rng.choice(expected).lower()
+        first = next(i for i, name in enumerate(expected) if name.lower() == key)
+        assert book.delete_contact(key).name == expected.pop(first)
+    expected.sort(key=str.lower)
+    yield book, expected
+    if not book.file.closed:
+        book.close()
+
+
+def test_splits_keep_order(edited):
+    book, expected = edited
+    assert book.height() >= 3 and isinstance(book.cache.get(book.root), Internal)
+    assert book.check_invariants() == len(book) == len(expected)
+    assert names(book.iter_contacts()) == expected
+
+
+def test_contacts_page_after_splits(edited):
+    book, expected = edited
+    for offset in (0, 1, 5, 37, len(expected) - 3, len(expected), len(expected) + 10):
+        assert names(book.contacts_page(offset, 7)) == expected[offset:offset + 7]
+    assert names(book.contacts_page(0, len(expected) + 1)) == expected
+
+
+def test_reopen_keeps_contacts(edited, tmp_path):
+    book, expected = edited
+    book.close()
+    reopened = BTreeContactBook(str(tmp_path / "contacts.btree"), notify=False)
+    try:
+        assert reopened.page_size == PAGE_SIZE
+        assert reopened.check_invariants() == len(expected)
+        assert names(reopened.contacts_page(10, 20)) == expected[10:30]
+    finally:
+        reopened.close()
+
+
+@pytest.mark.parametrize("content", [b"not a contact tree at all", b"CBT", b"CBT1" + b"\0" * 100],
+                         ids=["bad-magic", "short-header", "bad-version"])
+def test_rejected_file_is_closed(tmp_path, monkeypatch, content):
+    path = tmp_path / "other.bin"
+    path.write_bytes(content)
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        opened.append(io.open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(btree_book, "open", tracking_open, raising=False)
+    with pytest.raises(ValueError, match="not a version"):
+        BTreeContactBook(str(path), notify=False)
+    assert len(opened) == 1 and opened[0].closed
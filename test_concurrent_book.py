@@ -0,0 +1,72 @@
+"""ConcurrentContactBook under concurrent readers and writers: nothing lost, invariants intact."""
+import random
+import threading
+
+import pytest
+
+from concurrent_book import ConcurrentContactBook
+from main import create_contact_book
+
+SIZE = 2000
+THREADS = 4
+OPERATIONS = 1500
+
+
+@pytest.mark.parametrize("engine", ["tree", "sorted-array", "columnar"])
+def test_concurrent_readers_and_writers(engine, tmp_path):
+    book = ConcurrentContactBook(create_contact_book(engine, notify=False))
+    names = [f"Contact {i:05d}" for i in range(SIZE)]
+    for i, name in enumerate(names):
+        book.add_contact(name, f"{i:06d}", "", f"Group {i % 3}")
+    errors = []
+    start = threading.Barrier(2 * THREADS + 1)
+
+    def writer(seed):
+        # Adds and then deletes its own contacts, so the book ends where it started.
+        rng = random.Random(seed)
+        added = []
+        start.wait()
+        for i in range(OPERATIONS):
+            if added and rng.random() < 0.4:
+                if book.delete_contact(added.pop(rng.randrange(len(added)))) is None:
+                    errors.append(f"writer {seed} could not delete its contact")
+            else:
+                added.append(f"{rng.choice(names)} #{seed}-{i}")
+                book.add_contact(added[-1], "555-0100", "stress@example.com", "Stress", "1990-06-15")
+        for name in added:
+            book.delete_contact(name)
+
+    def reader(seed):
+        rng = random.Random(-seed)
+        start.wait()
+        for i in range(OPERATIONS):
+            name = rng.choice(names)
+            if book.find_contact(name) is None:
+                errors.append(f"lost {name}")
+            page = book.contacts_page(rng.randrange(SIZE), 20)
+            keys = [contact.name.lower() for contact in page]
+            if keys != sorted(keys):
+                errors.append(f"page out of order at {keys[0]}")
+            if i % 500 == 0:
+                book.prefix_search(name[:10])
+                book.group_count("Stress")
+        if seed == 0:
+            book.export_contacts_to_csv(str(tmp_path / "export.csv"))
+
+    def guarded(work, seed):
+        try:
+            work(seed)
+        except Exception as error:  # Reported by the assertion below; a thread must not die silently.
+            errors.append(repr(error))
+
+    threads = [threading.Thread(target=guarded, args=(work, seed))
+               for seed in range(THREADS) for work in (writer, reader)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert book.check_invariants() == len(book) == SIZE
+    assert [contact.name for contact in book.iter_contacts()] == names
+    assert book.group_count("Stress") == 0
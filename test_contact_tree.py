@@ -0,0 +1,45 @@
+"""AVL balancing of ContactBookBST under the inserts and deletes that used to degrade it into a list."""
+import math
+
+import pytest
+
+from main import ContactBookBST
+
+SIZE = 10_000
+
+
+def max_height(count):
+    # An AVL tree with n nodes is at most about 1.44 * log2(n + 2) levels tall.
+    return 1.45 * math.log2(count + 2)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sorted_inserts_stay_balanced(descending):
+    book = ContactBookBST(notify=False, fuzzy_index=False)
+    names = [f"Contact {i:05d}" for i in range(SIZE)]
+    if descending:
+        names.reverse()
+    for name in names:
+        book.add_contact(name, "", "")
+    assert book.check_invariants() == SIZE
+    assert book.height() <= max_height(SIZE)
+
+
+def test_duplicate_names_stay_balanced():
+    book = ContactBookBST(notify=False, fuzzy_index=False)
+    for i in range(SIZE):
+        book.add_contact("Same Name", str(i), "")
+    assert book.check_invariants() == SIZE
+    assert book.height() <= max_height(SIZE)
+
+
+def test_deletes_keep_balance():
+    book = ContactBookBST(notify=False, fuzzy_index=False)
+    for i in range(SIZE):
+        book.add_contact(f"Contact {i:05d}", "", "")
+    for i in range(0, SIZE, 2):
+        assert book.delete_contact(f"Contact {i:05d}") is not None
+    assert book.check_invariants() == SIZE // 2
+    assert book.height() <= max_height(SIZE // 2)
+    assert book.find_contact("Contact 00000") is None
+    assert book.find_contact("Contact 00001").name == "Contact 00001"
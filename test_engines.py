@@ -0,0 +1,83 @@
+"""One scripted scenario run against every storage engine in ENGINES, bare and behind ConcurrentContactBook."""
+from datetime import date
+
+from main import open_contact_book
+
+# ``book`` (conftest.py) is every engine in ENGINES, bare and behind ConcurrentContactBook.
+TODAY = date(2024, 3, 10)
+
+
+def names(contacts):
+    return [contact.name for contact in contacts]
+
+
+def test_scenario(book):
+    added = book.add_contact("Alice", "555-0100", "alice@example.com", "Work", "1990-03-12")
+    assert (added.name, added.phone, added.email) == ("Alice", "555-0100", "alice@example.com")
+    book.add_contact("Bob", "555-0101", "bob@example.com", None, "1985-06-01")
+    book.add_contact("Carol", "555-0102", "carol@example.com")
+    book.add_contact("Alan", "555-0103", "alan@example.com")
+    assert len(book) == 4
+
+    # Lookups by name (any case), phone and email.
+    assert book.find_contact("alice").name == "Alice"
+    assert book.find_contact("555-0101").name == "Bob"
+    assert book.find_contact("carol@example.com").name == "Carol"
+    assert book.find_contact("Nobody") is None
+
+    # Blank values keep the current ones.
+    updated = book.update_contact("Alice", "555-0199", "")
+    assert (updated.phone, updated.email) == ("555-0199", "alice@example.com")
+    assert book.find_contact("Alice").phone == "555-0199"
+
+    favorite = book.toggle_favorite("Alice")
+    assert favorite.name == "Alice" and favorite.favorite
+    assert book.favorites_count() == 1
+    assert book.list_favorite_contacts() == ["Alice: 555-0199, alice@example.com"]
+
+    assert names(book.prefix_search("al")) == ["Alan", "Alice"]
+    assert book.list_upcoming_birthdays(7, TODAY) == ["Alice has a birthday on 1990-03-12"]
+    assert names(book.contacts_page(1, 2)) == ["Alice", "Bob"]
+    assert names(book.iter_contacts()) == ["Alan", "Alice", "Bob", "Carol"]
+
+    deleted = book.delete_contact("Bob")
+    assert deleted.name == "Bob"
+    assert book.find_contact("Bob") is None
+    assert len(book) == 3
+    restored = book.undo_delete()
+    assert restored.name == "Bob"
+    assert book.find_contact("bob").email == "bob@example.com"
+    assert names(book.contacts_page(0, 10)) == ["Alan", "Alice", "Bob", "Carol"]
+
+    for mutate in (lambda: book.update_contact("Nobody", "1", ""), lambda: book.delete_contact("Nobody"),
+                   lambda: book.toggle_favorite("Nobody")):
+        assert mutate() is None
+    assert len(book) == 4
+    # SQLite keeps its own structures consistent and has no check_invariants.
+    if hasattr(getattr(book, "book", book), "check_invariants"):
+        assert book.check_invariants() == 4
+
+
+def test_import_utf8_with_byte_order_mark(book, tmp_path):
+    # What Excel writes for "CSV UTF-8": the header's first cell starts with U+FEFF.
+    file_name = tmp_path / "contacts.csv"
+    file_name.write_bytes("\ufeffName,Phone,Email,Group,Favorite,Birthday\n"
+                          "Zoë Ångström,555-0100,zoe@example.com,Équipe,True,1990-03-12\n"
+                          "Bob,555-0101,bob@example.com,,False,\n".encode("utf-8"))
+    count, _ = book.import_contacts_from_csv(str(file_name))
+    assert count == 2
+    assert names(book.iter_contacts()) == ["Bob", "Zoë Ångström"]
+    contact = book.find_contact("zoë ångström")
+    assert (contact.group, contact.favorite) == ("Équipe", True)
+
+
+def test_export_is_utf8_and_reads_back(book, tmp_path):
+    book.add_contact("Zoë Ångström", "555-0100", "zoe@example.com", "Équipe", "1990-03-12")
+    book.add_contact("Łukasz", "555-0101", "", None)
+    file_name = tmp_path / "contacts.csv"
+    assert book.export_contacts_to_csv(str(file_name)) == 2
+    assert "Zoë Ångström" in file_name.read_bytes().decode("utf-8")
+    copy = open_contact_book("tree", notify=False)
+    copy.import_contacts_from_csv(str(file_name))
+    assert [(contact.name, contact.group) for contact in copy.iter_contacts()] == [
+        ("Zoë Ångström", "Équipe"), ("Łukasz", "")]
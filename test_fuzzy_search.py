@@ -0,0 +1,74 @@
+"""ContactBookBST.fuzzy_search: typos find the right contact, and the trigram index never goes stale."""
+import pytest
+
+from main import ContactBookBST
+
+NAMES = ["John Smith", "Joan Smythe", "Jon Snow", "Jonathan Swift", "Mary Jones", "Maria Johnson",
+         "Catherine Zeta", "Katharine Hepburn", "Stephen King", "Steven Kingsley"]
+
+
+@pytest.fixture
+def book():
+    contact_book = ContactBookBST(notify=False)
+    for i, name in enumerate(NAMES):
+        contact_book.add_contact(name, f"555-{i:04d}", f"{name.split()[0].lower()}{i}@example.com")
+    return contact_book
+
+
+def names(contacts):
+    return [contact.name for contact in contacts]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Jonh Smith", "John Smith"),
+    ("john smiht", "John Smith"),
+    ("Katherine Hepbrun", "Katharine Hepburn"),
+    ("Stephan Kign", "Stephen King"),
+    ("Mary Joens", "Mary Jones"),
+    ("Jonathon Swfit", "Jonathan Swift"),
+])
+def test_misspelled_name_ranks_first(book, query, expected):
+    assert names(book.fuzzy_search(query))[0] == expected
+
+
+def test_limit_and_nothing_similar(book):
+    assert len(book.fuzzy_search("Jon", limit=3)) == 3
+    assert book.fuzzy_search("Xyzzy Qwv") == []
+    assert book.fuzzy_search("") == []
+
+
+def test_delete_and_update_leave_no_stale_hits(book):
+    book.delete_contact("John Smith")
+    assert "John Smith" not in names(book.fuzzy_search("Jonh Smith"))
+    # The email's local part is indexed too ("stephen8"; only it has the trigram "n8 ").
+    contact = book.update_contact("Stephen King", "", "horror@example.com")
+    assert contact not in book.trigram_index.get("n8 ", ())
+    assert names(book.fuzzy_search("horor"))[0] == "Stephen King"
+    book.undo()
+    assert book.trigram_index["n8 "] == {contact}
+    assert "orr" not in book.trigram_index
+    assert book.fuzzy_search("horor") == []
+    # Every posting list holds only contacts still in the book, and no list is left empty.
+    live = set(book.iter_contacts())
+    assert all(nodes and nodes <= live for nodes in book.trigram_index.values())
+
+
+def test_delete_all_empties_the_index(book):
+    for name in NAMES:
+        book.delete_contact(name)
+    assert book.trigram_index == {}
+    assert book.fuzzy_search("John") == []
+
+
+def test_disabled_index():
+    book = ContactBookBST(notify=False, fuzzy_index=False)
+    book.add_contact("John Smith", "555-0100", "john@example.com")
+    book.update_contact("John Smith", "555-0101", "js@example.com")
+    book.add_many([("Mary Jones", "", ""), ("Jon Snow", "", "")])
+    book.delete_many(["Mary Jones"])
+    book.delete_contact("Jon Snow")
+    book.undo()
+    assert book.trigram_index is None
+    assert book.find_contact("555-0101").name == "John Smith"
+    with pytest.raises(ValueError):
+        book.fuzzy_search("Jonh")
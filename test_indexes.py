@@ -0,0 +1,124 @@
+"""Phone/email lookups, favorites and groups after adds, updates, deletes and undo, on every engine.
+
+``book`` (conftest.py) is every engine in ENGINES, bare and behind ConcurrentContactBook.
+"""
+import pytest
+
+from main import ContactBookBST
+
+
+def test_phone_and_email_lookups(book):
+    book.add_contact("Alice", "+1 (555) 010-0100", "Alice@Example.com")
+    book.add_contact("Bob", "555-0101", "bob@example.com")
+    assert book.find_by_phone("15550100100").name == "Alice"
+    assert book.find_by_phone("555 0101").name == "Bob"
+    assert book.find_by_email(" ALICE@example.COM ").name == "Alice"
+    assert book.find_by_phone("555-0199") is None and book.find_by_email("carol@example.com") is None
+
+    book.update_contact("Bob", "555-0199", "robert@example.com")
+    assert book.find_by_phone("555-0101") is None and book.find_by_email("bob@example.com") is None
+    assert book.find_by_phone("5550199").name == "Bob"
+    assert book.find_by_email("robert@example.com").name == "Bob"
+
+    book.delete_contact("Alice")
+    assert book.find_by_phone("15550100100") is None and book.find_by_email("alice@example.com") is None
+    book.undo_delete()
+    assert book.find_by_phone("15550100100").name == "Alice"
+    assert book.find_by_email("alice@example.com").name == "Alice"
+
+
+def test_shared_phone_and_email(book):
+    for name in ("Ann", "Ben", "Cid"):
+        book.add_contact(name, "555-0100", "office@example.com")
+    assert book.find_by_phone("555-0100").name in ("Ann", "Ben", "Cid")
+    book.delete_contact("Ann")
+    book.delete_contact("Cid")
+    assert book.find_by_phone("555-0100").name == "Ben"
+    assert book.find_by_email("office@example.com").name == "Ben"
+    assert book.undo_delete().name == "Cid"
+    book.update_contact("Ben", "555-0101", "ben@example.com")
+    assert book.find_by_phone("555-0100").name == "Cid"
+    assert book.find_by_email("office@example.com").name == "Cid"
+    book.update_contact("Cid", "555-0102", "cid@example.com")
+    assert book.find_by_phone("555-0100") is None and book.find_by_email("office@example.com") is None
+
+
+def test_favorites(book):
+    for name in ("Cid", "Ann", "Ben"):
+        book.add_contact(name, f"555-{len(name)}", "")
+    assert book.favorites_count() == 0 and book.list_favorite_contacts() == []
+    book.toggle_favorite("Cid")
+    book.toggle_favorite("Ann")
+    assert book.favorites_count() == 2
+    assert book.list_favorite_contacts() == ["Ann: 555-3, ", "Cid: 555-3, "]
+    book.update_contact("Ann", "555-9", "")
+    assert book.list_favorite_contacts() == ["Ann: 555-9, ", "Cid: 555-3, "]
+    book.delete_contact("Cid")
+    assert book.favorites_count() == 1
+    book.undo_delete()
+    assert book.favorites_count() == 2 and book.find_contact("Cid").favorite
+    book.toggle_favorite("Ann")
+    assert book.list_favorite_contacts() == ["Cid: 555-3, "]
+
+
+def test_groups(book):
+    book.add_contact("Cid", "1", "", "Work")
+    book.add_contact("Ann", "2", "", " work ")
+    book.add_contact("Ben", "3", "", "Family")
+    book.add_contact("Dee", "4", "")
+    assert book.list_group("WORK") == ["Ann: 2, ", "Cid: 1, "]
+    assert (book.group_count("work"), book.group_count("Family"), book.group_count("Nobody")) == (2, 1, 0)
+    assert book.list_group("Nobody") == []
+    book.update_contact("Cid", "9", "")
+    assert book.list_group("Work") == ["Ann: 2, ", "Cid: 9, "]
+    book.delete_contact("Ann")
+    assert book.list_group("work") == ["Cid: 9, "] and book.group_count("work") == 1
+    book.delete_contact("Ben")
+    assert book.group_count("family") == 0 and book.list_group("family") == []
+    book.undo_delete()
+    assert book.list_group("Family") == ["Ben: 3, "]
+
+
+def test_tree_multimap_switches_between_node_and_list():
+    # One node per key, a list only while a value is shared, and back to a node.
+    book = ContactBookBST(notify=False)
+    ann = book.add_contact("Ann", "555-0100", "office@example.com")
+    assert book.phone_index["5550100"] is ann
+    ben = book.add_contact("Ben", "555 0100", "OFFICE@example.com")
+    assert book.phone_index["5550100"] == [ann, ben] and book.email_index["office@example.com"] == [ann, ben]
+    book.delete_contact("Ann")
+    assert book.phone_index["5550100"] is ben and book.email_index["office@example.com"] is ben
+    book.undo()
+    assert book.phone_index["5550100"] == [ben, ann]
+    book.update_contact("Ben", "555-0101", "ben@example.com")
+    assert book.phone_index["5550100"] is ann and book.phone_index["5550101"] is ben
+    book.undo()
+    assert book.phone_index["5550100"] == [ann, ben]
+    book.delete_many(["Ann", "Ben"])
+    assert book.phone_index == {} and book.email_index == {}
+
+
+@pytest.mark.parametrize("step", ["undo", "redo"])
+def test_tree_undo_keeps_favorites_and_groups(step):
+    book = ContactBookBST(notify=False)
+    book.add_contact("Ann", "1", "", "Work")
+    book.toggle_favorite("Ann")
+    book.add_many([("Ben", "2", "", "Work"), ("Cid", "3", "", "Home")])
+    book.delete_many(["Ann", "Cid"])
+    book.undo()
+    if step == "redo":
+        book.redo()
+        assert (book.favorites_count(), book.group_count("work"), book.group_count("home")) == (0, 1, 0)
+    else:
+        assert (book.favorites_count(), book.group_count("work"), book.group_count("home")) == (1, 2, 1)
+        assert book.list_group("work") == ["Ann: 1, ", "Ben: 2, "]
+
+
+def test_empty_keys_match_nothing(book):
+    # Contacts without a phone or email are not filed under an empty key, so blank queries find no one.
+    book.add_contact("Ann", "", "")
+    book.add_contact("Ben", "n/a", "none")
+    for query in ("", "   ", "abc", "()-", "n/a"):
+        assert book.find_by_phone(query) is None
+    for query in ("", "   "):
+        assert book.find_by_email(query) is None
@@ -0,0 +1,100 @@
+"""read_contacts_csv_files: header aliases, merge order, spilled runs, and no file left open on errors."""
+import io
+from types import SimpleNamespace
+
+import pytest
+
+import merge_import
+from merge_import import read_contacts_csv_files
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def rows(nodes):
+    return [(node.name, node.phone, node.email, node.group, node.favorite, node.birthday) for node in nodes]
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """The files merge_import opens, kept reachable so only an explicit close() can close them."""
+    files = []
+    wrappers = []
+
+    def tracking_open(*args, **kwargs):
+        files.append(io.open(*args, **kwargs))
+        return files[-1]
+
+    def kept_wrapper(*args, **kwargs):
+        # A wrapper that is garbage collected closes its file, which would hide a leak.
+        wrappers.append(io.TextIOWrapper(*args, **kwargs))
+        return wrappers[-1]
+
+    monkeypatch.setattr(merge_import, "open", tracking_open, raising=False)
+    monkeypatch.setattr(merge_import, "io", SimpleNamespace(TextIOWrapper=kept_wrapper))
+    return files
+
+
+def test_header_aliases_and_column_order(tmp_path):
+    aliased = write(tmp_path / "aliased.csv",
+                    "DOB, Starred ,Category,Mobile,E-mail,Full Name,Notes\n"
+                    "1990-03-12,yes,Work,555-0100,ann@example.com,Ann,skip me\n"
+                    ",no,,,,  Bob  ,\n")
+    # app.py's export: no Group column, Birthday before Favorite.
+    app_export = write(tmp_path / "app.csv", "Name,Phone,Email,Birthday,Favorite\nCid,555-0102,cid@example.com,,True\n")
+    assert rows(read_contacts_csv_files([aliased, app_export])) == [
+        ("Ann", "555-0100", "ann@example.com", "Work", True, "1990-03-12"),
+        ("Bob", "", "", None, False, None),
+        ("Cid", "555-0102", "cid@example.com", None, True, None),
+    ]
+
+
+def test_short_and_nameless_rows(tmp_path):
+    file_name = write(tmp_path / "contacts.csv", "Name,Phone,Email,Group\nAnn,555-0100\n\n,555-0101,x@example.com,Work\n")
+    assert rows(read_contacts_csv_files([file_name])) == [("Ann", "555-0100", "", None, False, None)]
+
+
+def test_missing_name_column_closes_every_file(tmp_path, opened):
+    good = write(tmp_path / "good.csv", "Name,Phone\nAnn,1\n")
+    bad = write(tmp_path / "bad.csv", "Phone,Email\n1,ann@example.com\n")
+    with pytest.raises(ValueError, match="no name column"):
+        list(read_contacts_csv_files([good, good, bad], presorted=[good]))
+    assert len(opened) == 3 and all(file.closed for file in opened)
+
+
+def test_equal_names_keep_file_then_row_order(tmp_path):
+    first = write(tmp_path / "first.csv", "Name,Phone\nSam,1\nann,2\nsam,3\n")
+    second = write(tmp_path / "second.csv", "Name,Phone\nAnn,4\nSAM,5\n")
+    third = write(tmp_path / "third.csv", "Name,Phone\nann,6\nsam,7\n")
+    expected = ["2", "4", "6", "1", "3", "5", "7"]
+    assert [node.phone for node in read_contacts_csv_files([first, second, third])] == expected
+    assert [node.phone for node in read_contacts_csv_files([first, second, third], presorted=[third])] == expected
+
+
+def test_spilled_runs_merge_like_in_memory_ones(tmp_path, monkeypatch):
+    spills = []
+    spill = merge_import._spill
+    monkeypatch.setattr(merge_import, "_spill", lambda run, file: spills.append(file) or spill(run, file))
+    monkeypatch.setattr(merge_import, "SPILL_BLOCK_SIZE", 2)
+    file_names = [write(tmp_path / f"part{part}.csv",
+                        "Name,Phone\n" + "".join(f"Contact {(i * 7 + part) % 25:02d},{part}-{i}\n" for i in range(20)))
+                  for part in range(3)]
+    in_memory = rows(read_contacts_csv_files(file_names))
+    assert not spills
+    progress = []
+    spilled = rows(read_contacts_csv_files(file_names, run_size=3,
+                                           progress=lambda done, read, total: progress.append(done)))
+    assert spills and all(file.closed for file in spills)
+    assert spilled == in_memory
+    assert len(spilled) == 60 and [row[0].lower() for row in spilled] == sorted(row[0].lower() for row in spilled)
+    assert progress[-1] == 60
+
+
+def test_abandoned_merge_closes_every_file(tmp_path, opened):
+    file_names = [write(tmp_path / f"part{part}.csv", "Name\nAnn\nBob\n") for part in range(2)]
+    nodes = read_contacts_csv_files(file_names, presorted=file_names)
+    assert next(nodes).name == "Ann"
+    nodes.close()
+    assert len(opened) == 2 and all(file.closed for file in opened)
@@ -0,0 +1,57 @@
+"""Sorted contact files: written from a book, then looked up through MappedContactBook."""
+import os
+
+import pytest
+
+from main import ContactBookBST, ContactRecord
+from mmap_book import MappedContactBook, pack_record, unpack_record, write_sorted_file
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    book = ContactBookBST(notify=False)
+    book.add_contact("Zoë Ångström", "+46 8 123", "zoe@example.se", "Familj", "1990-02-28")
+    book.add_contact("Łukasz", "", "", None, None)
+    book.add_contact("ann", "555-0100", "ann@example.com", "Work")
+    book.add_contact("Ann", "555-0101", "", None, "2000-02-29")
+    book.add_contact("Bob", "555-0102", "bob@example.com")
+    book.toggle_favorite("Bob")
+    file_name = str(tmp_path / "contacts.cbk")
+    assert write_sorted_file(book.iter_contacts(), file_name) == 5
+    with MappedContactBook(file_name) as mapped_book:
+        yield mapped_book
+
+
+def test_lookups_round_trip(mapped):
+    assert len(mapped) == 5
+    assert mapped.find_contact("ZOË ÅNGSTRÖM") == ContactRecord(
+        "Zoë Ångström", "+46 8 123", "zoe@example.se", "Familj", False, "1990-02-28")
+    assert mapped.find_contact("łukasz") == ContactRecord("Łukasz", "", "", None, False, None)
+    assert mapped.find_contact("bob").favorite
+    assert mapped.find_contact("Nobody") is None
+    assert mapped.find_contact("Zoë") is None and mapped.find_contact("") is None
+
+
+def test_duplicate_names_keep_their_order(mapped):
+    # The first of equal names is the one found; both are listed and prefix-searched.
+    assert mapped.find_contact("ANN").phone == "555-0100"
+    assert [contact.phone for contact in mapped.prefix_search("an")] == ["555-0100", "555-0101"]
+    assert mapped.list_contacts() == [
+        "ann: 555-0100, ann@example.com", "Ann: 555-0101, ", "Bob: 555-0102, bob@example.com",
+        "Zoë Ångström: +46 8 123, zoe@example.se", "Łukasz: , "]
+
+
+def test_field_separator_is_rejected(tmp_path):
+    contact = ContactRecord("Ann", "555\x1f0100", "", None, False, None)
+    with pytest.raises(ValueError, match="field separator"):
+        pack_record(contact)
+    with pytest.raises(ValueError, match="corrupt"):
+        unpack_record("Ann\x1f555\x1f0100\x1f\x1f\x1f\x1f".encode())
+    # A rejected export leaves the previous file and no temporary one.
+    file_name = str(tmp_path / "contacts.cbk")
+    write_sorted_file([ContactRecord("Bob", "1", "", None, False, None)], file_name)
+    with pytest.raises(ValueError):
+        write_sorted_file([ContactRecord("Ann", "1", "", None, False, None), contact], file_name)
+    assert os.listdir(tmp_path) == ["contacts.cbk"]
+    with MappedContactBook(file_name) as mapped_book:
+        assert mapped_book.list_contacts() == ["Bob: 1, "]
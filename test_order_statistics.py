@@ -0,0 +1,90 @@
+"""rank, select, count_range, letter_counts and contacts_page against brute force, after random edits."""
+import random
+import string
+from collections import Counter
+
+import pytest
+
+from app import BinarySearchTree, Contact
+from main import create_contact_book
+
+ENGINES = ["tree", "sorted-array", "columnar"]
+# Duplicates in differing case, and names outside a-z for the "#" bucket on both sides of the alphabet.
+FIRST_NAMES = ["Ann", "ann", "ANN", "Bob", "Zoe", "zed", "Mia", "mike", "Kai", "3M Support", "_Desk", "Émile", "~Tilde"]
+
+
+@pytest.fixture(params=ENGINES)
+def edited(request):
+    """A book after random adds and deletes, and the lowercased names it should hold."""
+    contact_book = create_contact_book(request.param, notify=False)
+    rng = random.Random(21)
+    names = Counter()
+    for step in range(3000):
+        if names and rng.random() < 0.35:
+            name = rng.choice(sorted(names))
+            assert contact_book.delete_contact(name) is not None
+            names[name] -= 1
+            if not names[name]:
+                del names[name]
+        else:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.randrange(40)}"
+            contact_book.add_contact(name, str(step), "")
+            names[name.lower()] += 1
+    return contact_book, names
+
+
+def test_select_and_rank_match_name_order(edited):
+    book, names = edited
+    contacts = list(book.iter_contacts())
+    keys = [contact.name.lower() for contact in contacts]
+    assert keys == sorted(keys)
+    assert Counter(keys) == names
+    assert book.check_invariants() == len(contacts) == len(book)
+    for i, contact in enumerate(contacts):
+        assert book.select(i) == contact
+    with pytest.raises(IndexError):
+        book.select(len(contacts))
+    for key in set(keys) | {"", "a", "ann", "ann 5", "zzz", "\uffff"}:
+        assert book.rank(key) == sum(other < key for other in keys)
+        assert book.rank(key.upper()) == book.rank(key)
+
+
+def test_count_range_and_letter_counts(edited):
+    book, _ = edited
+    keys = [contact.name.lower() for contact in book.iter_contacts()]
+    for low, high in [("a", "b"), ("ann", "ann 2"), ("b", "a"), ("", "\uffff"), ("m", "mike 3"), ("~", "\uffff")]:
+        assert book.count_range(low, high) == sum(low <= key < high for key in keys)
+    expected = dict.fromkeys("#" + string.ascii_lowercase, 0)
+    for key in keys:
+        expected[key[0] if key[0] in string.ascii_lowercase else "#"] += 1
+    assert book.letter_counts() == expected
+    assert expected["#"] > 0
+
+
+def test_contacts_page(edited):
+    book, _ = edited
+    contacts = list(book.iter_contacts())
+    middle = len(contacts) // 2
+    assert book.contacts_page(0, 20) == contacts[:20]
+    assert book.contacts_page(middle, 20) == contacts[middle:middle + 20]
+    assert book.contacts_page(len(contacts) - 3, 20) == contacts[-3:]
+    assert book.contacts_page(len(contacts), 20) == []
+
+
+def test_app_tree_pages_by_subtree_size():
+    # app.py's smaller tree pages by the same size-guided descent.
+    tree = BinarySearchTree()
+    rng = random.Random(5)
+    names = set()
+    for _ in range(2000):
+        if names and rng.random() < 0.35:
+            name = rng.choice(sorted(names))
+            assert tree.delete(name) is not None
+            names.discard(name)
+        elif (name := f"Contact {rng.randrange(5000):04d}") not in names:
+            tree.insert(Contact(name, "", "", None))
+            names.add(name)
+    names = sorted(names)
+    assert tree.root.size == len(tree) == len(names)
+    for offset in (0, 1, len(names) // 2, len(names) - 3, len(names), len(names) + 5):
+        assert [contact.name for contact in tree.contacts_page(offset, 20)] == names[offset:offset + 20]
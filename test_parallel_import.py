@@ -0,0 +1,52 @@
+"""read_contacts_csv_parallel parses a file exactly as read_contacts_csv does."""
+import csv
+
+import pytest
+
+import parallel_import
+from main import read_contacts_csv
+from parallel_import import read_contacts_csv_parallel, split_csv
+
+
+def rows(nodes):
+    # Parallel runs come back sorted per range rather than in file order.
+    return sorted((node.name, node.phone, node.email, node.group, node.favorite, node.birthday) for node in nodes)
+
+
+def test_utf8_with_byte_order_mark(tmp_path):
+    file_name = tmp_path / "contacts.csv"
+    file_name.write_bytes("\ufeffName,Phone,Email,Group,Favorite,Birthday\n".encode("utf-8")
+                          + "".join(f"Zoë {i},555-{i:04d},zoe{i}@example.com,Équipe,True,1990-03-12\n"
+                                    for i in range(200)).encode("utf-8"))
+    parsed = read_contacts_csv_parallel(str(file_name), workers=2)
+    assert len(parsed) == 200
+    assert rows(parsed) == rows(read_contacts_csv(str(file_name)))
+
+
+@pytest.mark.parametrize("scan_block_size", [parallel_import.SCAN_BLOCK_SIZE, 7])
+def test_quoted_newlines_and_quotes_across_range_boundaries(tmp_path, monkeypatch, scan_block_size):
+    # A tiny scan block makes the quote count carry across reads, as it does in big files.
+    monkeypatch.setattr(parallel_import, "SCAN_BLOCK_SIZE", scan_block_size)
+    file_name = tmp_path / "contacts.csv"
+    with open(file_name, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Phone", "Email", "Group", "Favorite", "Birthday"])
+        for i in range(60):
+            # Every other record has a quoted field with newlines and "" escapes long enough to hold a boundary.
+            name = f'Contact {i}\n"The {i}th"\nsecond line, ""quoted"" again' if i % 2 else f"Plain {i}"
+            writer.writerow([name, f"555-{i:04d}", f"c{i}@example.com", 'Say ""hi""' if i % 3 else "", i % 5 == 0,
+                             "1990-03-12"])
+    workers = 2
+    parts = workers * parallel_import.RANGES_PER_WORKER
+    start = parallel_import._header(str(file_name))[1]
+    ranges = split_csv(str(file_name), parts, start)
+    assert len(ranges) > workers
+    data = file_name.read_bytes()
+    # Every range starts a record: an even number of quotes precede it.
+    assert all(data[:low].count(b'"') % 2 == 0 for low, _ in ranges)
+    # The first newline after some split target is inside a quoted field, so the split had to skip it.
+    targets = [start + (len(data) - start) * i // parts for i in range(1, parts)]
+    assert any(data[:data.index(b"\n", target)].count(b'"') % 2 for target in targets)
+    parsed = read_contacts_csv_parallel(str(file_name), workers=workers)
+    assert len(parsed) == 60
+    assert rows(parsed) == rows(read_contacts_csv(str(file_name)))
@@ -0,0 +1,64 @@
+"""ContactServer over a real socket: ordinary requests, and malformed heads answered instead of crashing."""
+import asyncio
+import json
+
+import pytest
+
+from concurrent_book import ConcurrentContactBook
+from main import ContactBookBST
+from server import HOST, ContactServer
+
+
+async def exchange(port, request):
+    """Send raw ``request`` bytes and return (status, JSON body) of the one response."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers["content-length"]))
+        return status, json.loads(body)
+    finally:
+        writer.close()
+
+
+def run(*requests):
+    """Start a server on a free port, send each request on its own connection, and return the responses."""
+    async def session():
+        book = ConcurrentContactBook(ContactBookBST(notify=False))
+        book.add_contact("Alice", "555-0100", "alice@example.com")
+        server = ContactServer(book)
+        port = await server.start(0)
+        try:
+            return [await exchange(port, request) for request in requests]
+        finally:
+            await server.stop()
+
+    return asyncio.run(session())
+
+
+def test_requests_are_answered():
+    body = json.dumps({"name": "Bob", "phone": "555-0101", "email": "bob@example.com"}).encode()
+    (found, _), (added, _), (missing, _) = run(
+        b"GET /contacts/alice HTTP/1.1\r\nConnection: close\r\n\r\n",
+        b"POST /contacts HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body),
+        b"GET /contacts/Nobody HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert (found, added, missing) == (200, 201, 404)
+
+
+@pytest.mark.parametrize("request_bytes, status", [
+    (b"GET /contacts/" + b"a" * 100_000 + b" HTTP/1.1\r\n\r\n", 414),
+    (b"GET /contacts HTTP/1.1\r\nX-Padding: " + b"a" * 100_000 + b"\r\n\r\n", 431),
+    (b"GET /contacts HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+    (b"GET /contacts HTTP/1.1\r\nContent-Length: ten\r\n\r\n", 400),
+    (b"NONSENSE\r\n\r\n", 400),
+], ids=["long-request-line", "long-header", "negative-length", "bad-length", "bad-request-line"])
+def test_malformed_heads_get_an_error_response(request_bytes, status):
+    (answered, payload), (after, _) = run(request_bytes, b"GET /contacts HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert answered == status and "error" in payload
+    # The server is still serving.
+    assert after == 200
@@ -0,0 +1,72 @@
+"""PersistentContactBook: reopening gives back the live book, and a directory is opened by one book at a time."""
+import random
+
+import pytest
+
+from storage import BookInUseError, PersistentContactBook
+
+
+def rows(book):
+    return [(node.name, node.phone, node.email, node.group, node.favorite, node.birthday)
+            for node in book.iter_contacts()]
+
+
+def random_session(book, seed):
+    """Edits, undos and batches over a handful of repeated names (with differing case)."""
+    rng = random.Random(seed)
+    names = ["Ann", "ann", "Bob", "Cy"]
+
+    def value():
+        return rng.choice(["", str(rng.randrange(100))])
+
+    for _ in range(60):
+        name = rng.choice(names)
+        step = rng.randrange(9)
+        if step < 2:
+            book.add_contact(name, value(), value(), rng.choice([None, "Work"]))
+        elif step == 2:
+            book.update_contact(name, value(), value())
+        elif step == 3:
+            book.delete_contact(name)
+        elif step == 4:
+            book.toggle_favorite(name)
+        elif step == 5:
+            book.undo() if rng.random() < 0.7 else book.redo()
+        elif step == 6:
+            book.add_many([(rng.choice(names), value(), value()) for _ in range(rng.randrange(1, 4))])
+        elif step == 7:
+            book.update_many([(rng.choice(names), value(), value()) for _ in range(rng.randrange(1, 4))])
+        else:
+            book.delete_many([rng.choice(names) for _ in range(rng.randrange(1, 4))])
+
+
+@pytest.mark.parametrize("snapshot_every", [3, 7, 10_000])
+def test_reopen_matches_live_book_with_duplicate_names(tmp_path, snapshot_every):
+    for seed in range(40):
+        directory = tmp_path / f"{seed}"
+        book = PersistentContactBook(directory, notify=False, snapshot_every=snapshot_every)
+        random_session(book, seed)
+        live = rows(book)
+        book.close()
+        reopened = PersistentContactBook(directory, notify=False, snapshot_every=snapshot_every)
+        assert rows(reopened) == live, f"seed {seed}"
+        reopened.close()
+
+
+def test_undone_update_restores_blank_fields_after_reopen(tmp_path):
+    book = PersistentContactBook(tmp_path, notify=False)
+    book.add_contact("Ann", "", "")
+    book.update_contact("Ann", "555", "ann@example.com")
+    book.undo()
+    book.close()
+    reopened = PersistentContactBook(tmp_path, notify=False)
+    assert rows(reopened) == [("Ann", "", "", None, False, None)]
+    reopened.close()
+
+
+def test_directory_is_locked_while_open(tmp_path):
+    book = PersistentContactBook(tmp_path, notify=False)
+    with pytest.raises(BookInUseError):
+        PersistentContactBook(tmp_path, notify=False)
+    book.close()
+    PersistentContactBook(tmp_path, notify=False).close()
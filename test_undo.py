@@ -0,0 +1,166 @@
+"""ContactBookBST undo/redo: every edit reverses exactly, redo is forgotten on a new edit, and the journal is bounded."""
+import csv
+from datetime import date
+
+import pytest
+
+from main import ContactBookBST, ContactNode, UndoJournal
+
+
+def details(book):
+    return [(node.name, node.phone, node.email, node.group, node.favorite, node.birthday)
+            for node in book.iter_contacts()]
+
+
+@pytest.fixture
+def book():
+    contact_book = ContactBookBST(notify=False)
+    contact_book.add_contact("Alice", "555-0100", "alice@example.com", "Work", "1990-03-12")
+    contact_book.add_contact("Bob", "555-0101", "bob@example.com")
+    return contact_book
+
+
+def test_undo_redo_add(book, assert_consistent):
+    before = details(book)
+    added = book.add_contact("Carol", "555-0102", "carol@example.com", "Work", "1980-01-01")
+    after = details(book)
+    assert book.undo() is added
+    assert details(book) == before
+    assert book.find_contact("555-0102") is None and book.group_count("work") == 1
+    assert_consistent(book)
+    assert book.redo() is added
+    assert details(book) == after
+    assert book.find_contact("carol@example.com") is added and book.group_count("work") == 2
+    assert_consistent(book)
+
+
+def test_undo_redo_update_with_blank_fields(book, assert_consistent):
+    blank = book.add_contact("Dora", "", "")
+    book.update_contact("Dora", "555-0199", "dora@example.com")
+    book.update_contact("Alice", "", "alice@work.example")
+    assert (book.find_contact("Alice").phone, book.find_contact("Alice").email) == ("555-0100", "alice@work.example")
+    book.undo()
+    assert book.find_contact("Alice").email == "alice@example.com"
+    assert book.find_contact("alice@work.example") is None
+    book.undo()
+    assert (blank.phone, blank.email) == ("", "")
+    assert book.find_by_phone("555-0199") is None and book.find_by_email("dora@example.com") is None
+    assert_consistent(book)
+    book.redo()
+    assert (blank.phone, blank.email) == ("555-0199", "dora@example.com")
+    assert book.find_by_phone("5550199") is blank
+    book.redo()
+    assert book.find_contact("alice@work.example").name == "Alice"
+    assert_consistent(book)
+
+
+def test_undo_redo_delete_keeps_group_birthday_and_favorite(book, assert_consistent):
+    alice = book.toggle_favorite("Alice")
+    before = details(book)
+    assert book.delete_contact("Alice") is alice
+    assert book.favorites_count() == 0 and book.group_count("Work") == 0
+    assert book.undo() is alice
+    assert details(book) == before
+    assert book.favorites_count() == 1 and book.list_group("work") == ["Alice: 555-0100, alice@example.com"]
+    assert book.list_upcoming_birthdays(7, date(2024, 3, 10)) == ["Alice has a birthday on 1990-03-12"]
+    assert_consistent(book)
+    book.redo()
+    assert book.find_contact("Alice") is None and book.favorites_count() == 0
+    assert_consistent(book)
+
+
+def test_undo_redo_favorite(book, assert_consistent):
+    book.toggle_favorite("Bob")
+    assert book.list_favorite_contacts() == ["Bob: 555-0101, bob@example.com"]
+    book.undo()
+    assert not book.find_contact("Bob").favorite and book.favorites_count() == 0
+    book.redo()
+    assert book.find_contact("Bob").favorite and book.favorites_count() == 1
+    assert_consistent(book)
+
+
+def test_new_edit_clears_redo(book):
+    book.add_contact("Carol", "", "")
+    book.undo()
+    assert book.journal.redo_steps
+    book.toggle_favorite("Bob")
+    assert not book.journal.redo_steps
+    assert book.redo() is None
+    assert book.find_contact("Carol") is None
+
+
+def test_nothing_to_undo_or_redo():
+    book = ContactBookBST(notify=False)
+    assert book.undo() is None
+    assert book.redo() is None
+    assert book.undo_delete() is None
+
+
+def test_steps_over_max_steps_are_dropped_oldest_first():
+    book = ContactBookBST(notify=False)
+    book.journal = UndoJournal(max_steps=3)
+    for i in range(5):
+        book.add_contact(f"Contact {i}", "", "")
+    for _ in range(3):
+        assert book.undo() is not None
+    assert book.undo() is None
+    assert [node.name for node in book.iter_contacts()] == ["Contact 0", "Contact 1"]
+
+
+def test_steps_over_max_contacts_are_dropped_oldest_first():
+    book = ContactBookBST(notify=False)
+    book.journal = UndoJournal(max_contacts=5)
+    book.add_many([(f"First {i}", "", "") for i in range(3)])
+    book.add_many([(f"Second {i}", "", "") for i in range(3)])
+    assert book.journal.undo_contacts == 3
+    book.undo()
+    assert book.undo() is None
+    assert [node.name for node in book.iter_contacts()] == ["First 0", "First 1", "First 2"]
+    # A single step heavier than the whole limit leaves nothing to undo.
+    book.add_many([(f"Third {i}", "", "") for i in range(6)])
+    assert book.undo() is None
+    assert len(book) == 9
+
+
+@pytest.mark.parametrize("existing", [3, 2000])
+def test_csv_import_is_one_step(tmp_path, existing, assert_consistent):
+    # 3 existing contacts take the rebuild path on undo; 2000 take per-contact deletes.
+    book = ContactBookBST(notify=False)
+    book.add_many([(f"Old {i:04d}", f"1{i:04d}", f"old{i}@example.com", "Old") for i in range(existing)])
+    book.toggle_favorite("Old 0001")
+    file_name = tmp_path / "contacts.csv"
+    with open(file_name, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Phone", "Email", "Group", "Favorite", "Birthday"])
+        writer.writerows((f"New {i:03d}", f"2{i:04d}", f"new{i}@example.com", "New", i % 2 == 0, "1990-03-12")
+                         for i in range(10))
+    before = details(book)
+    count, _ = book.import_contacts_from_csv(file_name)
+    assert count == 10
+    after = details(book)
+
+    book.undo()
+    assert details(book) == before
+    assert book.group_count("New") == 0 and book.favorites_count() == 1
+    assert book.find_contact("new3@example.com") is None
+    assert assert_consistent(book) == existing
+    book.redo()
+    assert details(book) == after
+    assert book.group_count("New") == 10 and book.favorites_count() == 6
+    assert book.find_contact("20003").name == "New 003"
+    assert assert_consistent(book) == existing + 10
+
+
+def test_deferred_bulk_load_is_one_step(assert_consistent):
+    book = ContactBookBST(notify=False)
+    nodes = [ContactNode(f"Bulk {i}", f"3{i:03d}", "", "Bulk", i == 0) for i in range(50)]
+    book.bulk_load(nodes, defer_index=True)
+    book.add_contact("Zed", "999", "")
+    book.undo()
+    book.undo()
+    assert len(book) == 0 and book.group_count("Bulk") == 0
+    assert_consistent(book)
+    book.redo()
+    assert book.group_count("Bulk") == 50 and book.favorites_count() == 1
+    assert book.find_by_phone("3007") is nodes[7]
+    assert assert_consistent(book) == 50